@@ -0,0 +1,144 @@
+""" Fetch many pages from a website concurrently, politely, and only when they've changed.
+
+One requests.Session is shared by all the worker threads, so connections are kept
+alive and reused. Requests to each host are spaced out by a rate limiter, failed
+requests are retried with exponential backoff, and the ETag and Last-Modified
+headers of each page can be remembered so the next fetch can be a conditional request
+answered with 304 Not Modified.
+
+A page's headers are returned with it, as response.validators, and only remembered when
+save_validators is called, so a page whose shows fail to be saved is downloaded again next time.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from lmn.cache import shared_cache
+
+
+class RateLimiter:
+    """ Space out requests to each host so there are at most requests_per_second. """
+
+    def __init__(self, requests_per_second):
+        self.interval = 1 / requests_per_second if requests_per_second else 0
+        self.lock = threading.Lock()
+        self.next_slot = {}
+
+    def wait(self, host):
+        """ Block until this thread may make a request to host. """
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot.get(host, now))
+            self.next_slot[host] = slot + self.interval
+        time.sleep(slot - now)
+
+
+class CachedValidators:
+    """ ETag and Last-Modified headers by URL, kept in the shared cache so they outlive the process. """
+
+    prefix = 'crawler_validators:'
+
+    def get(self, url, default=None):
+        return shared_cache().get(self.prefix + url, default)
+
+    def __setitem__(self, url, validators):
+        shared_cache().set(self.prefix + url, validators, timeout=None)
+
+
+class Crawler:
+    """ Fetch pages with a shared pool of keep-alive connections.
+
+    Args:
+        max_workers ([int]): number of pages fetched at once
+        requests_per_second ([float]): limit for each host, 0 for no limit
+        retries ([int]): extra attempts after a connection error, timeout or 429/5xx response
+        backoff ([float]): seconds to wait before the first retry, doubled for each one after
+        timeout ([float]): seconds to wait for the server to respond
+        validators ([dict]): where ETag/Last-Modified headers are remembered, by URL.
+            Defaults to the shared cache.
+    """
+
+    retry_statuses = {429, 500, 502, 503, 504}
+
+    def __init__(self, max_workers=4, requests_per_second=2, retries=3, backoff=0.5, timeout=10, validators=None):
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.rate_limiter = RateLimiter(requests_per_second)
+        self.validators = CachedValidators() if validators is None else validators
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def fetch(self, url):
+        """Get one page, sending the validators saved the last time it was fetched.
+
+        Args:
+            url ([string]): url of the webpage
+
+        Returns:
+            [Response]: the last response. Status 304 means the page hasn't changed. response.validators
+                has its ETag and Last-Modified headers for save_validators, or is None if it isn't a 200.
+
+        Raises:
+            requests.RequestException: if the request still fails after all retries
+        """
+        headers = {}
+        validators = self.validators.get(url) or {}
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+
+        host = urlsplit(url).netloc
+        for attempt in range(self.retries + 1):
+            self.rate_limiter.wait(host)
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.retries:
+                    raise
+                logging.info(f'Retrying {url} after connection error')
+                time.sleep(self.backoff * 2 ** attempt)
+                continue
+
+            if response.status_code in self.retry_statuses and attempt < self.retries:
+                logging.info(f'Retrying {url} after status {response.status_code}')
+                time.sleep(self.retry_delay(response, attempt))
+                continue
+
+            response.validators = None
+            if response.status_code == 200:
+                response.validators = {
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified'),
+                }
+            return response
+
+    def save_validators(self, validators):
+        """ Remember pages' validators, by URL, so the next fetch of each can be answered with 304 Not Modified.
+
+        Call this once what was read from the pages has been saved.
+        """
+        for url, page_validators in validators.items():
+            self.validators[url] = page_validators
+
+    def fetch_all(self, urls):
+        """ Get many pages concurrently. Returns the responses in the same order as urls. """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return list(pool.map(self.fetch, urls))
+
+    def retry_delay(self, response, attempt):
+        """ Seconds to wait before retrying, the server's Retry-After if it sent one. """
+        retry_after = response.headers.get('Retry-After', '')
+        if retry_after.isdigit():
+            return int(retry_after)
+        return self.backoff * 2 ** attempt
@@ -1,12 +1,21 @@
 from django.http.response import Http404
-import requests
-from bs4 import BeautifulSoup
 import datetime
-import pytz
+import re
+
+from lmn.timezones import get_zone
+
+from .crawler import Crawler
+from .show_parser import parse_shows
 
 # URL to be used to find past shows
 first_ave_url = 'https://first-avenue.com/shows/?orderby=past_shows'
 
+# URL of later pages of past shows, format with the page number
+first_ave_page_url = 'https://first-avenue.com/shows/page/{}/?orderby=past_shows'
+
+# Shared by every request, so connections to First Ave are reused
+crawler = Crawler()
+
 # Known venues and their locations
 venues_and_locations = {
     'Fine Line' : 'Minneapolis', 
@@ -18,46 +27,82 @@ venues_and_locations = {
     }
 
 
-def request_webpage_text(url):
+def request_webpage_text(url, validators=None):
     """Makes a request, and returns the html text of the webpage
 
     Args:
         url ([string]): url of the webpage
+        validators ([dict]): if given, the page's ETag and Last-Modified are added to it, by url, for save_validators
 
     Returns:
-        [string]: html text of the webpage
+        [string]: html text of the webpage, 404 if not found, or None if unchanged since the last request
     """
-    response = requests.get('https://first-avenue.com/shows/?orderby=past_shows')
+    response = crawler.fetch(url)
+    if validators is not None and response.validators:
+        validators[url] = response.validators
+    return response_text(response)
+
+
+def request_webpage_texts(urls, validators=None):
+    """Makes requests for several pages at once
+
+    Args:
+        urls ([list]): urls of the webpages
+        validators ([dict]): if given, each page's ETag and Last-Modified are added to it, by url
+
+    Returns:
+        [list]: html text of each webpage, in the same order, 404 if not found, or None if unchanged
+    """
+    responses = crawler.fetch_all(urls)
+    if validators is not None:
+        validators.update((url, response.validators) for url, response in zip(urls, responses) if response.validators)
+    return [response_text(response) for response in responses]
+
+
+def save_validators(validators):
+    """Remember the validators of pages read by get_past_show_data, once their shows are saved,
+    so the pages are only downloaded again if they change.
+
+    Args:
+        validators ([dict]): filled in by get_past_show_data
+    """
+    crawler.save_validators(validators)
+
+
+def response_text(response):
+    """Html text of a response, 404 if not found, or None if unchanged (304)"""
     if response.status_code == 404:
         return 404
-    rtext = response.text
-    return rtext
+    if response.status_code == 304:
+        return None
+    return response.text
 
 
-def parse_page_for_show_information(rtext):
-    """Parse page for show information using beautiful soup
+def last_page_number(rtext):
+    """Find the number of the last page of shows from the pagination links
+
+    Args:
+        rtext ([string]): Raw html text of a page of shows
+
+    Returns:
+        [int]: highest page number linked to, 1 if there are no links
+    """
+    return max((int(number) for number in re.findall(r'/shows/page/(\d+)/', rtext)), default=1)
+
+
+def parse_page_for_show_information(rtext, backend=None):
+    """Parse page for show information
 
     Args:
         rtext (rtext): Raw html text from https://first-avenue.com/shows/?orderby=past_shows
+        backend ([string]): show parser backend, see show_parser.py. Defaults to the fastest installed.
 
     Returns:
         [show_list]: List of dictionaries, each representing a show
     """
     if rtext == Http404:
         return 404
-    page = BeautifulSoup(rtext, 'html.parser')
-    shows = page.select('.show_list_item')
-    show_list = []
-    for show in shows:
-        show_data = {}
-        show_data['month'] = show.find(class_='month').text.strip('\n\t')
-        show_data['day'] = show.find(class_='day').text
-        show_data['year'] = show.find(class_='year').text
-        show_data['venue_name'] = show.find(class_='venue_name').text.strip('\n\t')
-        show_data['artist_name'] = show.h4.a.text.replace(u'\xa0', u' ')
-        show_data['venue_state'] = 'Minnesota'
-        show_list.append(show_data)
-    return show_list
+    return list(parse_shows(rtext, backend))
 
 
 def get_venue_cities(show_list):
@@ -87,9 +132,8 @@ def convert_show_datetime(show_datetime):
     
     Returns:
         show_datetime_UTC ([datetime]) Aware datetime object converted to UTC"""
-    # https://pynative.com/python-timezone/
-    show_datetime_aware = pytz.timezone('America/Chicago').localize(show_datetime) # convert to aware datetime in the same timezone used in show locations (MN)
-    show_datetime_UTC = show_datetime_aware.astimezone(pytz.utc) # convert aware datetime to UTC time zone for DB storage
+    show_datetime_aware = show_datetime.replace(tzinfo=get_zone('America/Chicago')) # convert to aware datetime in the same timezone used in show locations (MN)
+    show_datetime_UTC = show_datetime_aware.astimezone(datetime.timezone.utc) # convert aware datetime to UTC time zone for DB storage
     return show_datetime_UTC
 
 
@@ -112,11 +156,34 @@ def make_datetime_objects(show_list):
     return show_list
 
 
-def get_past_show_data():
-    webpage = request_webpage_text(first_ave_url)
+def get_past_show_data(max_pages=1, validators=None):
+    """Get shows from the first max_pages pages of First Ave's past shows
+
+    Pages after the first are fetched concurrently. Pages which haven't changed since
+    their validators were saved are skipped, since their shows were saved then.
+
+    Args:
+        max_pages ([int]): number of pages of past shows to read
+        validators ([dict]): if given, the ETag and Last-Modified of each page read are added to it.
+            Pass it to save_validators after the shows have been saved.
+
+    Returns:
+        [show_list]: List of dictionaries, each representing a show
+    """
+    webpage = request_webpage_text(first_ave_url, validators)
     if webpage == 404:
         return Http404('First Ave Not Found')
+    if webpage is None:
+        # newest shows come first, so if page 1 is unchanged there's nothing new anywhere
+        return []
+
     show_list = parse_page_for_show_information(webpage)
+    last_page = min(max_pages, last_page_number(webpage)) if isinstance(webpage, str) else 1
+    if last_page > 1:
+        urls = [first_ave_page_url.format(number) for number in range(2, last_page + 1)]
+        for page in request_webpage_texts(urls, validators):
+            if page not in (None, 404):
+                show_list.extend(parse_page_for_show_information(page))
     show_list_with_cities = get_venue_cities(show_list)
     show_list_with_datetimes = make_datetime_objects(show_list_with_cities)
     return show_list_with_datetimes
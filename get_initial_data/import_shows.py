@@ -0,0 +1,109 @@
+""" Save scraped shows, and their artists and venues, to the database in bulk.
+
+Rather than saving each show, artist and venue separately and catching IntegrityError
+for the ones already saved, the whole batch is deduplicated in memory, the rows that
+already exist are found with one query per model, and everything new is inserted
+with bulk_create, all in one transaction.
+"""
+
+from django.db import connections, transaction, DEFAULT_DB_ALIAS
+
+from lmn.models import Venue, Artist, Show
+from lmn.search import backend_for
+from lmn.cache import bump_versions
+
+
+class ImportResult:
+    """ Numbers of venues, artists and shows inserted, and skipped because they were already saved. """
+
+    def __init__(self):
+        self.inserted = {'venues': 0, 'artists': 0, 'shows': 0}
+        self.skipped = {'venues': 0, 'artists': 0, 'shows': 0}
+
+    def __str__(self):
+        return ', '.join(f'{kind}: {self.inserted[kind]} inserted, {self.skipped[kind]} skipped' for kind in self.inserted)
+
+
+def import_shows(shows, using=DEFAULT_DB_ALIAS):
+    """Save shows from get_past_show_data, creating any artists and venues they need.
+
+    Args:
+        shows ([list]): List of dictionaries, each representing a show, with keys
+            artist_name, venue_name, venue_city, venue_state and datetime
+        using ([string]): database alias
+
+    Returns:
+        [ImportResult]: counts of rows inserted and skipped
+    """
+    result = ImportResult()
+
+    # Dedupe in memory. The first show mentioning a venue decides its city and state.
+    venues = {}
+    artist_names = set()
+    show_keys = set()
+    for show in shows:
+        venues.setdefault(show['venue_name'], (show['venue_city'], show['venue_state']))
+        artist_names.add(show['artist_name'])
+        show_keys.add((show['datetime'], show['artist_name'], show['venue_name']))
+
+    with transaction.atomic(using=using):
+        venue_ids = _save_by_name(
+            Venue, [Venue(name=name, city=city, state=state) for name, (city, state) in venues.items()],
+            'venues', result, using
+        )
+        artist_ids = _save_by_name(Artist, [Artist(name=name) for name in artist_names], 'artists', result, using)
+
+        new_shows = [
+            Show(show_date=date, artist_id=artist_ids[artist_name], venue_id=venue_ids[venue_name])
+            for date, artist_name, venue_name in show_keys
+        ]
+        existing = set()
+        if new_shows:
+            dates = [show.show_date for show in new_shows]
+            existing = set(
+                Show.objects.using(using)
+                .filter(show_date__range=(min(dates), max(dates)))
+                .values_list('show_date', 'artist_id', 'venue_id')
+            )
+        new_shows = [show for show in new_shows if (show.show_date, show.artist_id, show.venue_id) not in existing]
+        Show.objects.using(using).bulk_create(new_shows, ignore_conflicts=True)
+        result.inserted['shows'] = len(new_shows)
+        result.skipped['shows'] = len(show_keys) - len(new_shows)
+
+        # bulk_create doesn't send post_save either, so make cached pages stale here
+        bump_versions(Venue, Artist, Show)
+        transaction.on_commit(lambda: bump_versions(Venue, Artist, Show), using=using)
+
+    return result
+
+
+def _save_by_name(model, objects, kind, result, using):
+    """ Insert the objects whose names aren't saved yet. Returns a dictionary of name: pk for all of them. """
+    names = [obj.name for obj in objects]
+    ids = _ids_by_name(model, names, using)
+    new_objects = [obj for obj in objects if obj.name not in ids]
+
+    model.objects.using(using).bulk_create(new_objects, ignore_conflicts=True)
+    new_ids = _ids_by_name(model, [obj.name for obj in new_objects], using)
+    ids.update(new_ids)
+
+    # bulk_create doesn't send post_save, so add the new rows to the search index here
+    backend_for(using).index_many(model, list(new_ids.values()))
+
+    result.inserted[kind] = len(new_objects)
+    result.skipped[kind] = len(objects) - len(new_objects)
+    return ids
+
+
+def _ids_by_name(model, names, using):
+    """ One IN query, split into chunks if there are more names than the database allows parameters. """
+    ids = {}
+    size = _batch_size(using)
+    for start in range(0, len(names), size):
+        chunk = names[start:start + size]
+        ids.update(model.objects.using(using).filter(name__in=chunk).values_list('name', 'pk'))
+    return ids
+
+
+def _batch_size(using):
+    return connections[using].features.max_query_params or 10000
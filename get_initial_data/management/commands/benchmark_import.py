@@ -0,0 +1,60 @@
+""" Time importing a large batch of synthetic scraped shows.
+
+    python manage.py benchmark_import
+    python manage.py benchmark_import --shows 100000 --artists 20000 --venues 200
+
+Everything is imported inside a transaction which is rolled back at the end, so the
+database is left as it was. The batch is imported twice, to time the case where every
+show is already saved as well as the case where none are.
+"""
+
+import datetime
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from get_initial_data.import_shows import import_shows
+
+
+class Command(BaseCommand):
+    help = 'Time import_shows on a large batch of synthetic scraped shows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shows', type=int, default=100000)
+        parser.add_argument('--artists', type=int, default=20000)
+        parser.add_argument('--venues', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        shows = synthetic_shows(options['shows'], options['artists'], options['venues'], random.Random(options['seed']))
+
+        with transaction.atomic():
+            for label in ('empty database', 'all shows already saved'):
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    result = import_shows(shows)
+                    seconds = time.perf_counter() - start
+                self.stdout.write(f'{label}: {len(shows)} shows in {seconds:.2f}s, {len(queries)} queries')
+                self.stdout.write(f'  {result}')
+            transaction.set_rollback(True)
+
+
+def synthetic_shows(count, artists, venues, rng):
+    """ Shows in the format returned by get_past_show_data, a few artists playing most of them. """
+    start = timezone.now() - datetime.timedelta(days=3650)
+    shows = []
+    for n in range(count):
+        artist = int(artists * rng.random() ** 3)
+        venue = rng.randrange(venues)
+        shows.append({
+            'artist_name': f'Artist {artist}',
+            'venue_name': f'Venue {venue}',
+            'venue_city': 'Minneapolis',
+            'venue_state': 'Minnesota',
+            'datetime': start + datetime.timedelta(hours=n),
+        })
+    return shows
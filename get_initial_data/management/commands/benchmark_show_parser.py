@@ -0,0 +1,80 @@
+""" Compare the show parser backends on a large synthetic page of shows.
+
+    python manage.py benchmark_show_parser
+    python manage.py benchmark_show_parser --megabytes 10 --repeat 3 --backend stream
+
+The page is made by repeating the shows in the example First Ave page, each with a
+different artist name, until it is the size asked for. Time is the best of the repeats,
+memory is the peak allocated while parsing, measured with tracemalloc.
+"""
+
+import os
+import re
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+
+from get_initial_data.show_parser import parse_shows, available_backends
+
+
+EXAMPLE_PAGE = os.path.join(os.path.dirname(__file__), '..', '..', 'test_data', 'example_first_avenue_response.html')
+
+
+class Command(BaseCommand):
+    help = 'Time each show parser backend on a large synthetic page of shows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--megabytes', type=float, default=10)
+        parser.add_argument('--repeat', type=int, default=1)
+        parser.add_argument('--backend', action='append', choices=available_backends(),
+                            help='Backend to time, may be repeated. Defaults to all installed backends.')
+
+    def handle(self, *args, **options):
+        page = synthetic_page(int(options['megabytes'] * 1024 * 1024))
+        self.stdout.write(f'Page of {len(page) / 1024 / 1024:.1f} MB')
+        self.stdout.write(f'{"backend":>8} {"shows":>8} {"seconds":>8} {"peak MB":>8}')
+
+        results = {}
+        for backend in options['backend'] or available_backends():
+            seconds = min(timed(lambda: list(parse_shows(page, backend))) for _ in range(options['repeat']))
+
+            tracemalloc.start()
+            shows = list(parse_shows(page, backend))
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            results[backend] = shows
+            self.stdout.write(f'{backend:>8} {len(shows):>8} {seconds:>8.2f} {peak / 1024 / 1024:>8.1f}')
+
+        first, *others = results.values()
+        if any(shows != first for shows in others):
+            raise CommandError('The backends did not parse the same shows')
+
+
+def timed(function):
+    """ Seconds taken to call function. """
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def synthetic_page(size):
+    """ The example page with its shows repeated until it is at least size characters long. """
+    with open(EXAMPLE_PAGE) as example:
+        html = example.read()
+
+    # every show but the last, with whatever is between each show and the next
+    first = html.index('<div class="show_list_item"')
+    last = html.rindex('<div class="show_list_item"')
+    shows = html[first:last]
+
+    copies = []
+    length = len(html)
+    number = 0
+    while length < size:
+        copy = re.sub(r'(<h4[^>]*>\s*<a[^>]*>)([^<]*)', lambda match: f'{match.group(1)}{match.group(2)} {number}', shows)
+        copies.append(copy)
+        length += len(copy)
+        number += 1
+    return html[:first] + ''.join(copies) + html[first:]
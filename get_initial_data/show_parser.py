@@ -0,0 +1,221 @@
+""" Parsers for First Ave's pages of shows.
+
+Every backend yields the same show dictionaries, in page order, as each show is parsed:
+
+soup - builds a BeautifulSoup tree of the whole page and searches it. The original parser.
+stream - reads the page with the standard library's HTMLParser, without building a tree,
+    keeping only the text of the show currently being read.
+lxml - the stream parser's handler driven by lxml's C parser. Only available if lxml is installed.
+
+The backend used by default is settings.SHOW_PARSER_BACKEND, or the fastest one installed.
+"""
+
+from html.parser import HTMLParser
+
+from bs4 import BeautifulSoup
+from django.conf import settings
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+
+# Classes of the elements in a show holding each field. The first element found in the show is used.
+FIELD_CLASSES = {
+    'month': 'month',
+    'day': 'day',
+    'year': 'year',
+    'venue_name': 'venue_name',
+}
+
+# Elements which never have an end tag
+VOID_ELEMENTS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'param', 'source', 'track', 'wbr',
+}
+
+# Pages are fed to the streaming parsers in pieces this big, so shows are yielded as the page is read
+CHUNK_SIZE = 64 * 1024
+
+
+def parse_shows(rtext, backend=None):
+    """Parse a page of shows, one show at a time
+
+    Args:
+        rtext ([string]): Raw html text from https://first-avenue.com/shows/?orderby=past_shows
+        backend ([string]): 'soup', 'stream' or 'lxml', defaults to default_backend()
+
+    Returns:
+        [generator]: dictionaries, each representing a show
+    """
+    backend = backend or default_backend()
+    if backend not in available_backends():
+        raise ValueError(f'Unknown show parser backend {backend!r}, choose from {", ".join(available_backends())}')
+    return BACKENDS[backend](rtext)
+
+
+def available_backends():
+    """ Names of the backends which can be used here. """
+    return [name for name in BACKENDS if name != 'lxml' or etree is not None]
+
+
+def default_backend():
+    """ settings.SHOW_PARSER_BACKEND if set, otherwise lxml if installed, otherwise stream. """
+    return getattr(settings, 'SHOW_PARSER_BACKEND', None) or ('lxml' if etree is not None else 'stream')
+
+
+def show_dict(month, day, year, venue_name, artist_name):
+    """ A show in the format parse_page_for_show_information has always returned. """
+    return {
+        'month': month.strip('\n\t'),
+        'day': day,
+        'year': year,
+        'venue_name': venue_name.strip('\n\t'),
+        'artist_name': artist_name.replace(u'\xa0', u' '),
+        'venue_state': 'Minnesota',
+    }
+
+
+def soup_shows(rtext):
+    """ Search a BeautifulSoup tree of the whole page. """
+    page = BeautifulSoup(rtext, 'html.parser')
+    for show in page.select('.show_list_item'):
+        fields = {field: show.find(class_=css_class).text for field, css_class in FIELD_CLASSES.items()}
+        yield show_dict(artist_name=show.h4.a.text, **fields)
+
+
+class ShowHandler:
+    """ Collect shows from a stream of start tag, end tag and text events.
+
+    Keeps a stack of the open elements, like a tree builder, but throws away everything
+    except the text of the fields of the show being read. The method names and arguments
+    are the ones lxml calls on a parser target.
+    """
+
+    def __init__(self):
+        self.open_tags = []
+        self.show_depth = None   # depth of the show_list_item element being read
+        self.fields = {}         # text of each field found so far in this show
+        self.capturing = {}      # field: depth of its element, for the fields being read
+        self.h4_depth = None     # depth of the show's first h4, which holds the artist link
+        self.seen_h4 = False
+        self.shows = []          # shows finished since the last time they were collected
+
+    def start(self, tag, attrs):
+        """ An element opened. attrs is a dictionary, or a list of (name, value) pairs. """
+        if tag in VOID_ELEMENTS:
+            return
+        self.open_tags.append(tag)
+        depth = len(self.open_tags)
+        classes = (dict(attrs).get('class') or '').split()
+
+        if self.show_depth is None:
+            if 'show_list_item' in classes:
+                self.show_depth = depth
+                self.fields = {}
+                self.capturing = {}
+                self.h4_depth = None
+                self.seen_h4 = False
+            return
+
+        for field, css_class in FIELD_CLASSES.items():
+            if css_class in classes and field not in self.fields:
+                self.fields[field] = ''
+                self.capturing[field] = depth
+        if tag == 'h4' and not self.seen_h4:
+            self.seen_h4 = True
+            self.h4_depth = depth
+        elif tag == 'a' and self.h4_depth is not None and 'artist_name' not in self.fields:
+            self.fields['artist_name'] = ''
+            self.capturing['artist_name'] = depth
+
+    def end(self, tag):
+        """ An element closed. """
+        if tag not in self.open_tags:
+            return   # a stray end tag, ignored like BeautifulSoup does
+        # an end tag closes any elements opened inside it which were never closed
+        while self.open_tags:
+            depth = len(self.open_tags)
+            closed = self.open_tags.pop()
+            self.element_closed(depth)
+            if closed == tag:
+                break
+
+    def element_closed(self, depth):
+        """ Finish any field, artist h4 or show whose element was at this depth. """
+        for field, field_depth in list(self.capturing.items()):
+            if field_depth == depth:
+                del self.capturing[field]
+        if depth == self.h4_depth:
+            self.h4_depth = None
+        if depth == self.show_depth:
+            self.show_depth = None
+            self.shows.append(show_dict(**self.fields))
+
+    def data(self, text):
+        """ Text inside the current element. """
+        for field in self.capturing:
+            self.fields[field] += text
+
+    def close(self):
+        """ The end of the page closes every element still open. """
+        while self.open_tags:
+            self.element_closed(len(self.open_tags))
+            self.open_tags.pop()
+
+    def collect(self):
+        """ The shows finished since this was last called. """
+        shows, self.shows = self.shows, []
+        return shows
+
+
+class StreamingShowParser(HTMLParser):
+    """ Feed the standard library parser's events to a ShowHandler. """
+
+    def __init__(self, handler):
+        super().__init__(convert_charrefs=True)
+        self.handler = handler
+
+    def handle_starttag(self, tag, attrs):
+        self.handler.start(tag, attrs)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handler.start(tag, attrs)
+        if tag not in VOID_ELEMENTS:
+            self.handler.end(tag)
+
+    def handle_endtag(self, tag):
+        self.handler.end(tag)
+
+    def handle_data(self, data):
+        self.handler.data(data)
+
+
+def stream_shows(rtext):
+    """ Read the page with HTMLParser, yielding each show once its element is closed. """
+    handler = ShowHandler()
+    parser = StreamingShowParser(handler)
+    for start in range(0, len(rtext), CHUNK_SIZE):
+        parser.feed(rtext[start:start + CHUNK_SIZE])
+        yield from handler.collect()
+    parser.close()
+    handler.close()
+    yield from handler.collect()
+
+
+def lxml_shows(rtext):
+    """ Read the page with lxml, calling the same handler as stream_shows. """
+    handler = ShowHandler()
+    parser = etree.HTMLParser(target=handler)
+    for start in range(0, len(rtext), CHUNK_SIZE):
+        parser.feed(rtext[start:start + CHUNK_SIZE])
+        yield from handler.collect()
+    parser.close()
+    yield from handler.collect()
+
+
+BACKENDS = {
+    'soup': soup_shows,
+    'stream': stream_shows,
+    'lxml': lxml_shows,
+}
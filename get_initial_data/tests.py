@@ -2,13 +2,27 @@ from django.http.response import Http404
 from django.test import TestCase
 from django.urls import reverse
 
-from lmn.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from lmn.models import User, Artist, Show
+from lmn.search import search
 from .get_show_data import get_past_show_data, parse_page_for_show_information, get_venue_cities, make_datetime_objects
+from .import_shows import import_shows
+from .crawler import Crawler
+from .show_parser import parse_shows, available_backends
+from . import show_parser
+from . import get_show_data
 
 from unittest.mock import patch
+from unittest import skipUnless
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 import datetime
 import os
 import pytz 
+import re
+import threading
+import time
 
 
 class TestGetShowData(TestCase):
@@ -205,3 +219,268 @@ class TestPopulateDatabaseWithAuthorizedUser(TestCase):
         response = self.client.get(reverse('populate_db'))
         self.assertEqual(response.status_code, 200)
 
+
+
+class TestImportShows(TestCase):
+
+    fixtures = ['testing_artists', 'testing_venues', 'testing_shows']
+
+    def make_show(self, artist_name, venue_name, day, city='Minneapolis'):
+        return {
+            'artist_name': artist_name, 'venue_name': venue_name, 'venue_city': city, 'venue_state': 'Minnesota',
+            'datetime': pytz.utc.localize(datetime.datetime(2021, 11, day, 19, 0)),
+        }
+
+    def test_new_shows_artists_and_venues_saved(self):
+        result = import_shows([
+            self.make_show('Beach Bunny', 'Fine Line', 28),
+            self.make_show('Monophonics', 'Turf Club', 28, city='St. Paul'),
+        ])
+        self.assertEqual(result.inserted, {'venues': 2, 'artists': 2, 'shows': 2})
+        self.assertEqual(result.skipped, {'venues': 0, 'artists': 0, 'shows': 0})
+        show = Show.objects.get(artist__name='Monophonics')
+        self.assertEqual(show.venue.name, 'Turf Club')
+        self.assertEqual(show.venue.city, 'St. Paul')
+        self.assertEqual(show.show_date, datetime.datetime(2021, 11, 28, 19, 0, tzinfo=pytz.utc))
+
+    def test_existing_artists_and_venues_reused(self):
+        # REM and First Avenue are in the fixtures
+        result = import_shows([self.make_show('REM', 'First Avenue', 1)])
+        self.assertEqual(result.inserted, {'venues': 0, 'artists': 0, 'shows': 1})
+        self.assertEqual(result.skipped, {'venues': 1, 'artists': 1, 'shows': 0})
+        self.assertEqual(Artist.objects.filter(name='REM').count(), 1)
+        self.assertEqual(Show.objects.get(show_date__day=1, show_date__month=11).artist, Artist.objects.get(name='REM'))
+
+    def test_duplicates_in_batch_saved_once(self):
+        show = self.make_show('Sunset', '7th St Entry', 1)
+        result = import_shows([show, dict(show), self.make_show('Sunset', '7th St Entry', 2)])
+        self.assertEqual(result.inserted, {'venues': 1, 'artists': 1, 'shows': 2})
+        self.assertEqual(Show.objects.filter(artist__name='Sunset').count(), 2)
+
+    def test_importing_same_shows_again_skips_them(self):
+        shows = [self.make_show('Sunset', '7th St Entry', 1), self.make_show('The Aces', 'Fine Line', 30)]
+        import_shows(shows)
+        show_count = Show.objects.count()
+        result = import_shows(shows)
+        self.assertEqual(result.inserted, {'venues': 0, 'artists': 0, 'shows': 0})
+        self.assertEqual(result.skipped, {'venues': 2, 'artists': 2, 'shows': 2})
+        self.assertEqual(Show.objects.count(), show_count)
+
+    def test_query_count_does_not_depend_on_number_of_shows(self):
+        few = [self.make_show(f'Artist {n}', f'Venue {n}', n + 1) for n in range(2)]
+        many = [self.make_show(f'Band {n}', f'Hall {n}', n + 1) for n in range(25)]
+        with CaptureQueriesContext(connection) as few_queries:
+            import_shows(few)
+        with CaptureQueriesContext(connection) as many_queries:
+            import_shows(many)
+        self.assertEqual(len(few_queries), len(many_queries))
+
+    def test_imported_artists_are_searchable(self):
+        import_shows([self.make_show('Frozen Soul', '7th St Entry', 28)])
+        self.assertEqual([artist.name for artist in search(Artist.objects.all(), 'frozen')], ['Frozen Soul'])
+
+    def test_populate_db_imports_shows(self):
+        superuser = User.objects.create_user('test', 'test@test.com', 'password')
+        superuser.is_superuser = True
+        superuser.save()
+        self.client.force_login(superuser)
+        with patch('get_initial_data.admin_views.get_past_show_data', return_value=[self.make_show('Ben Noble', 'Turf Club', 1)]):
+            response = self.client.get(reverse('populate_db'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(Show.objects.filter(artist__name='Ben Noble', venue__name='Turf Club').exists())
+
+
+class TestShowParserBackends(TestCase):
+
+    def setUp(self):
+        with open(os.path.join('get_initial_data', 'test_data', 'example_first_avenue_response.html'), 'r') as example_response_file:
+            self.first_ave_response = example_response_file.read()
+        self.expected = list(parse_shows(self.first_ave_response, 'soup'))
+
+    def test_stream_parser_same_as_soup(self):
+        self.assertEqual(len(self.expected), 10)
+        self.assertEqual(list(parse_shows(self.first_ave_response, 'stream')), self.expected)
+
+    @skipUnless('lxml' in available_backends(), 'lxml not installed')
+    def test_lxml_parser_same_as_soup(self):
+        self.assertEqual(list(parse_shows(self.first_ave_response, 'lxml')), self.expected)
+
+    def test_stream_parser_across_chunk_boundaries(self):
+        with patch.object(show_parser, 'CHUNK_SIZE', 7):
+            self.assertEqual(list(parse_shows(self.first_ave_response, 'stream')), self.expected)
+
+    def test_stream_parser_yields_shows_before_page_is_read(self):
+        with patch.object(show_parser, 'CHUNK_SIZE', 1000):
+            shows = parse_shows(self.first_ave_response, 'stream')
+            next(shows)
+        # the generator has stopped partway through the page
+        self.assertIsNotNone(shows.gi_frame)
+
+    def test_stream_parser_same_as_soup_on_untidy_html(self):
+        html = (
+            '<div class="show_list_item"><div class="month">\n\tJan\t</div><p>unclosed'
+            '<div class="day">3<b>1</b></div><span class="year">2020</span>'
+            '<i class="venue_name">Turf<br>Club</i><h4><b><a>A&nbsp;&amp;&nbsp;B</a></b><a>Not the artist</a></h4></div>'
+            '<div class="show_list_item"><img/><span class="month extra">Feb</span><span class=day>2</span>'
+            '<span class=year>1999</span><span class="venue_name">X</span></p><h4>x<a>Art<span/>ist'
+        )
+        self.assertEqual(list(parse_shows(html, 'stream')), list(parse_shows(html, 'soup')))
+
+    def test_page_with_no_shows(self):
+        self.assertEqual(list(parse_shows('', 'stream')), [])
+        self.assertEqual(list(parse_shows('<html><body></body></html>', 'stream')), [])
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            parse_shows(self.first_ave_response, 'regex')
+
+    def test_backend_from_settings(self):
+        with self.settings(SHOW_PARSER_BACKEND='soup'):
+            self.assertEqual(show_parser.default_backend(), 'soup')
+        with self.settings(SHOW_PARSER_BACKEND=None):
+            self.assertIn(show_parser.default_backend(), ['stream', 'lxml'])
+
+
+class FixtureRequestHandler(BaseHTTPRequestHandler):
+    """ Serves example_first_avenue_response.html as every page of past shows, like first-avenue.com. """
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append((self.path, dict(self.headers)))
+            if server.failures:
+                server.failures -= 1
+                self.send_response(503)
+                self.end_headers()
+                return
+
+        match = re.match(r'^/shows/(page/(\d+)/)?\?orderby=past_shows$', self.path)
+        if not match:
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        etag = f'"page-{match.group(2) or 1}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(server.page)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(server.page)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestCrawler(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), FixtureRequestHandler)
+        with open(os.path.join('get_initial_data', 'test_data', 'example_first_avenue_response.html'), 'rb') as page:
+            cls.server.page = page.read()
+        cls.server.lock = threading.Lock()
+        cls.server_thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.server_thread.start()
+        cls.url = f'http://127.0.0.1:{cls.server.server_address[1]}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.requests = []
+        self.server.failures = 0
+        self.crawler = Crawler(max_workers=4, requests_per_second=0, backoff=0, timeout=5, validators={})
+        patches = [
+            patch('get_initial_data.get_show_data.crawler', self.crawler),
+            patch('get_initial_data.get_show_data.first_ave_url', self.url + '/shows/?orderby=past_shows'),
+            patch('get_initial_data.get_show_data.first_ave_page_url', self.url + '/shows/page/{}/?orderby=past_shows'),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_request_webpage_text_uses_url(self):
+        text = get_show_data.request_webpage_text(self.url + '/shows/page/2/?orderby=past_shows')
+        self.assertIn('show_list_item', text)
+        self.assertEqual(self.server.requests[0][0], '/shows/page/2/?orderby=past_shows')
+
+    def test_request_webpage_text_not_found(self):
+        self.assertEqual(get_show_data.request_webpage_text(self.url + '/nothing-here'), 404)
+
+    def test_get_past_show_data_reads_several_pages(self):
+        shows = get_show_data.get_past_show_data(max_pages=3)
+        self.assertEqual(len(shows), 30)  # 10 shows on each page
+        paths = sorted(path for path, headers in self.server.requests)
+        self.assertEqual(paths, [
+            '/shows/?orderby=past_shows', '/shows/page/2/?orderby=past_shows', '/shows/page/3/?orderby=past_shows'
+        ])
+
+    def test_last_page_number_from_pagination_links(self):
+        self.assertEqual(get_show_data.last_page_number(self.server.page.decode()), 1174)
+        self.assertEqual(get_show_data.last_page_number('<html></html>'), 1)
+
+    def test_unchanged_pages_not_downloaded_again(self):
+        validators = {}
+        get_show_data.get_past_show_data(max_pages=3, validators=validators)
+        self.assertEqual(len(validators), 3)
+        get_show_data.save_validators(validators)
+        self.server.requests = []
+        shows = get_show_data.get_past_show_data(max_pages=3)
+        # page 1 was not modified, so there can't be new shows on later pages
+        self.assertEqual(shows, [])
+        self.assertEqual(len(self.server.requests), 1)
+        path, headers = self.server.requests[0]
+        self.assertEqual(headers['If-None-Match'], '"page-1"')
+
+    def test_pages_downloaded_again_until_validators_saved(self):
+        # e.g. the shows failed to import
+        get_show_data.get_past_show_data(max_pages=3, validators={})
+        self.server.requests = []
+        shows = get_show_data.get_past_show_data(max_pages=3)
+        self.assertEqual(len(shows), 30)
+        self.assertNotIn('If-None-Match', self.server.requests[0][1])
+
+    def test_populate_db_saves_validators_after_import(self):
+        superuser = User.objects.create_user('test', 'test@test.com', 'password', is_superuser=True)
+        self.client.force_login(superuser)
+        with patch('get_initial_data.admin_views.settings.SCRAPER_MAX_PAGES', 1), \
+                patch('get_initial_data.admin_views.import_shows', side_effect=ValueError('bad show')), \
+                self.assertLogs('django.request', 'ERROR'), self.assertRaises(ValueError):
+            self.client.get(reverse('populate_db'))
+        self.assertEqual(self.crawler.validators, {})
+
+        with patch('get_initial_data.admin_views.settings.SCRAPER_MAX_PAGES', 1):
+            self.client.get(reverse('populate_db'))
+        self.assertEqual(list(self.crawler.validators), [self.url + '/shows/?orderby=past_shows'])
+
+    def test_retries_server_errors(self):
+        self.server.failures = 2
+        text = get_show_data.request_webpage_text(self.url + '/shows/?orderby=past_shows')
+        self.assertIn('show_list_item', text)
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_gives_up_after_retries(self):
+        self.server.failures = 10
+        response = self.crawler.fetch(self.url + '/shows/?orderby=past_shows')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(len(self.server.requests), self.crawler.retries + 1)
+
+    def test_requests_to_one_host_are_rate_limited(self):
+        crawler = Crawler(max_workers=4, requests_per_second=20, validators={})
+        urls = [self.url + f'/shows/page/{n}/?orderby=past_shows' for n in range(2, 6)]
+        start = time.monotonic()
+        responses = crawler.fetch_all(urls)
+        elapsed = time.monotonic() - start
+        self.assertEqual([response.status_code for response in responses], [200] * 4)
+        # 4 requests at 20 per second - the last can't start until 3 intervals of 0.05s have passed
+        self.assertGreaterEqual(elapsed, 0.15)
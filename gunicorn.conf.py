@@ -0,0 +1,60 @@
+""" gunicorn settings for serving the app in production, read by running gunicorn in this directory.
+
+    gunicorn                          # WSGI, LMN_WORKERS processes of LMN_THREADS threads
+    LMN_ASGI=1 gunicorn               # ASGI, with uvicorn workers
+
+Environment variables:
+
+- PORT - port to listen on, 8000 by default.
+- LMN_WORKERS - worker processes, 2 per CPU plus 1 by default.
+- LMN_THREADS - threads per worker process, 4 by default.
+- LMN_ASGI - 1 to serve lmnop_project.asgi with uvicorn workers. Django 3.1 runs sync views on
+  one thread per worker under ASGI, so WSGI with threads is faster until views are async.
+- LMN_TIMEOUT - seconds a request can take before its worker is restarted, 30 by default.
+
+The app is loaded once, before the workers are forked, so they share its memory copy-on-write
+and a broken deploy fails at startup rather than in every worker. Each worker opens its own
+database connections after it's forked.
+
+Send the master process HUP to replace the workers gracefully, after they finish their requests,
+e.g. to apply changed settings. As the app is preloaded, deploying new code needs a new master:
+send USR2 to start one alongside the old, then QUIT to the old master once the new one is ready.
+"""
+
+import multiprocessing
+import os
+
+
+bind = f'0.0.0.0:{os.getenv("PORT", "8000")}'
+
+if os.getenv('LMN_ASGI') == '1':
+    wsgi_app = 'lmnop_project.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'lmnop_project.wsgi:application'
+    worker_class = 'gthread'
+    threads = int(os.getenv('LMN_THREADS', '4'))
+
+workers = int(os.getenv('LMN_WORKERS', str(multiprocessing.cpu_count() * 2 + 1)))
+
+preload_app = True
+# a worker stuck for this long is killed and replaced
+timeout = int(os.getenv('LMN_TIMEOUT', '30'))
+# on HUP or shutdown, workers finish their requests for up to this long
+graceful_timeout = 30
+keepalive = 5
+# replace workers now and then, in case memory grows, staggered so they don't all restart at once
+max_requests = 5000
+max_requests_jitter = 500
+
+accesslog = '-'
+errorlog = '-'
+
+# the preloaded app mustn't open database connections, which the forked workers would share
+os.environ['LMN_WARM_UP'] = '0'
+
+
+def post_fork(server, worker):
+    """ Open this worker's own database connections, so its first requests don't wait for them. """
+    from lmnop_project.postgres.base import warm_up
+    warm_up()
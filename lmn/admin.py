@@ -2,10 +2,11 @@ from django.contrib import admin
 
 # Register your models here.
 
-from .models import Venue, Artist, Note, Show, Profile
+from .models import Venue, Artist, Note, Show, Profile, Task
 
 admin.site.register(Venue)
 admin.site.register(Artist)
 admin.site.register(Note)
 admin.site.register(Show)
-admin.site.register(Profile)
\ No newline at end of file
+admin.site.register(Profile)
+admin.site.register(Task)
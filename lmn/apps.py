@@ -1,6 +1,35 @@
 from django.apps import AppConfig
+from django.contrib.auth.signals import user_logged_in
+from django.db.models.signals import post_save, post_delete
 
 
 class LmnConfig(AppConfig):
     name = 'lmn'
-  
\ No newline at end of file
+
+    def ready(self):
+        from .search import SEARCH_FIELDS, update_search_index, remove_from_search_index
+        from .cache import CACHED_MODELS, bump_model_version
+        from .conditional import remember_viewer
+        from .counters import note_created, note_deleted
+        from .models import Note
+        from .timezones import remember_time_zone
+
+        # keep the search index in step with the searched models
+        for model in SEARCH_FIELDS:
+            post_save.connect(update_search_index, sender=model, dispatch_uid=f'search_index_{model.__name__}')
+            post_delete.connect(remove_from_search_index, sender=model, dispatch_uid=f'search_remove_{model.__name__}')
+
+        # cached pages built from these models go stale when they change
+        for model in CACHED_MODELS:
+            post_save.connect(bump_model_version, sender=model, dispatch_uid=f'cache_version_save_{model.__name__}')
+            post_delete.connect(bump_model_version, sender=model, dispatch_uid=f'cache_version_delete_{model.__name__}')
+
+        # note counts of shows, artists, venues and profiles
+        post_save.connect(note_created, sender=Note, dispatch_uid='note_count_created')
+        post_delete.connect(note_deleted, sender=Note, dispatch_uid='note_count_deleted')
+
+        # dates are shown in the user's time zone
+        user_logged_in.connect(remember_time_zone, dispatch_uid='remember_time_zone')
+
+        # pages which aren't public show the user's name and avatar, and their ETags include them
+        user_logged_in.connect(remember_viewer, dispatch_uid='remember_viewer')
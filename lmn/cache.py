@@ -0,0 +1,132 @@
+""" Caching of pages built from artists, venues, shows and notes.
+
+Every cache key includes the current version of each model the cached data was built
+from. Saving or deleting an object of a model bumps that model's version, so keys made
+before the change are never read again and expire on their own. Nothing has to find
+and delete the entries a change makes stale.
+
+The versions, and when each model last changed, are kept in the shared cache, settings.CACHES['shared']
+if there is one, so every server sees a change as soon as it's made, while pages and objects can be
+cached on each server. In production that's the database, see lmnop_project/settings.py.
+
+The versions are bumped by the post_save and post_delete receivers connected in
+LmnConfig.ready(). Code that changes rows without sending signals - bulk_create,
+QuerySet.update() - must call bump_versions() itself.
+
+Views use cached() for objects, and pass cache_version() to templates, which use it
+in the {% cache %} tag around the list rows:
+
+    {% cache 3600 artist_rows cache_version artists.cursor %} ... {% endcache %}
+"""
+
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db import transaction
+
+from .models import Artist, Venue, Show, Note
+
+
+# Models whose changes invalidate cached pages
+CACHED_MODELS = (Artist, Venue, Show, Note)
+
+# CACHES setting which caches nothing, for timing pages as they are when nothing is cached yet
+DUMMY_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+def shared_cache():
+    """ The cache every server uses, for versions, or the default cache if there's no 'shared' one. """
+    return caches['shared' if 'shared' in settings.CACHES else 'default']
+
+
+def version_key(model):
+    return f'lmn_version:{model._meta.label_lower}'
+
+
+def changed_key(model):
+    return f'lmn_changed:{model._meta.label_lower}'
+
+
+def new_version():
+    """ A version that can't have been used before, for when there's none in the cache, e.g. after a restart. """
+    return time.time_ns()
+
+
+def cache_version(*models):
+    """ The combined current version of these models, to include in a cache key.
+
+    Args:
+        models ([Model]): the models the cached data was built from
+
+    Returns:
+        [str]: e.g. '1634567890123456789.1634567890123456790'
+    """
+    shared = shared_cache()
+    keys = [version_key(model) for model in models]
+    versions = shared.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            shared.add(key, new_version(), timeout=None)
+            versions[key] = shared.get(key)
+    return '.'.join(str(versions[key]) for key in keys)
+
+
+def last_changed(*models):
+    """ When any of these models last changed, for Last-Modified headers.
+
+    If the cache has lost a model's change time, e.g. after a restart, the first call
+    afterwards counts as a change, so clients fetch the data again rather than keep stale copies.
+
+    Returns:
+        [datetime]: UTC time of the latest change
+    """
+    shared = shared_cache()
+    keys = [changed_key(model) for model in models]
+    times = shared.get_many(keys)
+    for key in keys:
+        if key not in times:
+            shared.add(key, time.time(), timeout=None)
+            times[key] = shared.get(key) or time.time()
+    return datetime.fromtimestamp(max(times.values()), tz=timezone.utc)
+
+
+def bump_versions(*models):
+    """ Make every cache key built from these models stale. """
+    shared = shared_cache()
+    for model in models:
+        try:
+            shared.incr(version_key(model))
+        except ValueError:
+            # no version in the cache yet
+            shared.set(version_key(model), new_version(), timeout=None)
+        shared.set(changed_key(model), time.time(), timeout=None)
+
+
+def cached(key, models, function, timeout=DEFAULT_TIMEOUT):
+    """ Get a value from the cache, or call function and cache what it returns.
+
+    Args:
+        key ([str]): identifies the value, e.g. 'artist:4'
+        models ([list]): the models the value is built from
+        function ([callable]): makes the value. An exception, like Http404, is raised and nothing cached.
+        timeout ([int]): seconds to keep the value, defaults to the cache's TIMEOUT
+    """
+    versioned_key = f'lmn:{key}:{cache_version(*models)}'
+    value = cache.get(versioned_key)
+    if value is None:
+        value = function()
+        cache.set(versioned_key, value, timeout)
+    return value
+
+
+def bump_model_version(sender, using, **kwargs):
+    """ post_save and post_delete receiver.
+
+    Bumps the version now, so the rest of this request sees the change, and again
+    once the transaction commits, in case another request cached the old rows in between.
+    """
+    bump_versions(sender)
+    transaction.on_commit(lambda: bump_versions(sender), using=using)
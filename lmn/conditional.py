@@ -0,0 +1,115 @@
+""" Conditional GET for pages, so a browser or CDN with an up to date copy gets 304 Not Modified.
+
+Decorate a view with @conditional_page(changed). changed(request, **view kwargs) is called first,
+and returns when anything the page shows last changed, from the updated_at columns, with one query.
+If the client's ETag or Last-Modified still match, the view isn't run and nothing is rendered.
+
+Pages which aren't public, see lmn/public.py, show the logged in user's name and avatar in the
+navigation bar, so their ETag and Last-Modified include those too, and they're marked
+Cache-Control: private, no-cache so browsers always check their copy is still current. The user's
+name and when their profile changed are kept in their session, so a 304 still costs one query besides
+reading the session. remember_viewer keeps them when the user logs in, and must be called again
+when they change, as my_user_profile does.
+
+    def note_changed(request, note_pk):
+        return latest(Note.objects.filter(pk=note_pk).values_list('updated_at', 'show__updated_at').first())
+
+    @conditional_page(note_changed)
+    def note_detail(request, note_pk):
+        ...
+"""
+
+import hashlib
+from calendar import timegm
+from functools import wraps
+
+from django.contrib.auth import SESSION_KEY
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date, quote_etag
+
+from .models import Profile
+from .timezones import SESSION_KEY as TIME_ZONE_SESSION_KEY
+
+
+# The user's name and when their profile changed, as [username, ISO 8601 time]
+VIEWER_SESSION_KEY = 'lmn_viewer'
+
+
+def latest(times):
+    """ The latest of times, ignoring None, e.g. the updated_at of a favorite venue that isn't set.
+
+    Returns:
+        [datetime]: the latest time, or None if times is None, e.g. there was no row, or has no times
+    """
+    times = [time for time in times or () if time is not None]
+    return max(times) if times else None
+
+
+def remember_viewer(sender, request, user, **kwargs):
+    """ user_logged_in receiver, keeps the user's name and when their profile changed in their session. """
+    request.session[VIEWER_SESSION_KEY] = [user.username, user.profile.updated_at.isoformat()]
+
+
+def viewer(request):
+    """ What a page shows about the user viewing it, including their time zone, as a string for its ETag,
+    and when that last changed.
+
+    Public pages are the same for everyone and don't load the session. For other pages it's all in
+    the session, except for users who logged in before it was kept there, whose profile is read once.
+
+    Returns:
+        [tuple]: (str, datetime or None)
+    """
+    if getattr(request, 'public_page', False):
+        return 'public', None
+    # times are shown in the zone in the user's session
+    time_zone = request.session.get(TIME_ZONE_SESSION_KEY)
+    user_id = request.session.get(SESSION_KEY)
+    if user_id is None:
+        return f'anonymous:{time_zone}', None
+    remembered = request.session.get(VIEWER_SESSION_KEY)
+    if remembered is None:
+        profile = Profile.objects.filter(user_id=user_id).values_list('user__username', 'updated_at').first()
+        if profile is None:
+            return f'{user_id}:None:{time_zone}', None
+        remembered = request.session[VIEWER_SESSION_KEY] = [profile[0], profile[1].isoformat()]
+    username, updated_at = remembered
+    return f'{user_id}:{username}:{time_zone}', parse_datetime(updated_at)
+
+
+def conditional_page(changed):
+    """ Answer GET requests for the view with 304 Not Modified when the page hasn't changed.
+
+    Args:
+        changed ([function]): called with the view's arguments, returns when the page last changed,
+            or None to always run the view, e.g. when the object doesn't exist and the view 404s
+    """
+    def decorator(view):
+        @wraps(view)
+        def conditional_view(request, *args, **kwargs):
+            # a pending message is shown, and removed, by the next page rendered. An emptied cookie has none.
+            if request.method not in ('GET', 'HEAD') or request.COOKIES.get(CookieStorage.cookie_name):
+                return view(request, *args, **kwargs)
+            last_changed = changed(request, *args, **kwargs)
+            if last_changed is None:
+                return view(request, *args, **kwargs)
+
+            # pages differ for each logged in user, and change when their name or avatar does
+            viewer_key, viewer_changed = viewer(request)
+            last_changed = latest([last_changed, viewer_changed])
+            etag = quote_etag(hashlib.md5(f'{last_changed.isoformat()}:{viewer_key}'.encode()).hexdigest())
+            last_modified = timegm(last_changed.utctimetuple())
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code == 200:
+                    response.setdefault('ETag', etag)
+                    response.setdefault('Last-Modified', http_date(last_modified))
+            if not getattr(request, 'public_page', False):
+                # a copy kept by the browser must be checked first, public_page sets public pages' Cache-Control
+                patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return conditional_view
+    return decorator
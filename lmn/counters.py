@@ -0,0 +1,61 @@
+""" The note_count of shows, artists, venues and profiles, kept up to date as notes are added and deleted.
+
+Counters are changed with UPDATE ... SET note_count = note_count + 1, so concurrent requests
+can't lose each other's changes. Notes created without signals, by bulk_create or loaddata,
+aren't counted - run python manage.py reconcile_note_counts afterwards.
+"""
+
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import Artist, Note, Profile, Show, Venue
+
+
+# Counted model: lookup from a Note to the row it's counted in
+COUNTED = {
+    Show: 'show',
+    Artist: 'show__artist',
+    Venue: 'show__venue',
+    Profile: 'user',    # a profile's primary key is its user's
+}
+
+
+def count_note(show_id, user_id, change):
+    """ Add change, 1 or -1, to the counts of a note for this show by this user. """
+    # never below zero, even if a note wasn't counted
+    note_count = Greatest(F('note_count') + change, Value(0))
+    # the pages showing the counts have changed too
+    changes = {'note_count': note_count, 'updated_at': timezone.now()}
+    Show.objects.filter(pk=show_id).update(**changes)
+    Artist.objects.filter(show=show_id).update(**changes)
+    Venue.objects.filter(show=show_id).update(**changes)
+    Profile.objects.filter(pk=user_id).update(**changes)
+
+
+def note_created(sender, instance, created, raw, **kwargs):
+    """ post_save receiver for Note. """
+    if created and not raw:
+        count_note(instance.show_id, instance.user_id, 1)
+
+
+def note_deleted(sender, instance, **kwargs):
+    """ post_delete receiver for Note, also sent for notes deleted with their show or user. """
+    count_note(instance.show_id, instance.user_id, -1)
+
+
+def reconcile_note_counts():
+    """ Recompute every note_count from the notes, with one UPDATE per counted table.
+
+    Returns:
+        [dict]: model name: number of rows whose count was wrong
+    """
+    corrected = {}
+    for model, lookup in COUNTED.items():
+        counts = Note.objects.filter(**{lookup: OuterRef('pk')}).order_by() \
+            .values(lookup).annotate(count=Count('pk')).values('count')
+        actual = Coalesce(Subquery(counts), Value(0))
+        wrong = model.objects.annotate(actual=actual).exclude(note_count=F('actual')).values('pk')
+        corrected[model.__name__] = model.objects.filter(pk__in=wrong) \
+            .update(note_count=actual, updated_at=timezone.now())
+    return corrected
@@ -0,0 +1,114 @@
+""" Load each set of test fixtures once, then copy the rows it made back in for every other test that uses it.
+
+loaddata parses the JSON files and saves the objects one by one, sending post_save signals which
+make profiles, search index entries and so on. Each TestCase class loads its fixtures, and each
+LiveServerTestCase test does, and most of them use the same few sets of fixtures. With
+settings.FIXTURE_SNAPSHOTS, on while testing, lmn's loaddata command records the rows the first
+load of a set of fixtures adds to every table, including ones made by signals, and later loads
+of the same set insert those rows with one INSERT per table.
+
+Only the database is snapshotted. A fixture whose signals do anything else, e.g. write files,
+would only do it the first time.
+"""
+
+from collections import Counter
+
+from django.apps import apps
+from django.core.management.color import no_style
+from django.db import connections, transaction
+
+
+# (database alias, fixture labels): [Table]
+_snapshots = {}
+
+
+class Table:
+    """ Rows added to a table. """
+
+    def __init__(self, name, columns, rows):
+        self.name = name
+        self.columns = columns
+        self.rows = rows
+
+    def insert(self, connection):
+        quote = connection.ops.quote_name
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            quote(self.name), ', '.join(self.columns if self.columns[0] == 'rowid' else map(quote, self.columns)),
+            ', '.join(['%s'] * len(self.columns)))
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, self.rows)
+
+
+def snapshot_tables(connection):
+    """ Table name: the columns to copy, for every table of the database.
+
+    SQLite full text search tables are copied by their rowid and columns, which rebuilds their index,
+    and the shadow tables holding the index are left out.
+    """
+    with connection.cursor() as cursor:
+        names = connection.introspection.table_names(cursor)
+        virtual = set()
+        if connection.vendor == 'sqlite':
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND sql LIKE 'CREATE VIRTUAL TABLE%'")
+            virtual = {row[0] for row in cursor.fetchall()}
+        tables = {}
+        for name in names:
+            if any(name.startswith(f'{table}_') for table in virtual):
+                continue
+            columns = [column.name for column in connection.introspection.get_table_description(cursor, name)]
+            tables[name] = ['rowid'] + columns if name in virtual else columns
+    return tables
+
+
+def read_rows(connection, tables):
+    quote = connection.ops.quote_name
+    rows = {}
+    with connection.cursor() as cursor:
+        for name, columns in tables.items():
+            cursor.execute('SELECT {} FROM {}'.format(
+                ', '.join(column if column == 'rowid' else quote(column) for column in columns), quote(name)))
+            rows[name] = cursor.fetchall()
+    return rows
+
+
+def load_with_snapshot(database, labels, load):
+    """ Run load(), which loads the fixtures called labels into database, or insert the rows it added before.
+
+    Returns:
+        int: number of rows inserted from a snapshot, or None if load() was run
+    """
+    connection = connections[database]
+    key = (database, tuple(labels))
+    snapshot = _snapshots.get(key)
+
+    if snapshot is None:
+        tables = snapshot_tables(connection)
+        before = read_rows(connection, tables)
+        load()
+        after = read_rows(connection, tables)
+        snapshot = []
+        for name, columns in tables.items():
+            existing = Counter(before[name])
+            added = []
+            for row in after[name]:
+                if existing[row]:
+                    existing[row] -= 1
+                else:
+                    added.append(row)
+            if added:
+                snapshot.append(Table(name, columns, added))
+        _snapshots[key] = snapshot
+        return None
+
+    with transaction.atomic(using=database):
+        for table in snapshot:
+            table.insert(connection)
+        # the rows have their primary keys, so Postgres sequences must be moved past them, as loaddata does
+        tables = {table.name for table in snapshot}
+        models = [model for model in apps.get_models() if model._meta.db_table in tables]
+        sequence_sql = connection.ops.sequence_reset_sql(no_style(), models)
+        if sequence_sql:
+            with connection.cursor() as cursor:
+                for sql in sequence_sql:
+                    cursor.execute(sql)
+    return sum(len(table.rows) for table in snapshot)
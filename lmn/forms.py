@@ -1,6 +1,8 @@
 from django import forms
 
 from .models import Note, Profile, Artist, Venue
+from .search import search
+from .timezones import time_zone_choices
 
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
@@ -8,14 +10,39 @@ from django.forms import ValidationError
 from django.core.files.uploadedfile import UploadedFile
 
 
-class VenueSearchForm(forms.Form):
+class SearchForm(forms.Form):
+    """ Base for search boxes. Subclasses set the model searched and the name of their one field. """
+    model = None
+    search_field = 'search_name'
+
+    def queryset(self):
+        """ The objects to search. """
+        return self.model.objects.all()
+
+    def results(self):
+        """ Objects matching the search, best match first. Only call once is_valid() is True. """
+        return search(self.queryset(), self.cleaned_data[self.search_field])
+
+
+class VenueSearchForm(SearchForm):
+    model = Venue
     search_name = forms.CharField(label='Venue Name', max_length=200)
 
 
-class ArtistSearchForm(forms.Form):
+class ArtistSearchForm(SearchForm):
+    model = Artist
     search_name = forms.CharField(label='Artist Name', max_length=200)
 
 
+class NoteSearchForm(SearchForm):
+    model = Note
+    search_field = 'search_text'
+    search_text = forms.CharField(label='Search Notes', max_length=200)
+
+    def queryset(self):
+        return Note.objects.feed()
+
+
 class NewNoteForm(forms.ModelForm):
     class Meta:
         model = Note
@@ -94,10 +121,11 @@ class UpdateProfileForm(forms.ModelForm):
     """Profile model fields to update. """
     favorite_artist = ModelChoiceField(queryset=Artist.objects.all(), initial=0)
     favorite_venue= ModelChoiceField(queryset=Venue.objects.all(), initial=0)
+    time_zone = forms.ChoiceField(choices=time_zone_choices, required=False)
     
     class Meta:
         model = Profile
-        fields = ('avatar','favorite_artist','favorite_venue')
+        fields = ('avatar','favorite_artist','favorite_venue', 'time_zone')
 
     def clean_avatar(self):
         """Validate user uploads only an image content type
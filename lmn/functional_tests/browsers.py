@@ -0,0 +1,79 @@
+""" One browser for all the functional tests in a process, instead of starting one for every test.
+
+    def setUp(self):
+        self.browser = browsers.get()
+
+    def tearDown(self):
+        browsers.release(self.browser)
+
+Starting Chrome takes longer than most tests. The browser is started by the first test that needs it,
+is headless unless LMN_TEST_HEADLESS=0, and quits when the process exits. With --parallel each test
+process has its own. Between tests its cookies and storage are cleared and it goes back to a blank page.
+
+    LMN_TEST_BROWSER=firefox python manage.py test lmn.functional_tests --parallel 4
+    LMN_TEST_HEADLESS=0 python manage.py test lmn.functional_tests     # watch the tests
+"""
+
+import atexit
+import os
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+
+
+_browser = None
+
+
+def start():
+    name = os.getenv('LMN_TEST_BROWSER', 'chrome').lower()
+    headless = os.getenv('LMN_TEST_HEADLESS', '1') != '0'
+    if name == 'firefox':
+        options = webdriver.FirefoxOptions()
+        options.headless = headless
+        return webdriver.Firefox(options=options)
+    if name == 'chrome':
+        options = webdriver.ChromeOptions()
+        options.headless = headless
+        options.add_argument('--window-size=1280,1024')
+        return webdriver.Chrome(options=options)
+    raise ValueError(f'LMN_TEST_BROWSER should be chrome or firefox, not {name}')
+
+
+def get():
+    """ This process's browser, started if there isn't one yet or the last one crashed. """
+    global _browser
+    if _browser is not None:
+        try:
+            _browser.current_url
+        except WebDriverException:
+            _browser = None
+    if _browser is None:
+        _browser = start()
+    return _browser
+
+
+def release(browser):
+    """ Reset the browser after a test, so the next one starts logged out on a blank page. """
+    try:
+        browser.implicitly_wait(0)
+        # cookies can only be deleted for, and storage is only reachable from, the live server's page
+        browser.delete_all_cookies()
+        browser.execute_script('window.localStorage.clear(); window.sessionStorage.clear();')
+    except WebDriverException:
+        pass   # not on a page with storage, e.g. the test didn't open one
+    try:
+        browser.get('about:blank')
+    except WebDriverException:
+        stop()
+
+
+@atexit.register
+def stop():
+    """ Quit this process's browser, if it has one. """
+    global _browser
+    if _browser is not None:
+        try:
+            _browser.quit()
+        except WebDriverException:
+            pass
+        _browser = None
@@ -1,23 +1,24 @@
 
 from django.test import LiveServerTestCase
 
-from selenium import webdriver
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
 
 import time
 
+from lmn.functional_tests import browsers
+
 
 class HomePageTest(LiveServerTestCase):
     """ Hello Selenium """
 
     def setUp(self):
-        self.browser = webdriver.Chrome()
+        self.browser = browsers.get()
         
 
     def tearDown(self):
-        self.browser.quit()
+        browsers.release(self.browser)
         
 
     def test_home_page(self):
@@ -37,13 +38,13 @@ class BrowseArtistsTests(LiveServerTestCase):
     ]
 
     def setUp(self):
-        self.browser = webdriver.Chrome()
+        self.browser = browsers.get()
         self.browser.implicitly_wait(3)
         self.wait = WebDriverWait(self.browser, 2)
 
 
     def tearDown(self):
-        self.browser.quit()
+        browsers.release(self.browser)
     
 
     def test_browsing_artists(self):
@@ -243,12 +244,12 @@ class BrowseVenuesTests(LiveServerTestCase):
     ]
 
     def setUp(self):
-        self.browser = webdriver.Chrome()
+        self.browser = browsers.get()
         self.browser.implicitly_wait(3)
 
 
     def tearDown(self):
-        self.browser.quit()
+        browsers.release(self.browser)
     
 
     def test_browsing_venues(self):
@@ -461,12 +462,12 @@ class NotesTests(LiveServerTestCase):
 
 
     def setUp(self):
-        self.browser = webdriver.Chrome()
+        self.browser = browsers.get()
         self.browser.implicitly_wait(3)
 
 
     def tearDown(self):
-        self.browser.quit()
+        browsers.release(self.browser)
 
 
     def test_add_note_for_show_when_logged_in(self):
@@ -597,12 +598,12 @@ class RegistrationTests(LiveServerTestCase):
     fixtures = ['fn_testing_users']
 
     def setUp(self):
-        self.browser = webdriver.Chrome()
+        self.browser = browsers.get()
         self.browser.implicitly_wait(3)
 
 
     def tearDown(self):
-        self.browser.quit()
+        browsers.release(self.browser)
     
 
     def test_login_valid_password(self):
@@ -666,12 +667,12 @@ class ProfilePageTests(LiveServerTestCase):
     ]
 
     def setUp(self):
-        self.browser = webdriver.Chrome()
+        self.browser = browsers.get()
         self.browser.implicitly_wait(3)
 
 
     def tearDown(self):
-        self.browser.quit()
+        browsers.release(self.browser)
     
 
     def test_view_user_profile_own_notes_shown(self):
@@ -706,11 +707,11 @@ class LogoutPageTest(LiveServerTestCase):
     """ Hello Selenium """
 
     def setUp(self):
-        self.browser = webdriver.Chrome()
+        self.browser = browsers.get()
         
 
     def tearDown(self):
-        self.browser.quit()
+        browsers.release(self.browser)
         
 
     def test_home_page(self):
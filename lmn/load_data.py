@@ -0,0 +1,156 @@
+""" Synthetic users, artists, venues, shows and notes, in the numbers and shapes of production, for benchmarks.
+
+Popularity is skewed like real listening: the nth most popular artist, venue or user is 1/n**skew as popular
+as the first, so a few artists play most of the shows and a few users write most of the notes. Notes are shared
+evenly between shows, so popular artists and venues get most of them too, and each is posted within a week of its show.
+
+Rows are made with bulk_create in batches, with primary keys chosen here so rows can refer to each other without
+reading them back. The note counts, search index and page caches, which bulk_create skips, are brought up to date
+at the end.
+"""
+
+import datetime
+import itertools
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .cache import bump_versions
+from .counters import reconcile_note_counts
+from .models import Artist, Venue, Show, Note, Profile
+from .search import backend_for, SEARCH_FIELDS
+
+
+# the first generated row of each kind is called e.g. Load artist 1
+NAME_PREFIX = 'Load'
+
+CITIES = [('Minneapolis', 'MN'), ('St. Paul', 'MN'), ('Duluth', 'MN'), ('Chicago', 'IL'), ('Milwaukee', 'WI'),
+          ('Madison', 'WI'), ('Des Moines', 'IA'), ('Fargo', 'ND'), ('Sioux Falls', 'SD'), ('Denver', 'CO')]
+
+WORDS = ('great show loud crowd encore opener sound lights setlist tour guitar drums vocals bass sold out '
+         'acoustic new album classic favorite song night venue sweaty dancing amazing better than last time').split()
+
+
+def zipf_cum_weights(count, skew):
+    """ Cumulative weights for random.choices, the nth of count 1/n**skew as likely as the first. """
+    return list(itertools.accumulate(1 / rank ** skew for rank in range(1, count + 1)))
+
+
+def next_pk(model):
+    return (model.objects.aggregate(Max('pk'))['pk__max'] or 0) + 1
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def generate_load_data(users, artists, venues, shows, notes, skew=1.0, years=5, batch_size=5000, seed=None,
+                       progress=None):
+    """ Add synthetic rows to the database.
+
+    Args:
+        users, artists, venues, shows, notes (int): how many of each to add. Users get profiles.
+        skew (float): how unevenly shows and notes are shared out, 0 for evenly.
+        years (int): shows are spread over this many years, up to now.
+        batch_size (int): rows per INSERT.
+        seed: for random.Random, to make the same rows again.
+        progress: called with a message as each kind of row is added.
+
+    Returns:
+        dict: model name: number of rows added
+    """
+    rand = random.Random(seed)
+    progress = progress or (lambda message: None)
+    now = timezone.now()
+    added = {}
+
+    def insert(model, objects):
+        count = 0
+        for batch in batched(objects, batch_size):
+            model.objects.bulk_create(batch, batch_size=batch_size)
+            count += len(batch)
+        added[model.__name__] = count
+        progress(f'{count} {model._meta.verbose_name_plural}')
+
+    with transaction.atomic():
+        first_user, first_artist, first_venue, first_show, first_note = \
+            (next_pk(model) for model in (User, Artist, Venue, Show, Note))
+
+        # one hash for every user, hashing is slow by design. None makes an unusable password.
+        password = make_password(None)
+        insert(User, (User(pk=first_user + n, username=f'{NAME_PREFIX.lower()}{first_user + n}',
+                           email=f'{NAME_PREFIX.lower()}{first_user + n}@example.com', password=password,
+                           date_joined=now - datetime.timedelta(days=rand.uniform(0, years * 365)))
+                      for n in range(users)))
+        insert(Profile, (Profile(user_id=first_user + n) for n in range(users)))
+
+        insert(Artist, (Artist(pk=first_artist + n, name=f'{NAME_PREFIX} artist {first_artist + n}')
+                        for n in range(artists)))
+        insert(Venue, (Venue(pk=first_venue + n, name=f'{NAME_PREFIX} venue {first_venue + n}', city=city, state=state)
+                       for n, (city, state) in enumerate(rand.choice(CITIES) for _ in range(venues))))
+
+        # shows are spread evenly over the years, so no two are at the same time
+        artist_weights = zipf_cum_weights(artists, skew)
+        venue_weights = zipf_cum_weights(venues, skew)
+        show_artists = rand.choices(range(artists), cum_weights=artist_weights, k=shows)
+        show_venues = rand.choices(range(venues), cum_weights=venue_weights, k=shows)
+        interval = datetime.timedelta(days=years * 365) / max(shows, 1)
+        first_date = now - interval * shows
+        insert(Show, (Show(pk=first_show + n, artist_id=first_artist + show_artists[n],
+                           venue_id=first_venue + show_venues[n], show_date=first_date + interval * n)
+                      for n in range(shows)))
+
+        # popular artists and venues have more shows, so more notes
+        note_shows = sorted(rand.randrange(shows) for _ in range(notes)) if shows else []
+        del show_artists, show_venues   # free their memory before making millions of notes
+        user_weights = zipf_cum_weights(users, skew)
+
+        def make_notes():
+            pk = first_note
+            for show, group in itertools.groupby(note_shows):
+                # one note per user per show, so a show can't have more notes than there are users
+                authors = set()
+                for _ in range(min(len(list(group)), users)):
+                    author = rand.choices(range(users), cum_weights=user_weights)[0]
+                    while author in authors:
+                        author = rand.randrange(users)
+                    authors.add(author)
+                    show_date = first_date + interval * show
+                    posted = min(show_date + datetime.timedelta(hours=rand.uniform(1, 7 * 24)), now)
+                    words = rand.choices(WORDS, k=rand.randint(5, 120))
+                    yield Note(pk=pk, show_id=first_show + show, user_id=first_user + author,
+                               title=' '.join(words[:3]).capitalize(), text=' '.join(words), posted_date=posted)
+                    pk += 1
+
+        # bulk_create would otherwise set every note's posted_date to now
+        posted_date = Note._meta.get_field('posted_date')
+        posted_date.auto_now_add = False
+        try:
+            insert(Note, make_notes())
+        finally:
+            posted_date.auto_now_add = True
+
+        # the primary keys were chosen here, so move the sequences past them. SQLite doesn't need this.
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [User, Artist, Venue, Show, Note]):
+                cursor.execute(sql)
+
+        progress('counting notes')
+        reconcile_note_counts()
+        progress('indexing for search')
+        backend = backend_for(connection.alias)
+        for model in SEARCH_FIELDS:
+            backend.rebuild(model)
+
+    bump_versions(Artist, Venue, Show, Note)
+    return added
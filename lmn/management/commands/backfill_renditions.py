@@ -0,0 +1,33 @@
+""" Make the renditions of note photos and avatars uploaded before renditions existed.
+
+    python manage.py backfill_renditions
+    python manage.py backfill_renditions --force
+
+Images whose renditions all exist are skipped, unless --force is given, which remakes
+them, e.g. after changing the sizes in lmn/renditions.py.
+"""
+
+from django.core.management.base import BaseCommand
+
+from lmn.models import Note, Profile
+from lmn.renditions import create_renditions
+
+
+class Command(BaseCommand):
+    help = 'Make missing renditions of note photos and avatars'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='remake renditions which already exist')
+
+    def handle(self, *args, **options):
+        images = [
+            ('photo', Note.objects.exclude(photo='').exclude(photo=None).values_list('photo', flat=True)),
+            # many profiles share the default avatar
+            ('avatar', Profile.objects.exclude(avatar='').exclude(avatar=None).values_list('avatar', flat=True).distinct()),
+        ]
+        for field_name, names in images:
+            made = 0
+            for name in names.iterator():
+                if create_renditions(name, field_name, force=options['force']):
+                    made += 1
+            self.stdout.write(f'{field_name}: made renditions of {made} images')
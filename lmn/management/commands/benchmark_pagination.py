@@ -0,0 +1,91 @@
+""" Compare OFFSET pagination with cursor pagination on a large Note table.
+
+    python manage.py benchmark_pagination
+    python manage.py benchmark_pagination --pages 1 100 10000 --repeat 10
+
+Enough notes for the deepest page are created inside a transaction which is
+rolled back at the end, so the database is left as it was.
+"""
+
+import datetime
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.utils import timezone
+
+from lmn.models import Artist, Venue, Show, Note
+from lmn.pagination import CursorPaginator
+
+
+NOTES_PER_SHOW = 100
+
+
+class Command(BaseCommand):
+    help = 'Time fetching deep pages of the latest notes with OFFSET and with cursor pagination'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, nargs='+', default=[1, 10000], help='page numbers to time')
+        parser.add_argument('--per-page', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=5, help='times to fetch each page, the median is reported')
+
+    def handle(self, *args, **options):
+        per_page = options['per_page']
+        note_count = max(options['pages']) * per_page
+
+        with transaction.atomic():
+            self.stdout.write(f'Creating {note_count} notes...')
+            self.create_notes(note_count)
+
+            self.stdout.write(f'{"page":>8} {"offset ms":>12} {"cursor ms":>12}')
+            for page_number in options['pages']:
+                offset_ms = self.time(lambda: list(Paginator(self.notes(), per_page).page(page_number)), options['repeat'])
+                cursor = self.cursor_for_page(page_number, per_page)
+                cursor_ms = self.time(lambda: list(self.paginator(per_page).page(cursor)), options['repeat'])
+                self.stdout.write(f'{page_number:>8} {offset_ms:>12.2f} {cursor_ms:>12.2f}')
+
+            transaction.set_rollback(True)
+
+    def notes(self):
+        return Note.objects.feed()
+
+    def paginator(self, per_page):
+        return CursorPaginator(self.notes(), per_page, ordering=('-posted_date', '-pk'))
+
+    def cursor_for_page(self, page_number, per_page):
+        """ The cursor a reader would have followed to reach this page. Not timed. """
+        if page_number == 1:
+            return None
+        last_on_previous_page = self.notes().order_by('-posted_date', '-pk')[(page_number - 1) * per_page - 1]
+        return self.paginator(per_page).cursor_for(last_on_previous_page)
+
+    def time(self, fetch, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fetch()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
+
+    def create_notes(self, count):
+        show_count = -(-count // NOTES_PER_SHOW)  # round up
+        artist = Artist.objects.create(name='Benchmark Artist')
+        venue = Venue.objects.create(name='Benchmark Venue', city='Minneapolis', state='MN')
+        start = timezone.now() - datetime.timedelta(days=show_count + 1)
+        Show.objects.bulk_create(
+            Show(artist=artist, venue=venue, show_date=start + datetime.timedelta(days=n)) for n in range(show_count)
+        )
+        User.objects.bulk_create(
+            User(username=f'benchmark{n}', email=f'benchmark{n}@example.com') for n in range(NOTES_PER_SHOW)
+        )
+        # bulk_create on sqlite doesn't set primary keys in this Django version
+        shows = list(Show.objects.filter(venue=venue).order_by('pk'))
+        users = list(User.objects.filter(username__startswith='benchmark').order_by('pk'))
+        Note.objects.bulk_create(
+            (Note(show=shows[n // NOTES_PER_SHOW], user=users[n % NOTES_PER_SHOW], title=f'Note {n}', text='Great show')
+             for n in range(count)),
+            batch_size=5000,
+        )
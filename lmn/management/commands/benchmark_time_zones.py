@@ -0,0 +1,98 @@
+""" Compare activating and showing times in pytz zones, as before, with the cached zoneinfo zones of lmn/timezones.py.
+
+    python manage.py benchmark_time_zones
+    python manage.py benchmark_time_zones --requests 100000 --rows 1000 --repeat 10
+
+Times the time zone middleware for one request, and rendering the show date and posted
+date of every note in a list of notes. The notes are created inside a transaction which is
+rolled back at the end, so the database is left as it was.
+"""
+
+import datetime
+import statistics
+import time
+
+import pytz
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.http import HttpResponse
+from django.template import Context, Template
+from django.test import RequestFactory
+from django.utils import timezone
+
+from lmn.models import Artist, Venue, Show, Note
+from lmn.timezones import zone_or_default
+from lmnop_project.timezone import TimezoneDefault
+
+
+# the dates note_list.html shows for each note
+NOTE_DATES = Template('{% for note in notes %}{{ note.posted_date }} {{ note.show.local_show_date }}{% endfor %}')
+# as they were shown before, the show date in the active zone
+PYTZ_NOTE_DATES = Template('{% for note in notes %}{{ note.posted_date }} {{ note.show.show_date }}{% endfor %}')
+
+
+class PytzTimezoneDefault:
+    """ The middleware as it was, looking up a pytz zone for every request. """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timezone.activate(pytz.timezone(settings.DISPLAY_TIME_ZONE))
+        return self.get_response(request)
+
+
+class Command(BaseCommand):
+    help = 'Time the time zone middleware, and rendering the dates of a list of notes, with pytz and zoneinfo'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20000, help='requests to time the middleware for')
+        parser.add_argument('--rows', type=int, default=1000, help='notes in the list')
+        parser.add_argument('--repeat', type=int, default=5, help='times to render the list, the median is reported')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'{"":>28} {"pytz":>12} {"zoneinfo":>12}')
+
+        old = self.time_middleware(PytzTimezoneDefault, options['requests'])
+        new = self.time_middleware(TimezoneDefault, options['requests'])
+        self.stdout.write(f'{"middleware, us per request":>28} {old:>12.2f} {new:>12.2f}')
+
+        with transaction.atomic():
+            self.create_notes(options['rows'])
+            notes = list(Note.objects.feed()[:options['rows']])
+            with timezone.override(pytz.timezone(settings.DISPLAY_TIME_ZONE)):
+                old = self.time_render(PYTZ_NOTE_DATES, notes, options['repeat'])
+            with timezone.override(zone_or_default(None)):
+                new = self.time_render(NOTE_DATES, notes, options['repeat'])
+            self.stdout.write(f'{f"{len(notes)} notes, ms to render":>28} {old:>12.2f} {new:>12.2f}')
+            transaction.set_rollback(True)
+
+    def time_middleware(self, middleware_class, requests):
+        middleware = middleware_class(lambda request: HttpResponse())
+        request = RequestFactory().get('/')
+        with timezone.override(None):
+            start = time.perf_counter()
+            for _ in range(requests):
+                middleware(request)
+            return (time.perf_counter() - start) / requests * 1000000
+
+    def time_render(self, template, notes, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            template.render(Context({'notes': notes}))
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
+
+    def create_notes(self, count):
+        artist = Artist.objects.create(name='Benchmark Artist')
+        venue = Venue.objects.create(name='Benchmark Venue', city='Minneapolis', state='MN')
+        start = timezone.now() - datetime.timedelta(days=count + 1)
+        Show.objects.bulk_create(
+            Show(artist=artist, venue=venue, show_date=start + datetime.timedelta(days=n)) for n in range(count)
+        )
+        user = User.objects.create(username='benchmark', email='benchmark@example.com')
+        # bulk_create on sqlite doesn't set primary keys in this Django version
+        shows = Show.objects.filter(venue=venue).order_by('pk')
+        Note.objects.bulk_create(Note(show=show, user=user, title='Note', text='Great show') for show in shows)
@@ -0,0 +1,179 @@
+""" Time the main pages against the data in the database, and save the results to compare across commits.
+
+    python manage.py generate_load_data --seed 1
+    python manage.py benchmark_views --output before.json
+    git checkout my-branch
+    python manage.py benchmark_views --output after.json --compare before.json
+
+    python manage.py benchmark_views --views latest_notes user_profile --requests 200
+    python manage.py benchmark_views --server http://127.0.0.1:8000
+
+Each page is requested --warmup times, then --requests times, one after another, and the 50th, 95th
+and 99th percentile latencies are reported. The pages are for the artist, venue, show and user with
+the most notes, so the slowest. Without --server, requests are made in this process with Django's
+test client, the number of SQL queries each page runs is reported too, the page cache is disabled
+unless --cache is given, so every request builds the page, and requests aren't profiled.
+"""
+
+import json
+import math
+import statistics
+import subprocess
+import time
+
+import requests
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from lmn.cache import DUMMY_CACHE
+from lmn.models import Artist, Venue, Show, Note, Profile
+
+
+def percentile(sorted_values, percent):
+    """ The nearest-rank percentile of a sorted list. """
+    return sorted_values[max(math.ceil(percent / 100 * len(sorted_values)) - 1, 0)]
+
+
+def view_paths():
+    """ View name: path, for the busiest rows. Views whose rows don't exist are left out. """
+    artist = Artist.objects.order_by('-note_count', 'pk').first()
+    venue = Venue.objects.order_by('-note_count', 'pk').first()
+    show = Show.objects.order_by('-note_count', 'pk').first()
+    profile = Profile.objects.order_by('-note_count', 'pk').first()
+    note = Note.objects.order_by('-posted_date', '-pk').first()
+
+    paths = {
+        'latest_notes': reverse('latest_notes'),
+        'search_notes': reverse('latest_notes') + '?search_text=great+show',
+        'artist_list': reverse('artist_list'),
+        'venue_list': reverse('venue_list'),
+        'api_notes': reverse('api_list', kwargs={'resource_name': 'notes'}) + '?include=show.artist,show.venue',
+    }
+    if artist:
+        paths['artist_detail'] = reverse('artist_detail', kwargs={'artist_pk': artist.pk})
+        paths['venues_for_artist'] = reverse('venues_for_artist', kwargs={'artist_pk': artist.pk})
+    if venue:
+        paths['venue_detail'] = reverse('venue_detail', kwargs={'venue_pk': venue.pk})
+        paths['artists_at_venue'] = reverse('artists_at_venue', kwargs={'venue_pk': venue.pk})
+    if show:
+        paths['notes_for_show'] = reverse('notes_for_show', kwargs={'show_pk': show.pk})
+    if note:
+        paths['note_detail'] = reverse('note_detail', kwargs={'note_pk': note.pk})
+    if profile:
+        paths['user_profile'] = reverse('user_profile', kwargs={'user_pk': profile.pk})
+    return paths
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=settings.BASE_DIR, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = 'Report p50, p95 and p99 latency of the main pages, and save them as JSON to compare across commits'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--views', nargs='+', help='names of the pages to time, all of them by default')
+        parser.add_argument('--requests', type=int, default=50, help='timed requests per page')
+        parser.add_argument('--warmup', type=int, default=5, help='untimed requests per page first')
+        parser.add_argument('--server', help='base URL of a running server, instead of requests in this process')
+        parser.add_argument('--cache', action='store_true', help='keep the page cache enabled')
+        parser.add_argument('--output', help='file to save the results in, as JSON')
+        parser.add_argument('--compare', help='results saved by an earlier run, to show the changes from')
+
+    def handle(self, *args, **options):
+        paths = view_paths()
+        names = options['views'] or list(paths)
+        unknown = set(names) - set(paths)
+        if unknown:
+            raise CommandError(f'No such pages, or no rows for them: {", ".join(sorted(unknown))}. '
+                               f'Choose from {", ".join(paths)}')
+
+        results = {
+            'commit': git_commit(),
+            'time': timezone.now().isoformat(),
+            'server': options['server'],
+            'database': connection.vendor,
+            'cache': options['cache'],
+            'rows': {model.__name__: model.objects.count() for model in (User, Artist, Venue, Show, Note)},
+            'views': {},
+        }
+        self.stdout.write(', '.join(f'{count} {name}s' for name, count in results['rows'].items()))
+        self.stdout.write(f'{"view":<20} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"queries":>8}')
+
+        # not profiled, which logs every request locally
+        test_settings = {'PROFILING_SAMPLE_RATE': 0}
+        if not options['cache']:
+            test_settings['CACHES'] = DUMMY_CACHE
+        with override_settings(**test_settings):
+            for name in names:
+                result = self.time_view(paths[name], options)
+                results['views'][name] = result
+                queries = '' if result['queries'] is None else result['queries']
+                self.stdout.write(f'{name:<20} {result["p50_ms"]:>9.1f} {result["p95_ms"]:>9.1f} '
+                                  f'{result["p99_ms"]:>9.1f} {queries:>8}')
+
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(results, file, indent=2)
+            self.stdout.write(f'Saved to {options["output"]}')
+        if options['compare']:
+            with open(options['compare']) as file:
+                self.compare(json.load(file), results)
+
+    def time_view(self, path, options):
+        server = options['server']
+        get = requests.Session().get if server else Client(raise_request_exception=False).get
+        url = server.rstrip('/') + path if server else path
+
+        for _ in range(options['warmup']):
+            get(url)
+
+        queries = None
+        if not server:
+            with CaptureQueriesContext(connection) as captured:
+                get(url)
+            queries = len(captured)
+
+        latencies = []
+        statuses = set()
+        for _ in range(options['requests']):
+            start = time.perf_counter()
+            response = get(url)
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses.add(response.status_code)
+        latencies.sort()
+
+        return {
+            'path': path,
+            'requests': len(latencies),
+            'statuses': sorted(statuses),
+            'queries': queries,
+            'mean_ms': round(statistics.mean(latencies), 2),
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p95_ms': round(percentile(latencies, 95), 2),
+            'p99_ms': round(percentile(latencies, 99), 2),
+        }
+
+    def compare(self, old, new):
+        self.stdout.write(f'\nChanges from {old.get("commit") or "the earlier run"} '
+                          f'({", ".join(f"{count} {name}s" for name, count in old["rows"].items())})')
+        self.stdout.write(f'{"view":<20} {"p50 ms":>20} {"p95 ms":>20} {"p99 ms":>20}')
+        for name, result in new['views'].items():
+            before = old['views'].get(name)
+            if not before:
+                continue
+            changes = []
+            for key in ('p50_ms', 'p95_ms', 'p99_ms'):
+                change = (result[key] - before[key]) / before[key] * 100 if before[key] else 0
+                changes.append(f'{before[key]:.1f} > {result[key]:.1f} {change:+4.0f}%')
+            self.stdout.write(f'{name:<20} ' + ' '.join(f'{change:>20}' for change in changes))
@@ -0,0 +1,45 @@
+""" Add synthetic users, artists, venues, shows and notes to the database, to benchmark pages at production scale.
+
+    python manage.py generate_load_data
+    python manage.py generate_load_data --users 1000000 --artists 50000 --venues 5000 --shows 2000000 --notes 10000000
+    python manage.py generate_load_data --skew 0 --seed 1
+
+The rows are added to whatever is already there, and aren't removed afterwards, so use a database
+made for it, e.g. a copy of db.sqlite3 or a local Postgres container. See lmn/load_data.py for how
+popularity is skewed.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from lmn.load_data import generate_load_data
+
+
+class Command(BaseCommand):
+    help = 'Bulk create synthetic users, artists, venues, shows and notes with realistic skew'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--artists', type=int, default=2000)
+        parser.add_argument('--venues', type=int, default=300)
+        parser.add_argument('--shows', type=int, default=50000)
+        parser.add_argument('--notes', type=int, default=200000)
+        parser.add_argument('--skew', type=float, default=1.0,
+                            help='1 for the nth most popular artist, venue or user to be 1/n as popular as the first, '
+                                 '0 for evenly')
+        parser.add_argument('--years', type=int, default=5, help='shows are spread over this many years')
+        parser.add_argument('--batch-size', type=int, default=5000, help='rows per INSERT')
+        parser.add_argument('--seed', type=int, help='to make the same data again')
+
+    def handle(self, *args, **options):
+        if options['shows'] and not (options['artists'] and options['venues']):
+            raise CommandError('Shows need at least one artist and one venue')
+        start = time.perf_counter()
+        added = generate_load_data(
+            options['users'], options['artists'], options['venues'], options['shows'], options['notes'],
+            skew=options['skew'], years=options['years'], batch_size=options['batch_size'], seed=options['seed'],
+            progress=lambda message: self.stdout.write(f'{time.perf_counter() - start:8.1f}s  {message}'),
+        )
+        self.stdout.write(f'Added {", ".join(f"{count} {name}" for name, count in added.items())} '
+                          f'in {time.perf_counter() - start:.1f}s')
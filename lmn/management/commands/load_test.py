@@ -0,0 +1,92 @@
+""" Measure requests per second for a few pages, to compare database connection settings.
+
+    python manage.py load_test
+    python manage.py load_test --paths /venues/list/ /notes/latest/ --requests 2000 --concurrency 8
+    python manage.py load_test --server http://127.0.0.1:8000
+
+Without --server, requests are made in this process with Django's test client, one client
+per thread, so every request opens and releases database connections just like a real one,
+and the connection metrics of lmnop_project.postgres are reported afterwards. The page
+cache is cleared first and disabled while the test runs, so every request reaches the database.
+
+To compare, run it with different settings, e.g. against a local Postgres container:
+
+    LMN_LOCAL_POSTGRES=1 LMN_DB_CONN_MAX_AGE=0 python manage.py load_test
+    LMN_LOCAL_POSTGRES=1 LMN_DB_CONN_MAX_AGE=60 python manage.py load_test
+    LMN_LOCAL_POSTGRES=1 LMN_DB_POOL_SIZE=4 python manage.py load_test
+"""
+
+import statistics
+import threading
+import time
+from collections import Counter
+
+import requests
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import Client
+from django.test.utils import override_settings
+
+from lmn.cache import DUMMY_CACHE
+from lmnop_project.postgres.base import DatabaseWrapper, metrics_for
+
+
+class Command(BaseCommand):
+    help = 'Measure requests per second, and database connection wait times'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--paths', nargs='+', default=['/artists/list/', '/venues/list/', '/notes/latest/'])
+        parser.add_argument('--requests', type=int, default=1000, help='total number of requests')
+        parser.add_argument('--concurrency', type=int, default=4, help='number of threads making requests')
+        parser.add_argument('--server', help='base URL of a running server, instead of requests in this process')
+
+    def handle(self, *args, **options):
+        paths = options['paths']
+        total = options['requests']
+        concurrency = options['concurrency']
+        server = options['server']
+
+        metrics = metrics_for('default')
+        metrics.reset()
+        latencies = []
+        statuses = Counter()
+        lock = threading.Lock()
+        counter = iter(range(total))
+
+        def worker():
+            get = requests.Session().get if server else Client(raise_request_exception=False).get
+            while True:
+                with lock:
+                    number = next(counter, None)
+                if number is None:
+                    break
+                path = paths[number % len(paths)]
+                start = time.perf_counter()
+                response = get(server.rstrip('/') + path if server else path)
+                seconds = time.perf_counter() - start
+                with lock:
+                    latencies.append(seconds)
+                    statuses[response.status_code] += 1
+            # release this thread's connections, back to the pool if pooled
+            connections.close_all()
+
+        with override_settings(CACHES=DUMMY_CACHE):
+            threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+
+        latencies.sort()
+        self.stdout.write(f'{total} requests, {concurrency} threads, {elapsed:.2f}s')
+        self.stdout.write(f'requests per second: {total / elapsed:.1f}')
+        self.stdout.write(f'latency ms: median {1000 * statistics.median(latencies):.1f}, '
+                          f'95th percentile {1000 * latencies[int(0.95 * (len(latencies) - 1))]:.1f}')
+        self.stdout.write(f'status codes: {dict(statuses)}')
+        database = connections['default']
+        if not server and isinstance(database, DatabaseWrapper):
+            self.stdout.write(f'database: {database.vendor}, CONN_MAX_AGE {database.settings_dict["CONN_MAX_AGE"]}, '
+                              f'pool size {database.options["POOL_SIZE"]}')
+            self.stdout.write(f'connections: {metrics.snapshot()}')
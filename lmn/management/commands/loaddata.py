@@ -0,0 +1,23 @@
+""" Django's loaddata, which while testing copies in the rows a set of fixtures made the first time it was loaded.
+
+See lmn/fixture_snapshots.py. Without settings.FIXTURE_SNAPSHOTS, or with any of loaddata's options, it's
+Django's loaddata.
+"""
+
+from django.conf import settings
+from django.core.management.commands import loaddata
+
+from lmn.fixture_snapshots import load_with_snapshot
+
+
+class Command(loaddata.Command):
+
+    def handle(self, *fixture_labels, **options):
+        plain = not (options['app_label'] or options['exclude'] or options['ignore'] or options['format'])
+        if not (settings.FIXTURE_SNAPSHOTS and plain):
+            return super().handle(*fixture_labels, **options)
+
+        copied = load_with_snapshot(options['database'], fixture_labels,
+                                    lambda: super(Command, self).handle(*fixture_labels, **options))
+        if copied is not None and options['verbosity'] >= 1:
+            self.stdout.write(f'Copied {copied} row(s) loaded from the same fixtures before')
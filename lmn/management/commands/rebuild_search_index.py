@@ -0,0 +1,22 @@
+""" Rebuild the search index for artists, venues and notes.
+
+Needed after rows are added without signals, e.g. with bulk_create or raw SQL.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from lmn.search import backend_for, SEARCH_FIELDS
+
+
+class Command(BaseCommand):
+    help = 'Re-index every artist, venue and note for search'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        backend = backend_for(options['database'])
+        for model in SEARCH_FIELDS:
+            backend.rebuild(model)
+            self.stdout.write(f'Indexed {model.objects.using(options["database"]).count()} {model._meta.verbose_name_plural}')
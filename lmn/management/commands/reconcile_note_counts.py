@@ -0,0 +1,19 @@
+""" Recompute the note counts of every show, artist, venue and profile from the notes.
+
+    python manage.py reconcile_note_counts
+
+Counts are kept up to date as notes are saved and deleted, run this after adding notes
+some other way, e.g. with loaddata, or to check the counts haven't drifted.
+"""
+
+from django.core.management.base import BaseCommand
+
+from lmn.counters import reconcile_note_counts
+
+
+class Command(BaseCommand):
+    help = 'Recompute note counts of shows, artists, venues and profiles'
+
+    def handle(self, *args, **options):
+        for model_name, corrected in reconcile_note_counts().items():
+            self.stdout.write(f'{model_name}: corrected {corrected} counts')
@@ -0,0 +1,40 @@
+""" Run queued tasks from lmn/tasks.py - deleting images, making thumbnails.
+
+    python manage.py run_tasks            # keep running, checking for new tasks every few seconds
+    python manage.py run_tasks --once     # run the tasks which are due, then stop, e.g. from cron
+
+Several workers can run at once, each task is run by one of them.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from lmn.tasks import run_pending, requeue_stale
+
+
+class Command(BaseCommand):
+    help = 'Run queued background tasks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='stop when no tasks are due')
+        parser.add_argument('--sleep', type=float, default=5, help='seconds to wait when no tasks are due')
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                close_old_connections()
+                requeued = requeue_stale()
+                if requeued:
+                    self.stdout.write(f'requeued {requeued} stale tasks')
+                ran = run_pending()
+                if ran:
+                    self.stdout.write(f'ran {ran} tasks')
+                if options['once']:
+                    break
+                if not ran:
+                    time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            # a task interrupted part way through is requeued once it's stale
+            self.stdout.write('stopped')
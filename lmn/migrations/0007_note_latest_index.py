@@ -0,0 +1,17 @@
+# Generated by Django 3.1.2 on 2026-10-18 04:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lmn', '0006_auto_20211213_2331'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['-posted_date', '-id'], name='note_latest_idx'),
+        ),
+    ]
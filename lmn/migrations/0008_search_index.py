@@ -0,0 +1,57 @@
+# Search tables and indexes used by lmn/search.py
+
+from django.db import migrations, OperationalError
+
+
+SQLITE_TABLES = {
+    # FTS5 table: columns searched
+    'lmn_artist_fts': ('lmn_artist', ('name',)),
+    'lmn_venue_fts': ('lmn_venue', ('name',)),
+    'lmn_note_fts': ('lmn_note', ('title', 'text')),
+}
+
+# Must match the expressions Django builds in lmn.search.PostgresSearchBackend
+POSTGRES_INDEXES = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX IF NOT EXISTS lmn_artist_name_trgm ON lmn_artist USING gin (UPPER(name::text) gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS lmn_venue_name_trgm ON lmn_venue USING gin (UPPER(name::text) gin_trgm_ops)',
+    "CREATE INDEX IF NOT EXISTS lmn_note_search ON lmn_note USING gin "
+    "(to_tsvector('english'::regconfig, COALESCE(title, '') || ' ' || COALESCE(text, '')))",
+]
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for table, (source, columns) in SQLITE_TABLES.items():
+            columns = ', '.join(columns)
+            try:
+                schema_editor.execute(f"CREATE VIRTUAL TABLE {table} USING fts5({columns}, tokenize='trigram')")
+            except OperationalError:
+                # SQLite older than 3.34 or built without FTS5, lmn.search falls back to LIKE
+                return
+            schema_editor.execute(f'INSERT INTO {table} (rowid, {columns}) SELECT id, {columns} FROM {source}')
+    elif vendor == 'postgresql':
+        for sql in POSTGRES_INDEXES:
+            schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for table in SQLITE_TABLES:
+            schema_editor.execute(f'DROP TABLE IF EXISTS {table}')
+    elif vendor == 'postgresql':
+        for index in ('lmn_artist_name_trgm', 'lmn_venue_name_trgm', 'lmn_note_search'):
+            schema_editor.execute(f'DROP INDEX IF EXISTS {index}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lmn', '0007_note_latest_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 3.1.2 on 2026-10-18 04:37
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+# Counted model: lookup from a Note to the counted row, as in lmn/counters.py
+COUNTED = {'Show': 'show', 'Artist': 'show__artist', 'Venue': 'show__venue', 'Profile': 'user'}
+
+
+def count_existing_notes(apps, schema_editor):
+    Note = apps.get_model('lmn', 'Note')
+    for model_name, lookup in COUNTED.items():
+        counts = Note.objects.filter(**{lookup: OuterRef('pk')}).order_by() \
+            .values(lookup).annotate(count=Count('pk')).values('count')
+        apps.get_model('lmn', model_name).objects.update(note_count=Coalesce(Subquery(counts), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lmn', '0009_task_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='artist',
+            name='note_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='note_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='show',
+            name='note_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='venue',
+            name='note_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_existing_notes, migrations.RunPython.noop),
+    ]
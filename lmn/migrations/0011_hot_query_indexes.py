@@ -0,0 +1,52 @@
+# Generated by Django 3.1.2 on 2026-10-18 04:39
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('lmn', '0010_note_counts'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='note',
+            name='show',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='lmn.show'),
+        ),
+        migrations.AlterField(
+            model_name='note',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='show',
+            name='artist',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='lmn.artist'),
+        ),
+        migrations.AlterField(
+            model_name='show',
+            name='venue',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='lmn.venue'),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['show', '-posted_date', '-id'], name='note_show_latest_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['user', '-posted_date', '-id'], name='note_user_latest_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='show',
+            index=models.Index(fields=['artist', '-show_date', '-id'], name='show_artist_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='show',
+            index=models.Index(fields=['venue', '-show_date', '-id'], name='show_venue_date_idx'),
+        ),
+    ]
@@ -0,0 +1,15 @@
+# Generated by Django 3.1.2 on 2026-10-18 04:40
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """ Kept so databases which have applied it stay consistent. The show listing indexes it rebuilt
+    with -id are now made that way by 0011_hot_query_indexes, so they're only built once. """
+
+    dependencies = [
+        ('lmn', '0011_hot_query_indexes'),
+    ]
+
+    operations = [
+    ]
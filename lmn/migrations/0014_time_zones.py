@@ -0,0 +1,24 @@
+# Generated by Django 3.1.2 on 2026-10-18 04:49
+
+from django.db import migrations, models
+import lmn.timezones
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lmn', '0013_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='time_zone',
+            field=models.CharField(blank=True, max_length=64, validators=[lmn.timezones.validate_time_zone]),
+        ),
+        migrations.AddField(
+            model_name='venue',
+            name='time_zone',
+            field=models.CharField(blank=True, max_length=64, validators=[lmn.timezones.validate_time_zone]),
+        ),
+    ]
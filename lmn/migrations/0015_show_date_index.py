@@ -0,0 +1,17 @@
+# Generated by Django 3.1.2 on 2026-10-18 05:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lmn', '0014_time_zones'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='show',
+            index=models.Index(fields=['-show_date', '-id'], name='show_date_idx'),
+        ),
+    ]
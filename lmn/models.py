@@ -1,11 +1,17 @@
 from django.db import models
-from django.core.files.storage import default_storage
+from django.db.models.fields.files import FieldFile
+from django.db.models import ExpressionWrapper, Q
+from django.db.models.functions import Now, Substr
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 
 from django.contrib.auth.models import User
+
+from .renditions import rendition_url
+from .timezones import local_time, validate_time_zone, zone_or_default
+
 User._meta.get_field('email')._unique = True
 
 #  Require email, first name and last name
@@ -13,14 +19,103 @@ User._meta.get_field('email')._blank = False
 User._meta.get_field('last_name')._blank = False
 User._meta.get_field('first_name')._blank = False
 
-class Profile(models.Model):
+
+class TrackedModel(models.Model):
+    """ A model which remembers the values its fields were loaded with, so saves can write only what changed.
+
+    Saving an instance loaded from the database updates only changed_fields, and does nothing
+    if none have changed. Pass update_fields to save to choose the columns yourself.
+
+    As with any save with update_fields:
+    - saving an instance whose row has been deleted raises DatabaseError, rather than inserting
+      the row again. Views saving a row another request may have deleted must catch it.
+    - saving an instance which hasn't changed sends no pre_save or post_save signals.
+
+    updated_at is set whenever something is saved, for conditional GETs of pages showing the row.
+    """
+    # not auto_now, so rows loaded from fixtures get a time too
+    updated_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_values()
+        return instance
+
+    def _tracked_value(self, field):
+        """ Value of a field, comparable with the value it was loaded with. Files are compared by name. """
+        value = getattr(self, field.attname)
+        if isinstance(value, FieldFile):
+            value = value.name
+        if isinstance(field, models.FileField):
+            value = value or None
+        return value
+
+    def _remember_values(self, fields=None):
+        """ Record the current values of fields, all of the loaded fields by default, as unchanged. """
+        if not hasattr(self, '_loaded_values'):
+            self._loaded_values = {}
+        deferred = self.get_deferred_fields()
+        for field in self._meta.concrete_fields:
+            if field.attname not in deferred and (fields is None or field.name in fields or field.attname in fields):
+                self._loaded_values[field.attname] = self._tracked_value(field)
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        self._remember_values(fields)
+
+    def original(self, field_name):
+        """ Value the field had when it was loaded - the name, for file fields. """
+        return self._loaded_values[self._meta.get_field(field_name).attname]
+
+    @property
+    def changed_fields(self):
+        """ Names of fields changed since the instance was loaded or saved, or every field of an unsaved instance.
+
+        Fields which weren't loaded, because they were deferred, count as changed once they're set.
+        """
+        if self._state.adding or not hasattr(self, '_loaded_values'):
+            return [field.name for field in self._meta.concrete_fields]
+        deferred = self.get_deferred_fields()
+        return [field.name for field in self._meta.concrete_fields
+                if field.attname not in deferred and
+                (field.attname not in self._loaded_values or
+                 self._loaded_values[field.attname] != self._tracked_value(field))]
+
+    def has_changed(self, field_name):
+        return field_name in self.changed_fields
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and hasattr(self, '_loaded_values') and not args and \
+                kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            # an empty update_fields saves nothing, and sends no signals
+            kwargs['update_fields'] = self.changed_fields
+        if kwargs.get('update_fields') is None or kwargs['update_fields']:
+            self.updated_at = timezone.now()
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = list(kwargs['update_fields']) + ['updated_at']
+        super().save(*args, **kwargs)
+        self._loaded_values = {}
+        self._remember_values()
+
+
+class Profile(TrackedModel):
     """ Represents the db model for an existing user."""
     user = models.OneToOneField('auth.User', on_delete=models.CASCADE, primary_key=True)
     favorite_artist = models.ForeignKey('Artist', on_delete=models.CASCADE, null=True, blank=True)
     favorite_venue = models.ForeignKey('Venue', on_delete=models.CASCADE, null=True, blank=True)
     avatar = models.ImageField(default='default.jpg',upload_to='profile_images', null=True, blank=True)
+    # times are shown in this zone, blank for the site's default
+    time_zone = models.CharField(max_length=64, blank=True, validators=[validate_time_zone])
+    # maintained by lmn/counters.py
+    note_count = models.PositiveIntegerField(default=0)
     objects = models.Manager()
 
+    DEFAULT_AVATAR = 'default.jpg'
+
 
     @receiver(post_save, sender=User)
     def create_save_user_profile(sender, created, instance, **kwargs):
@@ -34,24 +129,39 @@ class Profile(models.Model):
             Profile.objects.create(user=instance)
 
     def save(self, *args, **kwargs):
-        """ delete/update avatar, then save updates. """
-        profile = Profile.objects.filter(pk=self.pk).first()
-        if profile and profile.avatar:
-            if profile.avatar != self.avatar:
-                self.delete_photo(profile.avatar)
-                if not self.avatar:
-                    self.avatar = 'default.jpg'
+        """ delete/update avatar, then save updates, and queue making the new avatar's renditions. """
+        avatar_changed = self.has_changed('avatar')
+        if avatar_changed and not self._state.adding and self.original('avatar'):
+            self.delete_photo(self.original('avatar'))
+            if not self.avatar:
+                self.avatar = self.DEFAULT_AVATAR
         super().save(*args, **kwargs)
+        # the default avatar's renditions are in the media directory already
+        if avatar_changed and self.avatar and self.avatar.name != self.DEFAULT_AVATAR:
+            from .tasks import enqueue
+            enqueue('make_renditions', name=self.avatar.name, field_name='avatar')
         
-    def delete_photo(self, avatar):
-        """remove photo from profile object. """
-        if default_storage.exists(avatar.name):
-            default_storage.delete(avatar.name)
+    def delete_photo(self, name):
+        """queue removing photo, and its renditions, from storage. The default avatar is shared, so it's kept. """
+        if name == self.DEFAULT_AVATAR:
+            return
+        from .tasks import enqueue
+        enqueue('delete_image', name=name, field_name='avatar')
+
+    @property
+    def avatar_thumb_url(self):
+        """ URL of a small JPEG copy of the avatar. """
+        return rendition_url(self.avatar, 'thumb')
+
+    @property
+    def avatar_thumb_webp_url(self):
+        """ URL of a small WebP copy of the avatar. """
+        return rendition_url(self.avatar, 'thumb', 'webp')
 
     def delete(self,  *args, **kwargs):
         """remove photo from profile object and from media file."""
         if self.avatar:
-            self.delete_photo(self.avatar)
+            self.delete_photo(self.avatar.name)
             
         super().delete(*args, **kwargs)
 
@@ -63,80 +173,203 @@ class Profile(models.Model):
         return str(f'Name: {self.user.first_name} {self.user.last_name}, Favorite Artist: {favorite_artist_str}, Favorite Venue: {favorite_venue_str}\nAvatar: {avatar_str}')
 
 
-class Artist(models.Model):
+class Artist(TrackedModel):
     """ Represents a musician or a band - a music artist. """
     name = models.CharField(max_length=200, blank=False, unique=True)
+    note_count = models.PositiveIntegerField(default=0)
     objects = models.Manager()
     
     def __str__(self):
         return f'Name: {self.name}'
 
 
-class Venue(models.Model):
+class Venue(TrackedModel):
     """ Represents a venue, that hosts shows. """
     name = models.CharField(max_length=200, blank=False, unique=True)
     city = models.CharField(max_length=200, blank=False)
     state = models.CharField(max_length=200, blank=False)
+    # shows here are shown in this zone, blank for the site's default
+    time_zone = models.CharField(max_length=64, blank=True, validators=[validate_time_zone])
+    note_count = models.PositiveIntegerField(default=0)
     objects = models.Manager()
+
+    @property
+    def zone(self):
+        return zone_or_default(self.time_zone)
     
     def __str__(self):
         return f'Name: {self.name} Location: {self.city}, {self.state}'
 
 
-class Show(models.Model):
+class ShowQuerySet(models.QuerySet):
+    """ Queries used by pages that list many shows. """
+
+    def listing(self):
+        """ Shows ready to be displayed in a list, most recent first.
+
+        The artist and venue are joined in, and whether each show is in the past is
+        worked out by the database, as show.is_past, so rendering a row makes no queries.
+        """
+        return self.select_related('artist', 'venue') \
+            .annotate(is_past=ExpressionWrapper(Q(show_date__lt=Now()), output_field=models.BooleanField())) \
+            .order_by('-show_date', '-pk')
+
+    def reviewable_by(self, user):
+        """ Shows user can write a note about: past ones they haven't written one about yet, most recent first. """
+        return self.listing().filter(show_date__lt=Now()) \
+            .exclude(models.Exists(Note.objects.filter(show=models.OuterRef('pk'), user=user)))
+
+    def review_status(self, user):
+        """ Shows with whether user can write a note about each, for checking one before showing the note form.
+
+        show.is_past is worked out by the database, and show.user_note_pk is the pk of user's note
+        about the show, or None, so a show, its artist and venue, and both answers take one query.
+        """
+        return self.listing().annotate(user_note_pk=models.Subquery(
+            Note.objects.filter(show=models.OuterRef('pk'), user=user).values('pk')[:1]))
+
+
+class Show(TrackedModel):
     """ One Artist playing at one Venue at a particular date and time. """
     show_date = models.DateTimeField(blank=False)
-    artist = models.ForeignKey(Artist, on_delete=models.CASCADE)
-    venue = models.ForeignKey(Venue, on_delete=models.CASCADE)
-    objects = models.Manager()
+    # indexed by show_artist_date_idx and show_venue_date_idx
+    artist = models.ForeignKey(Artist, on_delete=models.CASCADE, db_index=False)
+    venue = models.ForeignKey(Venue, on_delete=models.CASCADE, db_index=False)
+    note_count = models.PositiveIntegerField(default=0)
+    objects = ShowQuerySet.as_manager()
 
     class Meta:
         constraints = [models.UniqueConstraint(fields=['show_date', 'artist', 'venue'], name='instance_of_a_show')]
+        # an artist's or venue's shows, most recent first, as paginated by listing pages
+        indexes = [
+            models.Index(fields=['artist', '-show_date', '-id'], name='show_artist_date_idx'),
+            models.Index(fields=['venue', '-show_date', '-id'], name='show_venue_date_idx'),
+            # all shows, most recent first, as paginated by the shows to review page
+            models.Index(fields=['-show_date', '-id'], name='show_date_idx'),
+        ]
 
     @property
     def in_past(self):
         return self.show_date < timezone.now()
 
+    @property
+    def local_show_date(self):
+        """ The show's date in its venue's time zone, for templates. """
+        return local_time(self.show_date, self.venue.zone)
+
     def __str__(self):
         return f'Artist: {self.artist} At: {self.venue} On: {self.show_date}'
 
 
-class Note(models.Model):
+class NoteQuerySet(models.QuerySet):
+    """ Queries used by pages that list many notes. """
+
+    def feed(self, preview_length=100):
+        """ Notes ready to be displayed in a list, most recent first.
+
+        The show, artist, venue and author are joined in with one query so templates
+        can use note.show.artist.name etc. without a query per note. The full text
+        column is deferred, and a preview just long enough for truncatechars to
+        produce the same output is fetched instead, as note.preview.
+
+        Args:
+            preview_length ([int]): number of characters of text displayed per note
+        """
+        return self.select_related('show__artist', 'show__venue', 'user') \
+            .defer('text') \
+            .annotate(preview=Substr('text', 1, preview_length + 1)) \
+            .order_by('-posted_date')
+
+
+class Note(TrackedModel):
     """ One user's opinion of one Show. """
-    show = models.ForeignKey(Show, blank=False, on_delete=models.CASCADE)
-    user = models.ForeignKey('auth.User', blank=False, on_delete=models.CASCADE)
+    # indexed by note_show_latest_idx and note_user_latest_idx
+    show = models.ForeignKey(Show, blank=False, on_delete=models.CASCADE, db_index=False)
+    user = models.ForeignKey('auth.User', blank=False, on_delete=models.CASCADE, db_index=False)
     title = models.CharField(max_length=200, blank=False)
     text = models.TextField(max_length=1000, blank=False)
     posted_date = models.DateTimeField(auto_now_add=True, blank=False)
     photo = models.ImageField(upload_to='user_images/', blank=True, null=True)
-    objects = models.Manager()
+    objects = NoteQuerySet.as_manager()
 
     class Meta:
         constraints = [models.UniqueConstraint(fields=['show', 'user'], name='one_user_note_per_show')]
+        # the latest notes, and the latest notes for a show or by a user, are read in index order
+        indexes = [
+            models.Index(fields=['-posted_date', '-id'], name='note_latest_idx'),
+            models.Index(fields=['show', '-posted_date', '-id'], name='note_show_latest_idx'),
+            models.Index(fields=['user', '-posted_date', '-id'], name='note_user_latest_idx'),
+        ]
 
     def save(self, *args, **kwargs):
 
-        if timezone.now() < self.show.show_date:
+        # a note's show only needs checking when it's set
+        if self.has_changed('show') and timezone.now() < self.show.show_date:
             raise ValidationError('Can\'t add note for show that hasn\'t happened yet.')
 
-        # delete old photo if note and old photo exist, and new photo present
-        old_note = Note.objects.filter(pk=self.pk).first()
-        if old_note and old_note.photo:
-            if old_note.photo != self.photo:
-                self.delete_photo(old_note.photo)
+        # delete old photo if it's been replaced or cleared
+        photo_changed = self.has_changed('photo')
+        if photo_changed and not self._state.adding and self.original('photo'):
+            self.delete_photo(self.original('photo'))
+        # new notes are counted by lmn/counters.py, a note moved to another show or user is counted here
+        moved_from = None
+        if not self._state.adding and (self.has_changed('show') or self.has_changed('user')):
+            moved_from = (self.original('show'), self.original('user'))
         super().save(*args, **kwargs) 
+        if moved_from:
+            from .counters import count_note
+            count_note(*moved_from, -1)
+            count_note(self.show_id, self.user_id, 1)
+        if photo_changed and self.photo:
+            from .tasks import enqueue
+            enqueue('make_renditions', name=self.photo.name, field_name='photo')
+
+    def delete_photo(self, name):
+        from .tasks import enqueue
+        enqueue('delete_image', name=name, field_name='photo')
 
-    def delete_photo(self, photo):
-        if default_storage.exists(photo.name):
-            default_storage.delete(photo.name)
+    @property
+    def photo_thumb_url(self):
+        """ URL of a JPEG copy of the photo, small enough for the note page. """
+        return rendition_url(self.photo, 'thumb')
+
+    @property
+    def photo_thumb_webp_url(self):
+        """ URL of a WebP copy of the photo, small enough for the note page. """
+        return rendition_url(self.photo, 'thumb', 'webp')
 
     def delete(self, *args, **kwargs):
         if self.photo:
-            self.delete_photo(self.photo)
+            self.delete_photo(self.photo.name)
         super().delete(*args, **kwargs)
 
     def __str__(self):
         photo_str = self.photo.url if self.photo else 'No photo.'
         return f'User: {self.user} Show: {self.show} Note title: {self.title} \
         Text: {self.text} Posted on: {self.posted_date} \
-        Photo: {photo_str}'
\ No newline at end of file
+        Photo: {photo_str}'
+
+
+class Task(models.Model):
+    """ A call of a function in lmn/tasks.py, waiting to be run by the run_tasks worker. """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUSES = [(PENDING, 'Pending'), (RUNNING, 'Running'), (FAILED, 'Failed')]
+
+    name = models.CharField(max_length=100)
+    arguments = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUSES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    objects = models.Manager()
+
+    class Meta:
+        # the worker looks for pending tasks which are due, oldest first
+        indexes = [models.Index(fields=['status', 'run_after'], name='task_ready_idx')]
+
+    def __str__(self):
+        return f'{self.name}({self.arguments}) {self.status}, {self.attempts} attempts'
@@ -0,0 +1,193 @@
+""" Keyset (cursor) pagination for long lists.
+
+Django's Paginator counts every row and uses OFFSET to find a page, so pages
+deep into a big table get slower and slower. CursorPaginator instead remembers
+the sort key of the last (or first) row shown, and asks the database for the
+rows after (or before) it, so every page costs the same and no count is needed.
+
+The position is handed to the browser as an opaque token, e.g. ?cursor=eyJk...
+"""
+
+import base64
+import binascii
+import datetime
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+class InvalidCursor(Exception):
+    """ Raised when a cursor token can't be decoded. """
+
+
+class CursorPaginator:
+    """ Paginate a queryset by the values of its ordering fields.
+
+    Args:
+        object_list ([QuerySet]): the rows to paginate
+        per_page ([int]): number of rows on each page
+        ordering ([tuple]): field names, '-' prefix for descending, like order_by().
+            The last field must be unique, usually 'pk', so every row has a distinct position.
+    """
+
+    def __init__(self, object_list, per_page, ordering):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        opts = object_list.model._meta
+        self.fields = []
+        for name in self.ordering:
+            descending = name.startswith('-')
+            name = name.lstrip('-')
+            field = opts.pk if name == 'pk' else opts.get_field(name)
+            self.fields.append((name, field, descending))
+
+    def page(self, cursor=None):
+        """ Return the page a cursor points to, or the first page if there is no cursor.
+
+        The cursor is checked straight away, but the rows aren't fetched until the page is used.
+
+        Raises:
+            InvalidCursor: if the cursor is not one made by this paginator
+        """
+        direction, values = self.decode_cursor(cursor) if cursor else (NEXT, None)
+        backwards = direction == PREVIOUS
+
+        ordering = [self._order_by(name, descending != backwards) for name, field, descending in self.fields]
+        queryset = self.object_list.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self._beyond(values, backwards))
+
+        return CursorPage(queryset, self, cursor=cursor if values is not None else None, backwards=backwards)
+
+    def get_page(self, cursor=None):
+        """ Like page(), but an unreadable cursor returns the first page instead of raising. """
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page()
+
+    def cursor_for(self, row, direction=NEXT):
+        """ Make a token for the rows after (NEXT) or before (PREVIOUS) this row. """
+        values = [self._encode_value(getattr(row, 'pk' if name == 'pk' else field.attname))
+                  for name, field, descending in self.fields]
+        token = json.dumps({'d': direction, 'v': values}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(token.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """ Return the (direction, values) stored in a token made by cursor_for. """
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            direction, values = data['d'], data['v']
+            if direction not in (NEXT, PREVIOUS) or len(values) != len(self.fields):
+                raise InvalidCursor(cursor)
+            return direction, [field.to_python(value) for (name, field, descending), value in zip(self.fields, values)]
+        except (ValueError, TypeError, KeyError, binascii.Error, ValidationError) as e:
+            # field.to_python raises ValidationError for values of the wrong type
+            raise InvalidCursor(cursor) from e
+
+    def _beyond(self, values, backwards):
+        """ Filter for rows that sort after the given key values (before, if backwards).
+
+        For ordering (a, b) that is: a >= va AND (a > va OR (a = va AND b > vb))
+        The redundant a >= va lets the database start from the cursor in an index on (a, b)
+        instead of scanning from the top of it.
+        """
+        condition = Q()
+        equal_so_far = {}
+        for (name, _, descending), value in zip(self.fields, values):
+            lookup = 'gt' if descending == backwards else 'lt'
+            condition |= Q(**equal_so_far, **{f'{name}__{lookup}': value})
+            equal_so_far[name] = value
+        (name, _, descending), value = self.fields[0], values[0]
+        return Q(**{f'{name}__{"gte" if descending == backwards else "lte"}': value}) & condition
+
+    @staticmethod
+    def _order_by(name, descending):
+        return f'-{name}' if descending else name
+
+    @staticmethod
+    def _encode_value(value):
+        if isinstance(value, (datetime.datetime, datetime.date)):
+            return value.isoformat()
+        return value
+
+
+class CursorPage:
+    """ One page of rows from a CursorPaginator. Iterate over it to get the rows.
+
+    Like a QuerySet, the rows are fetched the first time they're needed, so a page which
+    is only used inside a cached template fragment costs nothing when the fragment is cached.
+    """
+
+    def __init__(self, queryset, paginator, cursor, backwards):
+        self.queryset = queryset
+        self.paginator = paginator
+        self.cursor = cursor
+        self.backwards = backwards
+        self._object_list = None
+
+    @property
+    def object_list(self):
+        """ The rows on this page, fetched the first time they're used. """
+        if self._object_list is None:
+            self._fetch()
+        return self._object_list
+
+    def _fetch(self):
+        # fetch one extra row to find out if there is anything past this page
+        rows = list(self.queryset[:self.paginator.per_page + 1])
+        more = len(rows) > self.paginator.per_page
+        rows = rows[:self.paginator.per_page]
+        if self.backwards:
+            rows.reverse()
+            self._has_next, self._has_previous = bool(rows), more
+        else:
+            self._has_next, self._has_previous = more, self.cursor is not None and bool(rows)
+        self._object_list = rows
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        if not isinstance(index, (int, slice)):
+            # templates try page['name'] before page.name, that mustn't fetch the rows
+            raise TypeError(f'CursorPage indices must be integers or slices, not {type(index).__name__}')
+        return self.object_list[index]
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self)} rows>'
+
+    def has_next(self):
+        if self._object_list is None:
+            self._fetch()
+        return self._has_next
+
+    def has_previous(self):
+        if self._object_list is None:
+            self._fetch()
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def next_cursor(self):
+        """ Token for the page after this one, or None on the last page. """
+        if self.has_next():
+            return self.paginator.cursor_for(self.object_list[-1], NEXT)
+
+    @property
+    def previous_cursor(self):
+        """ Token for the page before this one, or None on the first page. """
+        if self.has_previous():
+            return self.paginator.cursor_for(self.object_list[0], PREVIOUS)
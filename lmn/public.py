@@ -0,0 +1,59 @@
+""" Pages rendered the same for everyone, so a CDN can serve them from its cache.
+
+A view decorated with @public_page is rendered as if nobody were logged in, without loading the
+session or the user, and without a CSRF token. The response is marked
+
+    Cache-Control: public, max-age=0, s-maxage=PUBLIC_PAGE_SECONDS, stale-while-revalidate=PUBLIC_PAGE_STALE_SECONDS
+
+so shared caches keep it and browsers revalidate it, cheaply with the ETags from lmn/conditional.py.
+
+The parts of a page which depend on who is logged in, like the account menu in the navigation bar,
+are placeholders with a data-fragment attribute, filled in by static/js/user_fragments.js from small
+private views, like nav_account and note_controls. Templates check request.public_page to render placeholders.
+
+A request with a pending message is rendered for its user as usual, so the message is shown,
+and marked private.
+"""
+
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.utils.cache import patch_cache_control
+
+
+def public_page(view):
+    @wraps(view)
+    def public_view(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or CookieStorage.cookie_name in request.COOKIES:
+            response = view(request, *args, **kwargs)
+            patch_cache_control(response, private=True)
+            return response
+
+        request.public_page = True
+        # replaces the lazy user from AuthenticationMiddleware, which would load the session
+        request.user = AnonymousUser()
+        response = view(request, *args, **kwargs)
+
+        # a response which set or depends on a cookie can't be shared
+        session_used = getattr(request, 'session', None) is not None and request.session.accessed
+        if response.status_code in (200, 304) and not session_used and not request.META.get('CSRF_COOKIE_USED'):
+            patch_cache_control(response, public=True, max_age=0, s_maxage=settings.PUBLIC_PAGE_SECONDS,
+                                stale_while_revalidate=settings.PUBLIC_PAGE_STALE_SECONDS)
+        else:
+            patch_cache_control(response, private=True)
+        return response
+    # TimezoneDefault doesn't load the session for a user's time zone
+    public_view.public_page = True
+    return public_view
+
+
+def private_fragment(view):
+    """ For views of the per-user parts of public pages, which browsers and CDNs mustn't keep. """
+    @wraps(view)
+    def fragment_view(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+    return fragment_view
@@ -0,0 +1,114 @@
+""" Smaller copies of uploaded images, so pages don't download the original to show a thumbnail.
+
+Each rendition is saved next to the original in default_storage, in JPEG and in WebP,
+named after the original and the rendition:
+
+    user_images/gig.jpg  ->  user_images/gig.thumb.jpg, user_images/gig.thumb.webp
+
+Renditions are made when a note photo or avatar is saved, and removed when it is replaced
+or deleted. Run python manage.py backfill_renditions to make them for existing images.
+"""
+
+import logging
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+
+# Renditions of each image field: name: (width, height, crop). Without crop the image is
+# scaled to fit inside width x height, with crop it's scaled and cut to fill it exactly.
+RENDITIONS = {
+    'photo': {
+        'thumb': (500, 500, False),   # shown 250 pixels wide, 500 for high density screens
+    },
+    'avatar': {
+        'thumb': (300, 300, True),    # shown at most 150 pixels square
+    },
+}
+
+# File extension: Pillow format and save options
+FORMATS = {
+    'jpg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+}
+
+
+def rendition_name(name, rendition, extension='jpg'):
+    """ Storage name of one rendition of the image stored as name. """
+    root, original_extension = os.path.splitext(name)
+    return f'{root}.{rendition}.{extension}'
+
+
+def rendition_names(name, field_name):
+    """ Storage names of every rendition of an image in this field. """
+    return [rendition_name(name, rendition, extension) for rendition in RENDITIONS[field_name] for extension in FORMATS]
+
+
+def rendition_url(field_file, rendition, extension='jpg'):
+    """ URL of a rendition of an image field's file, or '' if the field is empty. """
+    if not field_file:
+        return ''
+    return default_storage.url(rendition_name(field_file.name, rendition, extension))
+
+
+def render(image, width, height, crop):
+    """ Resize a Pillow image, turned the right way up according to its EXIF data. """
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'L'):
+        # JPEG has no transparency, put transparent images on white
+        background = Image.new('RGB', image.size, 'white')
+        rgba = image.convert('RGBA')
+        background.paste(rgba, mask=rgba.getchannel('A'))
+        image = background
+    if crop:
+        return ImageOps.fit(image, (width, height), Image.LANCZOS)
+    image = image.copy()
+    image.thumbnail((width, height), Image.LANCZOS)
+    return image
+
+
+def create_renditions(name, field_name, force=False):
+    """ Save every rendition of the image stored as name.
+
+    Args:
+        name ([str]): storage name of the original image
+        field_name ([str]): 'photo' or 'avatar', a key of RENDITIONS
+        force ([bool]): replace renditions which already exist
+
+    Returns:
+        [list]: names of the renditions saved. Empty if the image couldn't be read, which is logged, not raised.
+    """
+    specs = RENDITIONS[field_name]
+    if not force and all(default_storage.exists(rendition) for rendition in rendition_names(name, field_name)):
+        return []
+
+    try:
+        with default_storage.open(name, 'rb') as original:
+            image = Image.open(original)
+            image.load()
+    except (OSError, ValueError):
+        logging.exception(f'Unable to make renditions of {name}')
+        return []
+
+    saved = []
+    for rendition, (width, height, crop) in specs.items():
+        resized = render(image, width, height, crop)
+        for extension, (image_format, options) in FORMATS.items():
+            buffer = BytesIO()
+            resized.save(buffer, image_format, **options)
+            target = rendition_name(name, rendition, extension)
+            if default_storage.exists(target):
+                # storage.save would pick a new name rather than overwrite
+                default_storage.delete(target)
+            saved.append(default_storage.save(target, ContentFile(buffer.getvalue())))
+    return saved
+
+
+def delete_renditions(name, field_name):
+    """ Remove every rendition of the image stored as name. """
+    for rendition in rendition_names(name, field_name):
+        if default_storage.exists(rendition):
+            default_storage.delete(rendition)
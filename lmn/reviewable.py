@@ -0,0 +1,68 @@
+""" The shows a user can write a note about: past shows they haven't written one about yet.
+
+    page = reviewable_shows(request.user, cursor=request.GET.get('cursor'))
+    for show in page: ...
+
+Pages are found with one query each, by Show.objects.reviewable_by, and cached per user and cursor.
+The cache keys include the versions of shows and notes, so writing a note takes its show off the
+user's pages straight away. A show that has happened since a page was cached is added when the page
+expires, after REVIEWABLE_SHOWS_SECONDS.
+"""
+
+from .cache import cached
+from .models import Artist, Venue, Show, Note
+from .pagination import CursorPaginator, InvalidCursor
+
+
+REVIEWABLE_SHOWS_PER_PAGE = 20
+REVIEWABLE_SHOWS_SECONDS = 5 * 60
+
+
+class ShowPage:
+    """ A page of shows which can be cached, used like a CursorPage, e.g. by cursor_pagination.html. """
+
+    def __init__(self, shows, next_cursor, previous_cursor):
+        self.shows = shows
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.shows)
+
+    def __len__(self):
+        return len(self.shows)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def reviewable_shows(user, cursor=None, per_page=REVIEWABLE_SHOWS_PER_PAGE):
+    """ A page of the past shows user hasn't written a note about, most recent first.
+
+    Args:
+        cursor ([str]): from the previous page's next_cursor or the next page's previous_cursor,
+            None or an unreadable one for the first page
+
+    Returns:
+        [ShowPage]: the shows, with their artist and venue
+    """
+    paginator = CursorPaginator(Show.objects.reviewable_by(user), per_page, ('-show_date', '-pk'))
+    if cursor:
+        try:
+            paginator.decode_cursor(cursor)
+        except InvalidCursor:
+            cursor = None
+
+    def page():
+        # the rows, not the CursorPage, are cached, since pickling its queryset would fetch every row
+        rows = paginator.page(cursor)
+        return ShowPage(list(rows), rows.next_cursor, rows.previous_cursor)
+
+    return cached(f'reviewable_shows:{user.pk}:{cursor or ""}:{per_page}', [Show, Artist, Venue, Note], page,
+                  timeout=REVIEWABLE_SHOWS_SECONDS)
@@ -0,0 +1,232 @@
+""" Ranked text search for artists, venues and notes.
+
+The backend depends on the database in use:
+
+SQLite (local development) - each searchable model has an FTS5 table using the trigram
+tokenizer, so any part of a name can be found, not only whole words. The FTS row's rowid
+is the object's pk. The tables are kept up to date by the post_save and post_delete
+signals connected in LmnConfig.ready().
+
+PostgreSQL (production) - the model tables are searched directly. GIN trigram indexes on
+artist and venue names serve the case-insensitive substring match, and a GIN index on the
+note title and text tsvector serves full text search of notes. Postgres keeps the indexes
+up to date itself.
+
+The tables and indexes are created by migration 0008_search_index. Run
+python manage.py rebuild_search_index after loading rows without signals, e.g. bulk_create.
+"""
+
+import logging
+
+from django.db import connections, OperationalError
+from django.db.models import Case, When, IntegerField, Q
+
+from .models import Artist, Venue, Note
+
+
+# Fields searched for each model, most important first
+SEARCH_FIELDS = {
+    Artist: ('name',),
+    Venue: ('name',),
+    Note: ('title', 'text'),
+}
+
+# Order used when results can't be ranked
+UNRANKED_ORDER = {
+    Artist: ('name',),
+    Venue: ('name',),
+    Note: ('-posted_date', '-pk'),
+}
+
+# SQLite searches return at most this many of the best matches
+MAX_RESULTS = 500
+
+
+def search(queryset, term):
+    """ Objects in queryset matching the search term, best match first.
+
+    Args:
+        queryset ([QuerySet]): Artists, Venues or Notes to search
+        term ([str]): text typed by the user
+    """
+    term = term.strip()
+    if not term:
+        return queryset.none()
+    return backend_for(queryset.db).search(queryset, term)
+
+
+def backend_for(alias):
+    """ The search backend for a database alias. """
+    vendor = connections[alias].vendor
+    if vendor == 'sqlite':
+        return SQLiteSearchBackend(alias)
+    if vendor == 'postgresql':
+        return PostgresSearchBackend(alias)
+    return SearchBackend(alias)
+
+
+def ranked(queryset, ids):
+    """ Filter queryset to these ids, in the same order. """
+    if not ids:
+        return queryset.none()
+    order = Case(*[When(pk=pk, then=position) for position, pk in enumerate(ids)], output_field=IntegerField())
+    return queryset.filter(pk__in=ids).order_by(order)
+
+
+class SearchBackend:
+    """ Case-insensitive substring search with no index. Used by databases without a dedicated backend. """
+
+    def __init__(self, alias):
+        self.alias = alias
+
+    def search(self, queryset, term):
+        model = queryset.model
+        matches = Q()
+        for field in SEARCH_FIELDS[model]:
+            matches |= Q(**{f'{field}__icontains': term})
+        return queryset.filter(matches).order_by(*UNRANKED_ORDER[model])
+
+    def index(self, instance):
+        """ Add or update one object in the search index. """
+
+    def index_many(self, model, pks):
+        """ Add or update many objects of one model in the search index. """
+
+    def remove(self, instance):
+        """ Remove one object from the search index. """
+
+    def rebuild(self, model):
+        """ Re-index every object of this model. """
+
+
+class SQLiteSearchBackend(SearchBackend):
+    """ FTS5 trigram tables, ranked with bm25. """
+
+    # the trigram tokenizer can't match terms shorter than one trigram
+    min_length = 3
+
+    # whether the tables exist, by database file, so sqlite_master is only checked once
+    _available = {}
+
+    @staticmethod
+    def table(model):
+        return f'{model._meta.db_table}_fts'
+
+    def available(self):
+        """ Check the FTS tables exist - they won't if SQLite was built without FTS5. """
+        connection = connections[self.alias]
+        database = connection.settings_dict['NAME']
+        if database not in self._available:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [self.table(Artist)])
+                SQLiteSearchBackend._available[database] = cursor.fetchone() is not None
+            if not self._available[database]:
+                logging.warning('SQLite FTS5 search tables missing, searching with LIKE instead')
+        return self._available[database]
+
+    def search(self, queryset, term):
+        if len(term) < self.min_length or not self.available():
+            return super().search(queryset, term)
+
+        table = self.table(queryset.model)
+        # a quoted phrase, so the user's text is never parsed as FTS5 query syntax
+        phrase = '"' + term.replace('"', '""') + '"'
+        # bm25 weights, the first field searched counts double
+        weights = ', '.join(['2.0'] + ['1.0'] * (len(SEARCH_FIELDS[queryset.model]) - 1))
+        with connections[self.alias].cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {table} WHERE {table} MATCH %s ORDER BY bm25({table}, {weights}) LIMIT %s',
+                [phrase, MAX_RESULTS]
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        return ranked(queryset, ids)
+
+    def index(self, instance):
+        if not self.available():
+            return
+        model = type(instance)
+        table = self.table(model)
+        fields = SEARCH_FIELDS[model]
+        values = [getattr(instance, field) for field in fields]
+        with connections[self.alias].cursor() as cursor:
+            cursor.execute(f'DELETE FROM {table} WHERE rowid = %s', [instance.pk])
+            cursor.execute(
+                f'INSERT INTO {table} (rowid, {", ".join(fields)}) VALUES (%s, {", ".join(["%s"] * len(fields))})',
+                [instance.pk] + values
+            )
+
+    def index_many(self, model, pks):
+        if not pks or not self.available():
+            return
+        table = self.table(model)
+        fields = ', '.join(SEARCH_FIELDS[model])
+        size = connections[self.alias].features.max_query_params
+        with connections[self.alias].cursor() as cursor:
+            for start in range(0, len(pks), size):
+                chunk = pks[start:start + size]
+                placeholders = ', '.join(['%s'] * len(chunk))
+                cursor.execute(f'DELETE FROM {table} WHERE rowid IN ({placeholders})', chunk)
+                cursor.execute(
+                    f'INSERT INTO {table} (rowid, {fields}) '
+                    f'SELECT id, {fields} FROM {model._meta.db_table} WHERE id IN ({placeholders})',
+                    chunk
+                )
+
+    def remove(self, instance):
+        if not self.available():
+            return
+        with connections[self.alias].cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table(type(instance))} WHERE rowid = %s', [instance.pk])
+
+    def rebuild(self, model):
+        if not self.available():
+            return
+        table = self.table(model)
+        fields = ', '.join(SEARCH_FIELDS[model])
+        with connections[self.alias].cursor() as cursor:
+            cursor.execute(f'DELETE FROM {table}')
+            cursor.execute(f'INSERT INTO {table} (rowid, {fields}) SELECT id, {fields} FROM {model._meta.db_table}')
+
+
+class PostgresSearchBackend(SearchBackend):
+    """ pg_trgm similarity for artists and venues, tsvector full text search for notes.
+
+    The expressions built here must stay identical to the ones in migration 0008_search_index,
+    or Postgres won't use the indexes.
+    """
+
+    def search(self, queryset, term):
+        # imported here because it imports psycopg2, which is only needed with Postgres
+        from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramSimilarity
+
+        model = queryset.model
+        fields = SEARCH_FIELDS[model]
+        if model is Note:
+            vector = SearchVector(*fields, config='english')
+            query = SearchQuery(term, config='english')
+            return queryset.annotate(search=vector, rank=SearchRank(vector, query)) \
+                .filter(search=query) \
+                .order_by('-rank', *UNRANKED_ORDER[model])
+
+        # icontains is served by the GIN trigram index on UPPER(name)
+        return super().search(queryset, term) \
+            .annotate(similarity=TrigramSimilarity(fields[0], term)) \
+            .order_by('-similarity', *UNRANKED_ORDER[model])
+
+
+def update_search_index(sender, instance, using, update_fields=None, **kwargs):
+    """ post_save receiver, re-index the saved object if a searched field may have changed. """
+    if update_fields and not set(update_fields) & set(SEARCH_FIELDS[sender]):
+        return
+    try:
+        backend_for(using).index(instance)
+    except OperationalError:
+        logging.exception(f'Unable to update search index for {instance!r}')
+
+
+def remove_from_search_index(sender, instance, using, **kwargs):
+    """ post_delete receiver. """
+    try:
+        backend_for(using).remove(instance)
+    except OperationalError:
+        logging.exception(f'Unable to remove {instance!r} from search index')
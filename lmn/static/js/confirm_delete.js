@@ -6,23 +6,24 @@
 // never happens.  If the click event doesn't prevent the event propagating,
 // the form will be submitted as usual.
 
-var deleteButtons = document.querySelectorAll('.delete');
+// The buttons may be added after this script runs, by user_fragments.js, so clicks are
+// checked for as they reach the document, rather than listened for on each button.
 
-deleteButtons.forEach(function(button){
+document.addEventListener('click', function(ev){
 
-  button.addEventListener('click', function(ev){
+  if (!ev.target.closest('.delete')) {
+    return;
+  }
 
-    // Show a confirm dialog
-    var okToDelete = confirm("Delete note - are you sure?");
+  // Show a confirm dialog
+  var okToDelete = confirm("Delete note - are you sure?");
 
-    // If user presses no, prevent the form submit
-    if (!okToDelete) {
-      ev.preventDefault();  // Prevent the click event propagating
-    }
+  // If user presses no, prevent the form submit
+  if (!okToDelete) {
+    ev.preventDefault();  // Prevent the click event propagating
+  }
 
-    // Otherwise, the web page will continue processing the event, 
-    // and send the delete request to the server.
+  // Otherwise, the web page will continue processing the event, 
+  // and send the delete request to the server.
 
-
-  })
-}); 
\ No newline at end of file
+});
@@ -0,0 +1,23 @@
+// Thumbnails are made by a background task, so one may not exist yet just after an upload.
+// If a thumbnail doesn't load, show the original image, which is in the img's data-original.
+
+var thumbnails = document.querySelectorAll('img[data-original]');
+
+thumbnails.forEach(function(img){
+
+  function showOriginal() {
+    img.onerror = null;
+    // remove the WebP <source>, otherwise the browser keeps choosing it over the img src
+    img.parentNode.querySelectorAll('source').forEach(function(source){
+      source.remove();
+    });
+    img.src = img.dataset.original;
+  }
+
+  // the thumbnail may have failed before this script ran
+  if (img.complete && img.naturalWidth === 0) {
+    showOriginal();
+  } else {
+    img.onerror = showOriginal;
+  }
+});
@@ -0,0 +1,19 @@
+// Public pages are the same for everyone, so CDNs can cache them - see lmn/public.py.
+// The parts which depend on who is logged in are placeholders with a data-fragment attribute,
+// the URL of the part for the current user, which replaces the placeholder's content.
+
+var fragments = document.querySelectorAll('[data-fragment]');
+
+fragments.forEach(function(element){
+
+  fetch(element.dataset.fragment, {credentials: 'same-origin'})
+    .then(function(response){
+      return response.ok ? response.text() : null;
+    })
+    .then(function(html){
+      // if the request fails, the placeholder's content, for a visitor who isn't logged in, stays
+      if (html !== null) {
+        element.innerHTML = html;
+      }
+    });
+});
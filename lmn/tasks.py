@@ -0,0 +1,156 @@
+""" A queue of slow work, stored in the database and run outside of requests by the run_tasks worker.
+
+In production user images are in Google Cloud Storage, so every exists, delete or save of a file
+is an HTTP request. Views queue that work instead of waiting for it:
+
+    enqueue('delete_image', name=note.photo.name, field_name='photo')
+
+enqueue saves a Task row in the same transaction as the change which needs it, so a task is
+never run for a change which was rolled back, and never lost for one which was committed.
+The worker runs tasks which are due, oldest first, and retries failed ones with exponential
+backoff, up to settings.TASK_MAX_ATTEMPTS times, after which they are kept as failed.
+
+By default settings.TASKS_EAGER runs tasks straight away instead, so no worker is needed.
+Set LMN_TASKS_EAGER=0 where python manage.py run_tasks is running, e.g. in production once a
+worker is deployed, to use the queue.
+
+Task functions are registered with @task. Their arguments are stored as JSON, so pass names
+and ids, not model instances. A task may run more than once, so it must be safe to repeat.
+"""
+
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Task
+from .renditions import create_renditions, delete_renditions
+
+
+# Task name: function
+TASKS = {}
+
+
+def task(function):
+    """ Register a function so it can be queued by name. """
+    TASKS[function.__name__] = function
+    return function
+
+
+@task
+def make_renditions(name, field_name, force=False):
+    """ Make the renditions of an uploaded image, unless it's been deleted since. """
+    if default_storage.exists(name):
+        create_renditions(name, field_name, force=force)
+
+
+@task
+def delete_image(name, field_name):
+    """ Remove an image and its renditions from storage. """
+    if default_storage.exists(name):
+        default_storage.delete(name)
+    delete_renditions(name, field_name)
+
+
+def retry_delay(attempts):
+    """ Seconds to wait before the next attempt of a task which has failed this many times. """
+    return min(settings.TASK_RETRY_SECONDS * 2 ** (attempts - 1), 60 * 60)
+
+
+def enqueue(task_name, **arguments):
+    """ Queue a call of the task function called task_name.
+
+    With settings.TASKS_EAGER the task runs now, and is only queued, to be retried, if it fails.
+
+    Args:
+        task_name ([str]): name of a function registered with @task
+        arguments: keyword arguments for the function, which must be JSON serializable
+
+    Returns:
+        [Task]: the queued task, or None if it was run eagerly
+    """
+    if task_name not in TASKS:
+        raise ValueError(f'No task called {task_name}')
+
+    if settings.TASKS_EAGER:
+        try:
+            TASKS[task_name](**arguments)
+            return None
+        except Exception:
+            logging.exception(f'Task {task_name} failed, queueing it to retry')
+            return Task.objects.create(name=task_name, arguments=arguments, attempts=1,
+                                       last_error=traceback.format_exc(),
+                                       run_after=timezone.now() + timedelta(seconds=retry_delay(1)))
+
+    return Task.objects.create(name=task_name, arguments=arguments)
+
+
+def claim():
+    """ Mark the oldest due task as running, and return it, or None if no tasks are due.
+
+    The status is changed with a conditional UPDATE, so when several workers try to claim
+    the same task only one of them gets it, on SQLite as well as Postgres.
+    """
+    now = timezone.now()
+    due = Task.objects.filter(status=Task.PENDING, run_after__lte=now).order_by('run_after', 'id')
+    for pk in due.values_list('pk', flat=True)[:10]:
+        claimed = Task.objects.filter(pk=pk, status=Task.PENDING) \
+            .update(status=Task.RUNNING, locked_at=now, attempts=F('attempts') + 1)
+        if claimed:
+            return Task.objects.get(pk=pk)
+    return None
+
+
+def run(queued):
+    """ Run a claimed task. It's deleted if it succeeds, otherwise rescheduled, or marked failed.
+
+    Returns:
+        [bool]: True if the task succeeded
+    """
+    try:
+        if queued.name not in TASKS:
+            # e.g. queued by an older version of the code, retrying won't help
+            queued.attempts = settings.TASK_MAX_ATTEMPTS
+            raise LookupError(f'No task called {queued.name}')
+        TASKS[queued.name](**queued.arguments)
+    except Exception:
+        logging.exception(f'Task {queued} failed')
+        queued.last_error = traceback.format_exc()
+        queued.locked_at = None
+        if queued.attempts >= settings.TASK_MAX_ATTEMPTS:
+            queued.status = Task.FAILED
+        else:
+            queued.status = Task.PENDING
+            queued.run_after = timezone.now() + timedelta(seconds=retry_delay(queued.attempts))
+        queued.save()
+        return False
+    queued.delete()
+    return True
+
+
+def run_pending(limit=None):
+    """ Run due tasks until there are none left, or limit have been run. Returns the number run. """
+    count = 0
+    while limit is None or count < limit:
+        queued = claim()
+        if queued is None:
+            break
+        run(queued)
+        count += 1
+    return count
+
+
+def requeue_stale():
+    """ Make tasks running for longer than settings.TASK_LOCK_SECONDS pending again.
+
+    A task is left running if its worker was stopped part way through it.
+
+    Returns:
+        [int]: number of tasks requeued
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.TASK_LOCK_SECONDS)
+    return Task.objects.filter(status=Task.RUNNING, locked_at__lt=cutoff).update(status=Task.PENDING, locked_at=None)
@@ -0,0 +1,59 @@
+""" Make rows for tests, with every required field filled in, e.g. in setUpTestData
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.note = make_note(title='Thunderstruck')   # with a new show, artist, venue and user
+
+Rows are made once for a TestCase class in setUpTestData, and rolled back after each test, which is
+quicker than making them in setUp for every test. Names are numbered so they're unique.
+"""
+
+import datetime
+import itertools
+
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from lmn.models import Artist, Venue, Show, Note
+
+
+_numbers = itertools.count(1)
+
+
+def make_user(**fields):
+    number = next(_numbers)
+    fields.setdefault('username', f'user{number}')
+    fields.setdefault('email', f'{fields["username"]}@example.com')
+    return User.objects.create(**fields)
+
+
+def make_artist(**fields):
+    fields.setdefault('name', f'Artist {next(_numbers)}')
+    return Artist.objects.create(**fields)
+
+
+def make_venue(**fields):
+    fields.setdefault('name', f'Venue {next(_numbers)}')
+    fields.setdefault('city', 'Minneapolis')
+    fields.setdefault('state', 'MN')
+    return Venue.objects.create(**fields)
+
+
+def make_show(days_ago=1, **fields):
+    """ A show days_ago days ago, or in the future if it's negative. """
+    if 'artist' not in fields and 'artist_id' not in fields:
+        fields['artist'] = make_artist()
+    if 'venue' not in fields and 'venue_id' not in fields:
+        fields['venue'] = make_venue()
+    fields.setdefault('show_date', timezone.now() - datetime.timedelta(days=days_ago))
+    return Show.objects.create(**fields)
+
+
+def make_note(**fields):
+    if 'show' not in fields and 'show_id' not in fields:
+        fields['show'] = make_show()
+    if 'user' not in fields and 'user_id' not in fields:
+        fields['user'] = make_user()
+    fields.setdefault('title', 'Great show')
+    fields.setdefault('text', 'Loud, and the encore was even better.')
+    return Note.objects.create(**fields)
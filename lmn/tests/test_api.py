@@ -0,0 +1,113 @@
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+from django.core.cache import cache
+
+from lmn.models import Artist, Show, Note
+from lmn.counters import reconcile_note_counts
+
+import json
+
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'lmn-tests'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class TestApi(TestCase):
+
+    fixtures = ['testing_users', 'testing_artists', 'testing_venues', 'testing_shows', 'testing_notes']
+
+    def setUp(self):
+        cache.clear()
+        reconcile_note_counts()
+
+    def get(self, url, status=200, **headers):
+        response = self.client.get(url, **headers)
+        self.assertEqual(response.status_code, status)
+        if response.streaming:
+            return json.loads(b''.join(response.streaming_content))
+        return json.loads(response.content) if response.content else None
+
+    def list_url(self, resource_name, query=''):
+        return reverse('api_list', kwargs={'resource_name': resource_name}) + query
+
+    def detail_url(self, resource_name, pk, query=''):
+        return reverse('api_detail', kwargs={'resource_name': resource_name, 'pk': pk}) + query
+
+    def test_artist_list_in_name_order(self):
+        data = self.get(self.list_url('artists'))
+        names = list(Artist.objects.order_by('name').values_list('name', flat=True))
+        self.assertEqual([artist['name'] for artist in data['data']], names)
+        self.assertEqual(set(data['data'][0]), {'id', 'name', 'note_count'})
+        self.assertIsNone(data['next'])
+
+    def test_show_detail(self):
+        show = Show.objects.get(pk=1)
+        data = self.get(self.detail_url('shows', 1))['data']
+        self.assertEqual(data, {'id': 1, 'show_date': show.show_date.isoformat().replace('+00:00', 'Z'),
+                                'artist': show.artist_id, 'venue': show.venue_id, 'note_count': show.note_count})
+
+    def test_fields_read_only_those_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            data = self.get(self.list_url('notes', '?fields=title'))
+        self.assertEqual(set(data['data'][0]), {'id', 'title'})
+        sql = queries.captured_queries[0]['sql']
+        self.assertIn('"lmn_note"."title"', sql)
+        self.assertNotIn('"lmn_note"."text"', sql)
+
+    def test_include_forward_relations_in_one_query(self):
+        with self.assertNumQueries(1):
+            data = self.get(self.list_url('notes', '?include=show.artist,show.venue&fields[venues]=name'))
+        note = Note.objects.select_related('show__artist', 'show__venue').get(pk=data['data'][0]['id'])
+        show = data['data'][0]['show']
+        self.assertEqual(show['artist']['name'], note.show.artist.name)
+        self.assertEqual(show['venue'], {'id': note.show.venue_id, 'name': note.show.venue.name})
+
+    def test_include_notes_of_shows_in_one_more_query(self):
+        with self.assertNumQueries(2):
+            data = self.get(self.list_url('shows', '?include=notes&fields[notes]=title'))
+        for show in data['data']:
+            titles = Note.objects.filter(show=show['id']).order_by('-posted_date', '-pk').values_list('title', flat=True)
+            self.assertEqual([note['title'] for note in show['notes']], list(titles))
+
+    def test_cursor_pages_through_list(self):
+        seen = []
+        url = self.list_url('notes', '?page_size=2')
+        while url:
+            data = self.get(url)
+            self.assertLessEqual(len(data['data']), 2)
+            seen.extend(note['id'] for note in data['data'])
+            url = data['next']
+        self.assertEqual(seen, list(Note.objects.order_by('-posted_date', '-pk').values_list('pk', flat=True)))
+
+    def test_filter_by_foreign_key(self):
+        data = self.get(self.list_url('shows', '?venue=2'))
+        self.assertEqual({show['id'] for show in data['data']},
+                         set(Show.objects.filter(venue=2).values_list('pk', flat=True)))
+
+    def test_bad_requests(self):
+        for query in ['?fields=password', '?include=user', '?include=notes.show', '?venue=x',
+                      '?page_size=1000', '?cursor=nonsense']:
+            with self.subTest(query=query):
+                self.assertIn('error', self.get(self.list_url('shows', query), status=400))
+
+    def test_not_found(self):
+        self.get(self.list_url('users'), status=404)
+        self.get(self.detail_url('shows', 1000), status=404)
+
+    def test_not_modified_without_queries(self):
+        url = self.list_url('artists')
+        response = self.client.get(url)
+        self.assertTrue(response.has_header('Last-Modified'))
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_note_changes_etag_of_artists(self):
+        url = self.list_url('artists')
+        etag = self.client.get(url)['ETag']
+        Note.objects.create(show_id=3, user_id=3, title='Great', text='Loud')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
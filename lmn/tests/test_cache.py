@@ -0,0 +1,173 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.contrib.auth.models import User
+
+from lmn.models import Artist, Venue, Show, Note
+from lmn.cache import cache_version, bump_versions, cached, version_key
+from get_initial_data.import_shows import import_shows
+
+import datetime
+from django.utils import timezone
+
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'lmn-tests'}}
+
+SHARED_CACHE = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'lmn-tests'},
+    'shared': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'lmn_test_shared_cache'},
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class TestCacheVersions(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_version_changes_when_model_bumped(self):
+        version = cache_version(Artist, Venue)
+        self.assertEqual(cache_version(Artist, Venue), version)
+        bump_versions(Venue)
+        self.assertNotEqual(cache_version(Artist, Venue), version)
+
+    def test_bump_with_no_version_in_cache(self):
+        bump_versions(Artist)
+        self.assertIsNotNone(cache.get(version_key(Artist)))
+
+    def test_version_lost_from_cache_is_not_reused(self):
+        version = cache_version(Artist)
+        cache.delete(version_key(Artist))
+        self.assertNotEqual(cache_version(Artist), version)
+
+    def test_save_and_delete_bump_version(self):
+        version = cache_version(Artist)
+        artist = Artist.objects.create(name='Sleater-Kinney')
+        saved_version = cache_version(Artist)
+        self.assertNotEqual(saved_version, version)
+        artist.delete()
+        self.assertNotEqual(cache_version(Artist), saved_version)
+
+    def test_cached_value_made_once(self):
+        calls = []
+        def make():
+            calls.append(1)
+            return 'value'
+        self.assertEqual(cached('thing', [Artist], make), 'value')
+        self.assertEqual(cached('thing', [Artist], make), 'value')
+        self.assertEqual(len(calls), 1)
+        bump_versions(Artist)
+        cached('thing', [Artist], make)
+        self.assertEqual(len(calls), 2)
+
+    def test_import_shows_bumps_versions(self):
+        versions = [cache_version(model) for model in (Artist, Venue, Show)]
+        import_shows([{
+            'artist_name': 'Low', 'venue_name': 'Turf Club', 'venue_city': 'St. Paul', 'venue_state': 'Minnesota',
+            'datetime': timezone.now() - datetime.timedelta(days=1),
+        }])
+        for model, version in zip((Artist, Venue, Show), versions):
+            self.assertNotEqual(cache_version(model), version)
+
+
+@override_settings(CACHES=SHARED_CACHE)
+class TestSharedVersions(TestCase):
+
+    def setUp(self):
+        call_command('createcachetable', verbosity=0)
+        cache.clear()
+
+    def test_versions_kept_in_shared_cache(self):
+        version = cache_version(Artist)
+        bump_versions(Artist)
+        self.assertIsNone(cache.get(version_key(Artist)))
+        self.assertIsNotNone(caches['shared'].get(version_key(Artist)))
+        self.assertNotEqual(cache_version(Artist), version)
+
+    def test_change_on_one_server_makes_pages_stale_on_others(self):
+        cached('thing', [Artist], lambda: 'old')
+        # another server, with its own default cache, saves an artist
+        with override_settings(CACHES={**SHARED_CACHE, 'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'lmn-tests-other'}}):
+            Artist.objects.create(name='Sleater-Kinney')
+        self.assertEqual(cached('thing', [Artist], lambda: 'new'), 'new')
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class TestCachedPages(TestCase):
+
+    fixtures = ['testing_users', 'testing_artists', 'testing_venues', 'testing_shows', 'testing_notes']
+
+    def setUp(self):
+        cache.clear()
+
+    def test_artist_list_cached(self):
+        self.client.get(reverse('artist_list'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('artist_list'))
+        self.assertContains(response, 'REM')
+
+    def test_artist_list_shows_new_artist(self):
+        self.client.get(reverse('artist_list'))
+        Artist.objects.create(name='Bikini Kill')
+        self.assertContains(self.client.get(reverse('artist_list')), 'Bikini Kill')
+
+    def test_artist_list_pages_cached_separately(self):
+        for n in range(12):
+            Artist.objects.create(name=f'Zz band {n:02}')
+        first_page = self.client.get(reverse('artist_list'))
+        second_page = self.client.get(reverse('artist_list'), {'cursor': first_page.context['artists'].next_cursor})
+        self.assertNotContains(second_page, 'ACDC')
+        self.assertContains(second_page, 'Zz band 11')
+
+    def test_artist_search_results_cached_by_term(self):
+        self.assertContains(self.client.get(reverse('artist_list'), {'search_name': 'REM'}), 'REM')
+        self.assertNotContains(self.client.get(reverse('artist_list'), {'search_name': 'ACDC'}), '>REM<')
+
+    def test_venue_list_shows_renamed_venue(self):
+        self.client.get(reverse('venue_list'))
+        venue = Venue.objects.get(pk=1)
+        venue.name = 'The Palace'
+        venue.save()
+        response = self.client.get(reverse('venue_list'))
+        self.assertContains(response, 'The Palace')
+
+    def test_artist_detail_cached(self):
+        url = reverse('artist_detail', kwargs={'artist_pk': 1})
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertContains(response, 'REM')
+
+    def test_artist_detail_shows_new_name(self):
+        url = reverse('artist_detail', kwargs={'artist_pk': 1})
+        self.client.get(url)
+        Artist.objects.filter(pk=1).update(name='R.E.M.')   # update() sends no signals
+        bump_versions(Artist)
+        self.assertContains(self.client.get(url), 'R.E.M.')
+
+    def test_venue_detail_not_found_not_cached(self):
+        url = reverse('venue_detail', kwargs={'venue_pk': 200})
+        self.assertEqual(self.client.get(url).status_code, 404)
+        Venue.objects.create(pk=200, name='Mortimer\'s', city='Minneapolis', state='MN')
+        self.assertContains(self.client.get(url), 'Mortimer')
+
+    def test_notes_for_show_cached(self):
+        url = reverse('notes_for_show', kwargs={'show_pk': 1})
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+    def test_notes_for_show_includes_new_note(self):
+        url = reverse('notes_for_show', kwargs={'show_pk': 3})
+        self.client.get(url)
+        Note.objects.create(show=Show.objects.get(pk=3), user=User.objects.get(pk=2), title='Encore!', text='Two of them')
+        self.assertContains(self.client.get(url), 'Encore!')
+
+    def test_notes_for_show_drops_deleted_note(self):
+        url = reverse('notes_for_show', kwargs={'show_pk': 1})
+        note = Note.objects.filter(show=1).first()
+        self.assertContains(self.client.get(url), note.title)
+        note.delete()
+        self.assertNotContains(self.client.get(url), f'note_{note.pk}"')
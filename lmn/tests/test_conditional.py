@@ -0,0 +1,139 @@
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth.models import User
+
+from lmn.conditional import VIEWER_SESSION_KEY
+from lmn.models import Note, Artist, Venue, Profile
+from lmn.timezones import SESSION_KEY as TIME_ZONE_SESSION_KEY
+
+
+class TestConditionalPages(TestCase):
+
+    fixtures = ['testing_users', 'testing_artists', 'testing_venues', 'testing_shows', 'testing_notes']
+
+    pages = [
+        ('note_detail', {'note_pk': 1}),
+        ('artist_detail', {'artist_pk': 1}),
+        ('venue_detail', {'venue_pk': 1}),
+        ('user_profile', {'user_pk': 1}),
+    ]
+
+    def assertNotModified(self, url, response, **headers):
+        """ Requesting url again, with the validators from response, gets a 304 with at most one query. """
+        with self.assertNumQueries(1):
+            again = self.client.get(url, **headers)
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.content, b'')
+
+    def assertModified(self, url, etag):
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_unchanged_pages_not_modified(self):
+        for name, kwargs in self.pages:
+            with self.subTest(page=name):
+                url = reverse(name, kwargs=kwargs)
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.has_header('Last-Modified'))
+                self.assertNotModified(url, response, HTTP_IF_NONE_MATCH=response['ETag'])
+                self.assertNotModified(url, response, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+
+    def test_edited_note_modified(self):
+        url = reverse('note_detail', kwargs={'note_pk': 1})
+        etag = self.client.get(url)['ETag']
+        note = Note.objects.get(pk=1)
+        note.text = 'Even better on reflection'
+        note.save()
+        self.assertModified(url, etag)
+
+    def test_renamed_artist_modifies_its_notes(self):
+        urls = [reverse('note_detail', kwargs={'note_pk': 1}), reverse('artist_detail', kwargs={'artist_pk': 1})]
+        etags = [self.client.get(url)['ETag'] for url in urls]
+        artist = Artist.objects.get(pk=1)
+        artist.name = 'The Renamed'
+        artist.save()
+        for url, etag in zip(urls, etags):
+            self.assertModified(url, etag)
+
+    def test_saving_unchanged_venue_not_modified(self):
+        url = reverse('venue_detail', kwargs={'venue_pk': 1})
+        response = self.client.get(url)
+        Venue.objects.get(pk=1).save()
+        self.assertNotModified(url, response, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_deleted_note_modifies_profile(self):
+        url = reverse('user_profile', kwargs={'user_pk': 1})
+        etag = self.client.get(url)['ETag']
+        Note.objects.filter(user=1).first().delete()
+        self.assertModified(url, etag)
+
+    def test_new_favorite_modifies_profile(self):
+        url = reverse('user_profile', kwargs={'user_pk': 1})
+        etag = self.client.get(url)['ETag']
+        profile = Profile.objects.get(pk=1)
+        profile.favorite_venue = Venue.objects.get(pk=2)
+        profile.save()
+        self.assertModified(url, etag)
+
+    def test_logged_in_user_gets_own_copy(self):
+        url = reverse('user_profile', kwargs={'user_pk': 1})
+        etag = self.client.get(url)['ETag']
+        self.client.force_login(User.objects.get(pk=1))
+        self.assertModified(url, etag)
+
+    def test_logged_in_user_not_modified(self):
+        self.client.force_login(User.objects.get(pk=1))
+        url = reverse('user_profile', kwargs={'user_pk': 2})
+        response = self.client.get(url)
+        # the session, then when the profile last changed
+        with self.assertNumQueries(2):
+            again = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, 304)
+
+    def test_viewers_name_and_profile_modify_other_profiles(self):
+        self.client.force_login(User.objects.get(pk=1))
+        url = reverse('user_profile', kwargs={'user_pk': 2})
+        etag = self.client.get(url)['ETag']
+        User.objects.filter(pk=1).update(username='renamed')
+        self.client.force_login(User.objects.get(pk=1))
+        self.assertModified(url, etag)
+
+        etag = self.client.get(url)['ETag']
+        self.client.post(reverse('my_user_profile'), {'first_name': 'Alice', 'last_name': 'Smith',
+                                                      'favorite_artist': 2, 'favorite_venue': 1}, follow=True)
+        self.assertModified(url, etag)
+
+    def test_viewer_read_once_for_sessions_without_it(self):
+        self.client.force_login(User.objects.get(pk=1))
+        url = reverse('user_profile', kwargs={'user_pk': 2})
+        etag = self.client.get(url)['ETag']
+        session = self.client.session
+        del session[VIEWER_SESSION_KEY]
+        session.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertIn(VIEWER_SESSION_KEY, self.client.session)
+
+    def test_viewers_time_zone_modifies_profiles(self):
+        self.client.force_login(User.objects.get(pk=1))
+        url = reverse('user_profile', kwargs={'user_pk': 2})
+        etag = self.client.get(url)['ETag']
+        session = self.client.session
+        session[TIME_ZONE_SESSION_KEY] = 'Europe/Paris'
+        session.save()
+        self.assertModified(url, etag)
+
+    def test_profile_revalidated_by_browser(self):
+        self.client.force_login(User.objects.get(pk=1))
+        url = reverse('user_profile', kwargs={'user_pk': 2})
+        response = self.client.get(url)
+        again = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, 304)
+        for checked in (response, again):
+            cache_control = {directive.strip() for directive in checked['Cache-Control'].split(',')}
+            self.assertEqual(cache_control, {'private', 'no-cache'})
+
+    def test_missing_note_not_found(self):
+        response = self.client.get(reverse('note_detail', kwargs={'note_pk': 1000}))
+        self.assertEqual(response.status_code, 404)
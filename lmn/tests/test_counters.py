@@ -0,0 +1,103 @@
+from django.test import TestCase
+from django.urls import reverse
+from django.core.management import call_command
+from django.contrib.auth.models import User
+
+from lmn.models import Note, Show, Artist, Venue, Profile
+from lmn.counters import reconcile_note_counts, count_note
+
+from io import StringIO
+
+
+class TestNoteCounts(TestCase):
+
+    fixtures = ['testing_users', 'testing_artists', 'testing_venues', 'testing_shows', 'testing_notes']
+
+    @classmethod
+    def setUpTestData(cls):
+        # notes loaded from fixtures aren't counted
+        reconcile_note_counts()
+
+    def counts(self, show_pk=3, user_pk=2):
+        show = Show.objects.select_related('artist', 'venue').get(pk=show_pk)
+        return (show.note_count, show.artist.note_count, show.venue.note_count,
+                Profile.objects.get(pk=user_pk).note_count)
+
+    def new_note(self, show_pk=3, user_pk=2):
+        return Note.objects.create(show_id=show_pk, user_id=user_pk, title='Great', text='Loud')
+
+    def test_fixture_counts_reconciled(self):
+        self.assertEqual(Show.objects.get(pk=1).note_count, Note.objects.filter(show=1).count())
+        self.assertEqual(Artist.objects.get(pk=1).note_count, Note.objects.filter(show__artist=1).count())
+        self.assertEqual(Venue.objects.get(pk=2).note_count, Note.objects.filter(show__venue=2).count())
+        self.assertEqual(Profile.objects.get(pk=1).note_count, Note.objects.filter(user=1).count())
+
+    def test_new_note_counted(self):
+        before = self.counts()
+        self.new_note()
+        self.assertEqual(self.counts(), tuple(count + 1 for count in before))
+
+    def test_deleted_note_uncounted(self):
+        note = self.new_note()
+        before = self.counts()
+        note.delete()
+        self.assertEqual(self.counts(), tuple(count - 1 for count in before))
+
+    def test_notes_deleted_with_user_uncounted(self):
+        self.new_note(user_pk=3)
+        before = self.counts(user_pk=2)[0]
+        User.objects.get(pk=3).delete()
+        self.assertEqual(Show.objects.get(pk=3).note_count, before - 1)
+
+    def test_moved_note_counted_for_new_show(self):
+        note = self.new_note(show_pk=3, user_pk=3)
+        before_old, before_new = Show.objects.get(pk=3).note_count, Show.objects.get(pk=2).note_count
+        note.show_id = 2
+        note.save()
+        self.assertEqual(Show.objects.get(pk=3).note_count, before_old - 1)
+        self.assertEqual(Show.objects.get(pk=2).note_count, before_new + 1)
+
+    def test_count_not_overwritten_by_saving_stale_show(self):
+        show = Show.objects.get(pk=3)
+        self.new_note()
+        show.save()
+        show.artist = Artist.objects.get(pk=1)
+        show.save()
+        self.assertEqual(Show.objects.get(pk=3).note_count, Note.objects.filter(show=3).count())
+
+    def test_count_never_negative(self):
+        Show.objects.filter(pk=3).update(note_count=0)
+        count_note(3, 2, -1)
+        self.assertEqual(Show.objects.get(pk=3).note_count, 0)
+
+    def test_reconcile_command_fixes_drift(self):
+        Show.objects.filter(pk=1).update(note_count=99)
+        Profile.objects.update(note_count=0)
+        out = StringIO()
+        call_command('reconcile_note_counts', stdout=out)
+        self.assertIn('Show: corrected 1 counts', out.getvalue())
+        self.assertIn('Artist: corrected 0 counts', out.getvalue())
+        self.assertEqual(Show.objects.get(pk=1).note_count, Note.objects.filter(show=1).count())
+        self.assertEqual(Profile.objects.get(pk=1).note_count, Note.objects.filter(user=1).count())
+
+    def test_reconcile_makes_one_query_per_table_when_counts_wrong(self):
+        Show.objects.update(note_count=50)
+        with self.assertNumQueries(4):
+            reconcile_note_counts()
+
+    def test_counts_shown_for_shows_at_venue(self):
+        response = self.client.get(reverse('artists_at_venue', kwargs={'venue_pk': 1}))
+        venue = Venue.objects.get(pk=1)
+        self.assertContains(response, f'<p id="venue-note-count">{venue.note_count} note')
+        self.assertContains(response, f'<p class="note-count">{Show.objects.get(pk=3).note_count} note')
+
+    def test_counts_shown_for_shows_of_artist(self):
+        response = self.client.get(reverse('venues_for_artist', kwargs={'artist_pk': 1}))
+        artist = Artist.objects.get(pk=1)
+        self.assertContains(response, f'<p id="artist-note-count">{artist.note_count} note')
+
+    def test_count_shown_on_profile(self):
+        self.new_note(user_pk=2)
+        count = Profile.objects.get(pk=2).note_count
+        response = self.client.get(reverse('user_profile', kwargs={'user_pk': 2}))
+        self.assertContains(response, f'<p id="note-count">{count} note')
@@ -0,0 +1,156 @@
+from django.test import TransactionTestCase, SimpleTestCase
+from django.db import connection, OperationalError
+
+from lmnop_project.postgres.base import ConnectionPool, ConnectionMetrics, DatabaseWrapper, BACKEND_OPTIONS
+
+import psycopg2
+import threading
+import time
+from unittest import skipUnless
+
+
+class PoolConnection:
+    # just enough of a psycopg2 connection for ConnectionPool
+    def __init__(self):
+        self.closed = 0
+        self.in_transaction = False
+        self.rolled_back = False
+
+    def get_transaction_status(self):
+        if self.in_transaction:
+            return psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+        return psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def rollback(self):
+        self.rolled_back = True
+        self.in_transaction = False
+
+    def close(self):
+        self.closed = 1
+
+
+class TestConnectionPool(SimpleTestCase):
+
+    def setUp(self):
+        self.opened = []
+        def connect():
+            self.opened.append(PoolConnection())
+            return self.opened[-1]
+        self.pool = ConnectionPool(2, connect)
+
+    def test_returned_connection_is_reused(self):
+        connection, idle = self.pool.get(timeout=1)
+        self.assertIsNone(idle)
+        self.pool.put(connection)
+        reused, idle = self.pool.get(timeout=1)
+        self.assertIs(reused, connection)
+        self.assertIsNotNone(idle)
+        self.assertEqual(len(self.opened), 1)
+
+    def test_waits_for_a_free_connection(self):
+        first, _ = self.pool.get(timeout=1)
+        self.pool.get(timeout=1)
+        threading.Timer(0.1, self.pool.put, [first]).start()
+        start = time.monotonic()
+        connection, _ = self.pool.get(timeout=5)
+        self.assertIs(connection, first)
+        self.assertGreaterEqual(time.monotonic() - start, 0.05)
+        self.assertEqual(len(self.opened), 2)
+
+    def test_timeout_when_pool_exhausted(self):
+        self.pool.get(timeout=1)
+        self.pool.get(timeout=1)
+        with self.assertRaises(OperationalError):
+            self.pool.get(timeout=0.05)
+
+    def test_uncommitted_transaction_rolled_back_when_returned(self):
+        connection, _ = self.pool.get(timeout=1)
+        connection.in_transaction = True
+        self.pool.put(connection)
+        self.assertTrue(connection.rolled_back)
+
+    def test_closed_connection_not_returned_to_pool(self):
+        connection, _ = self.pool.get(timeout=1)
+        connection.close()
+        self.pool.put(connection)
+        new, _ = self.pool.get(timeout=1)
+        self.assertIsNot(new, connection)
+        self.assertEqual(self.pool.open, 1)
+
+    def test_discarded_connection_makes_room(self):
+        first, _ = self.pool.get(timeout=1)
+        self.pool.get(timeout=1)
+        self.pool.discard(first)
+        self.assertTrue(first.closed)
+        self.pool.get(timeout=0.05)   # no OperationalError
+        self.assertEqual(len(self.opened), 3)
+
+    def test_failed_connect_makes_room(self):
+        def connect():
+            raise psycopg2.OperationalError('server is down')
+        pool = ConnectionPool(1, connect)
+        for attempt in range(2):
+            with self.assertRaises(psycopg2.OperationalError):
+                pool.get(timeout=0.05)
+        self.assertEqual(pool.open, 0)
+
+    def test_fill_opens_idle_connections(self):
+        self.pool.fill(5)
+        self.assertEqual(len(self.opened), 2)   # no more than the pool size
+        self.assertEqual(len(self.pool.idle), 2)
+        self.pool.close_all()
+        self.assertTrue(all(connection.closed for connection in self.opened))
+        self.assertEqual(self.pool.open, 0)
+
+
+class TestConnectionMetrics(SimpleTestCase):
+
+    def test_snapshot(self):
+        metrics = ConnectionMetrics()
+        metrics.record_wait(0.002)
+        metrics.record_wait(0.004)
+        metrics.record_opened()
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot['connections'], 2)
+        self.assertEqual(snapshot['opened'], 1)
+        self.assertAlmostEqual(snapshot['mean_wait_ms'], 3.0)
+        self.assertAlmostEqual(snapshot['max_wait_ms'], 4.0)
+        metrics.reset()
+        self.assertEqual(metrics.snapshot()['connections'], 0)
+
+
+class TestBackendOptions(SimpleTestCase):
+
+    def settings_dict(self, **options):
+        return {
+            'ENGINE': 'lmnop_project.postgres', 'NAME': 'lmnopdb', 'USER': 'lmn_user', 'PASSWORD': 'pw',
+            'HOST': 'localhost', 'PORT': '5432', 'OPTIONS': options, 'TIME_ZONE': None, 'CONN_MAX_AGE': 0,
+            'AUTOCOMMIT': True, 'ATOMIC_REQUESTS': False, 'TEST': {},
+        }
+
+    def test_backend_options_not_passed_to_psycopg2(self):
+        wrapper = DatabaseWrapper(self.settings_dict(POOL_SIZE=4, HEALTH_CHECK_SECONDS=5, sslmode='disable'), 'pool_test')
+        params = wrapper.get_connection_params()
+        self.assertEqual(params['sslmode'], 'disable')
+        for name in BACKEND_OPTIONS:
+            self.assertNotIn(name, params)
+        self.assertTrue(wrapper.pooled)
+        self.assertEqual(wrapper.options['HEALTH_CHECK_SECONDS'], 5)
+
+    def test_not_pooled_by_default(self):
+        wrapper = DatabaseWrapper(self.settings_dict(), 'pool_test')
+        self.assertFalse(wrapper.pooled)
+
+
+@skipUnless(isinstance(connection, DatabaseWrapper), 'needs the lmnop_project.postgres database backend')
+class TestPostgresConnections(TransactionTestCase):
+    # not TestCase, health checks are skipped inside its transaction
+
+    def test_health_check_replaces_broken_connection(self):
+        connection.ensure_connection()
+        connection.last_checked = time.monotonic() - connection.options['HEALTH_CHECK_SECONDS'] - 1
+        connection.connection.close()
+        connection.close_if_unusable_or_obsolete()
+        self.assertIsNone(connection.connection)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
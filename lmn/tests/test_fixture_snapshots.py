@@ -0,0 +1,66 @@
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from io import StringIO
+
+from lmn.fixture_snapshots import _snapshots
+from lmn.models import Artist, Venue, Profile, Note
+from lmn.search import search
+
+
+@override_settings(FIXTURE_SNAPSHOTS=True)
+class TestFixtureSnapshots(TestCase):
+
+    labels = ('testing_users', 'testing_artists', 'testing_venues', 'testing_shows', 'testing_notes', 'testing_many_users')
+
+    def setUp(self):
+        _snapshots.pop(('default', self.labels), None)
+
+    def load(self):
+        out = StringIO()
+        call_command('loaddata', *self.labels, stdout=out)
+        return out.getvalue()
+
+    def rows(self):
+        return (list(User.objects.order_by('pk').values_list('pk', 'username', 'password')),
+                list(Profile.objects.order_by('pk').values_list('pk', 'time_zone')),
+                list(Note.objects.order_by('pk').values_list('pk', 'show_id', 'user_id', 'title', 'text')))
+
+    def clear(self):
+        for model in (Note, Artist, Venue, User):
+            model.objects.all().delete()
+
+    def test_second_load_copies_rows_of_first(self):
+        self.assertIn('Installed', self.load())
+        loaded = self.rows()
+        self.clear()
+        self.assertIn('Copied', self.load())
+        self.assertEqual(self.rows(), loaded)
+
+    def test_copies_rows_made_by_signals(self):
+        self.load()
+        self.clear()
+        self.assertEqual(Profile.objects.count(), 0)
+        self.load()
+        # profiles are made when users are saved, and the search index when artists are
+        self.assertEqual(Profile.objects.count(), User.objects.count())
+        self.assertEqual([artist.name for artist in search(Artist.objects.all(), 'REM')], ['REM'])
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT count(*) FROM lmn_artist_fts')
+            self.assertEqual(cursor.fetchone()[0], Artist.objects.count())
+
+    def test_new_rows_after_copied_rows(self):
+        self.load()
+        self.clear()
+        self.load()
+        artist = Artist.objects.create(name='After the fixtures')
+        self.assertGreater(artist.pk, Artist.objects.exclude(pk=artist.pk).order_by('-pk').first().pk)
+
+    @override_settings(FIXTURE_SNAPSHOTS=False)
+    def test_off(self):
+        self.load()
+        self.clear()
+        self.assertIn('Installed', self.load())
+        self.assertNotIn(('default', self.labels), _snapshots)
@@ -332,6 +332,13 @@ class UpdateProfileFormTests(TestCase):
         form = UpdateProfileForm({'favorite_artist':1,'favorite_venue':1})
         self.assertTrue(form.is_valid)
 
+    def test_time_zone_must_be_a_zone(self):
+        form = UpdateProfileForm({'favorite_artist': 1, 'favorite_venue': 1, 'time_zone': 'Asia/Tokyo'})
+        self.assertTrue(form.is_valid())
+        form = UpdateProfileForm({'favorite_artist': 1, 'favorite_venue': 1, 'time_zone': 'Mars/Olympus_Mons'})
+        self.assertFalse(form.is_valid())
+        self.assertIn('time_zone', form.errors)
+
 
 class TestAvatarImg(TestCase):
 
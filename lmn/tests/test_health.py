@@ -0,0 +1,26 @@
+from django.test import TestCase
+from django.urls import reverse
+from django.db import connections, OperationalError
+
+from unittest.mock import patch
+
+
+class TestHealthChecks(TestCase):
+
+    def test_liveness_without_database(self):
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('liveness'))
+        self.assertEqual(response.json(), {'status': 'ok'})
+        self.assertIn('no-cache', response['Cache-Control'])
+
+    def test_ready_when_database_answers(self):
+        response = self.client.get(reverse('readiness'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'status': 'ok', 'database': 'ok'})
+
+    def test_not_ready_when_database_unavailable(self):
+        with patch.object(connections['default'], 'cursor', side_effect=OperationalError('connection refused')), \
+                self.assertLogs(level='ERROR'):
+            response = self.client.get(reverse('readiness'))
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()['database'], 'unavailable')
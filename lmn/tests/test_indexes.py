@@ -0,0 +1,81 @@
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+
+from lmn.models import Note, Artist, Show
+from lmn.pagination import CursorPaginator
+
+
+class TestQueryPlans(TestCase):
+    """ Each list page's main query must read its rows from an index, in order, on SQLite and Postgres. """
+
+    fixtures = ['testing_users', 'testing_artists', 'testing_venues', 'testing_shows', 'testing_notes']
+
+    def main_query(self, url, table):
+        # the first query of the page which selects from table
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        for query in queries.captured_queries:
+            if query['sql'].startswith('SELECT') and f'FROM "{table}"' in query['sql']:
+                return query['sql']
+        self.fail(f'{url} made no query from {table}')
+
+    def plan(self, sql):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # the test tables are tiny, so make Postgres prefer an index whenever one can be used
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute('SET LOCAL enable_sort = off')
+                cursor.execute('EXPLAIN ' + sql)
+            else:
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            return '\n'.join(str(row[-1]) for row in cursor.fetchall())
+
+    def assertIndexScan(self, url, table, index=None):
+        """ The page's query from table uses index, or some index if None, and needs no sort. """
+        plan = self.plan(self.main_query(url, table))
+        if connection.vendor == 'postgresql':
+            self.assertNotIn(f'Seq Scan on {table}', plan)
+            self.assertNotIn('Sort', plan)
+            self.assertIn(f'Index Scan using {index or ""}', plan)
+        else:
+            self.assertNotIn('USE TEMP B-TREE', plan)
+            self.assertRegex(plan, rf'(SCAN|SEARCH) {table} USING (COVERING )?INDEX {index or ""}')
+
+    def test_latest_notes(self):
+        self.assertIndexScan(reverse('latest_notes'), 'lmn_note', 'note_latest_idx')
+
+    def test_latest_notes_later_page(self):
+        cursor = CursorPaginator(Note.objects.feed(), 10, ordering=('-posted_date', '-pk')) \
+            .cursor_for(Note.objects.get(pk=1))
+        self.assertIndexScan(reverse('latest_notes') + f'?cursor={cursor}', 'lmn_note', 'note_latest_idx')
+
+    def test_notes_for_show(self):
+        self.assertIndexScan(reverse('notes_for_show', kwargs={'show_pk': 1}), 'lmn_note', 'note_show_latest_idx')
+
+    def test_notes_on_user_profile(self):
+        self.assertIndexScan(reverse('user_profile', kwargs={'user_pk': 1}), 'lmn_note', 'note_user_latest_idx')
+
+    def test_shows_at_venue(self):
+        self.assertIndexScan(reverse('artists_at_venue', kwargs={'venue_pk': 2}), 'lmn_show', 'show_venue_date_idx')
+
+    def test_shows_at_venue_later_page(self):
+        cursor = CursorPaginator(Show.objects.listing(), 20, ordering=('-show_date', '-pk')) \
+            .cursor_for(Show.objects.get(pk=2))
+        url = reverse('artists_at_venue', kwargs={'venue_pk': 2}) + f'?cursor={cursor}'
+        self.assertIndexScan(url, 'lmn_show', 'show_venue_date_idx')
+
+    def test_shows_for_artist(self):
+        self.assertIndexScan(reverse('venues_for_artist', kwargs={'artist_pk': 1}), 'lmn_show', 'show_artist_date_idx')
+
+    def test_artists_by_name(self):
+        # the unique index on name
+        self.assertIndexScan(reverse('artist_list'), 'lmn_artist')
+
+    def test_artists_by_name_later_page(self):
+        cursor = CursorPaginator(Artist.objects.all(), 10, ordering=('name', 'pk')).cursor_for(Artist.objects.get(pk=1))
+        self.assertIndexScan(reverse('artist_list') + f'?cursor={cursor}', 'lmn_artist')
+
+    def test_venues_by_name(self):
+        self.assertIndexScan(reverse('venue_list'), 'lmn_venue')
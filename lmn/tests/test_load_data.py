@@ -0,0 +1,96 @@
+import json
+import os
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Count
+from django.test import TestCase
+from django.utils import timezone
+
+from io import StringIO
+
+from lmn.load_data import generate_load_data
+from lmn.models import Artist, Venue, Show, Note, Profile
+
+
+class TestGenerateLoadData(TestCase):
+
+    fixtures = ['testing_users', 'testing_artists', 'testing_venues', 'testing_shows', 'testing_notes']
+
+    def generate(self, **counts):
+        options = dict(users=50, artists=20, venues=10, shows=200, notes=1000, seed=1, batch_size=64)
+        options.update(counts)
+        return generate_load_data(**options)
+
+    def test_adds_rows_after_existing_ones(self):
+        before = {model: model.objects.count() for model in (User, Profile, Artist, Venue, Show, Note)}
+        added = self.generate()
+        self.assertEqual(added, {'User': 50, 'Profile': 50, 'Artist': 20, 'Venue': 10, 'Show': 200, 'Note': 1000})
+        for model, count in before.items():
+            self.assertEqual(model.objects.count(), count + added[model.__name__])
+        # primary keys carry on from the generated ones
+        artist = Artist.objects.create(name='Made afterwards')
+        self.assertGreater(artist.pk, Artist.objects.exclude(pk=artist.pk).order_by('-pk').first().pk)
+
+    def test_popularity_is_skewed(self):
+        self.generate()
+        counts = list(Artist.objects.filter(name__startswith='Load').order_by('-note_count')
+                      .values_list('note_count', flat=True))
+        self.assertGreater(counts[0], 5 * counts[-1])
+
+    def test_no_skew_shares_notes_evenly(self):
+        self.generate(skew=0)
+        counts = list(Venue.objects.filter(name__startswith='Load').values_list('note_count', flat=True))
+        self.assertLess(max(counts), 2 * min(counts))
+
+    def test_notes_counted_and_posted_after_their_show(self):
+        self.generate()
+        for show in Show.objects.annotate(notes=Count('note')):
+            self.assertEqual(show.note_count, show.notes)
+        for note in Note.objects.select_related('show'):
+            self.assertGreaterEqual(note.posted_date, note.show.show_date)
+            self.assertLessEqual(note.posted_date, timezone.now())
+
+    def test_no_more_notes_for_a_show_than_users(self):
+        added = self.generate(users=3, shows=2, notes=50)
+        self.assertEqual(added['Note'], 6)
+
+    def test_shows_need_artists_and_venues(self):
+        for counts in (['--artists', '0'], ['--venues', '0']):
+            with self.subTest(counts=counts), self.assertRaises(CommandError):
+                call_command('generate_load_data', '--users', '1', '--shows', '1', '--notes', '0', *counts,
+                             stdout=StringIO())
+
+    def test_same_seed_makes_same_notes(self):
+        self.generate(users=20, shows=20, notes=100, seed=5)
+        first = list(Note.objects.filter(pk__gt=3).values_list('pk', 'show_id', 'user_id', 'text'))
+        for model in (Show, Artist, Venue, User):
+            model.objects.filter(pk__gt=3).delete()
+        self.generate(users=20, shows=20, notes=100, seed=5)
+        self.assertEqual(list(Note.objects.filter(pk__gt=3).values_list('pk', 'show_id', 'user_id', 'text')), first)
+
+
+class TestBenchmarkViews(TestCase):
+
+    fixtures = ['testing_users', 'testing_artists', 'testing_venues', 'testing_shows', 'testing_notes']
+
+    def test_saves_and_compares_results(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'results.json')
+            call_command('benchmark_views', '--requests', '3', '--warmup', '0', '--output', output, stdout=StringIO())
+            with open(output) as file:
+                results = json.load(file)
+            self.assertEqual(results['rows']['Note'], 3)
+            profile = results['views']['user_profile']
+            self.assertEqual(profile['statuses'], [200])
+            self.assertEqual(profile['queries'], 3)
+            self.assertLessEqual(profile['p50_ms'], profile['p95_ms'])
+            self.assertLessEqual(profile['p95_ms'], profile['p99_ms'])
+
+            out = StringIO()
+            call_command('benchmark_views', '--views', 'latest_notes', '--requests', '3', '--warmup', '0',
+                         '--compare', output, stdout=out)
+            self.assertIn('Changes from', out.getvalue())
+            self.assertRegex(out.getvalue(), r'latest_notes +[\d.]+ > [\d.]+')
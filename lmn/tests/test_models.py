@@ -1,12 +1,14 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 
-from django.db import IntegrityError
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.db.models.signals import post_save
 from django.core.exceptions import ValidationError
 from django.core.files.uploadedfile import SimpleUploadedFile
 
 from .. import models
 from django.contrib.auth.models import User
-from lmn.models import Profile, Artist, Venue, Show, Note
+from lmn.models import Profile, Artist, Venue, Show, Note, Task
 
 from django.utils import timezone
 from datetime import timedelta
@@ -203,4 +205,119 @@ class TestNote(TestCase):
         self.assertEqual(self.user, note_from_db.user)
         self.assertEqual(show, note_from_db.show)
         self.assertEqual('aaa', note_from_db.title)
-        self.assertEqual('bbb', note_from_db.text)
\ No newline at end of file
+        self.assertEqual('bbb', note_from_db.text)
+
+@override_settings(TASKS_EAGER=False)
+class TestFieldTracking(TestCase):
+
+    fixtures = ['testing_users', 'testing_artists', 'testing_venues', 'testing_shows', 'testing_notes']
+
+    def update_sql(self, queries):
+        return [query['sql'] for query in queries.captured_queries if query['sql'].startswith('UPDATE')]
+
+    def test_changed_fields(self):
+        note = Note.objects.get(pk=1)
+        self.assertEqual(note.changed_fields, [])
+        note.title = 'New title'
+        self.assertEqual(note.changed_fields, ['title'])
+        self.assertEqual(note.original('title'), Note.objects.get(pk=1).title)
+        self.assertTrue(Note(title='New').has_changed('text'))   # everything is new in an unsaved note
+
+    def test_unchanged_note_save_makes_no_queries(self):
+        note = Note.objects.get(pk=1)
+        with self.assertNumQueries(0):
+            note.save()
+
+    def test_note_save_updates_changed_columns_without_select(self):
+        note = Note.objects.get(pk=1)
+        note.title = 'New title'
+        with CaptureQueriesContext(connection) as queries:
+            note.save()
+        self.assertFalse([query for query in queries.captured_queries if query['sql'].startswith('SELECT')])
+        update, = self.update_sql(queries)
+        self.assertIn('"title"', update)
+        self.assertNotIn('"text"', update)
+        self.assertEqual(note.changed_fields, [])
+        self.assertEqual(Note.objects.get(pk=1).title, 'New title')
+
+    def test_photo_change_updates_one_column_and_queues_delete(self):
+        note = Note.objects.get(pk=1)
+        note.photo = 'user_images/old.jpg'
+        note.save()
+        note = Note.objects.get(pk=1)
+        note.photo = 'user_images/new.jpg'
+        # the UPDATE, then the delete and renditions tasks - the search index is untouched
+        with self.assertNumQueries(3):
+            note.save()
+        self.assertEqual(list(Task.objects.order_by('id').values_list('name', 'arguments__name')),
+                         [('make_renditions', 'user_images/old.jpg'),
+                          ('delete_image', 'user_images/old.jpg'), ('make_renditions', 'user_images/new.jpg')])
+
+    def test_storage_untouched_when_photo_unchanged(self):
+        note = Note.objects.get(pk=1)
+        note.photo = 'user_images/old.jpg'
+        note.save()
+        Task.objects.all().delete()
+        note = Note.objects.get(pk=1)
+        note.text = 'New text'
+        note.save()
+        self.assertFalse(Task.objects.exists())
+
+    def test_deferred_field_saved_once_set(self):
+        note = Note.objects.defer('text').get(pk=1)
+        note.text = 'New text'
+        self.assertEqual(note.changed_fields, ['text'])
+        note.save()
+        self.assertEqual(Note.objects.get(pk=1).text, 'New text')
+
+    def test_profile_save_updates_changed_columns_without_select(self):
+        profile = Profile.objects.get(user=1)
+        profile.favorite_artist = Artist.objects.get(pk=1)
+        with self.assertNumQueries(1):
+            profile.save()
+        self.assertEqual(Profile.objects.get(user=1).favorite_artist.pk, 1)
+
+    def test_saving_deleted_row_raises_rather_than_inserting(self):
+        note = Note.objects.get(pk=1)
+        Note.objects.filter(pk=1).delete()
+        note.title = 'New title'
+        with self.assertRaises(DatabaseError):
+            with transaction.atomic():
+                note.save()
+        self.assertFalse(Note.objects.filter(pk=1).exists())
+
+    def test_unchanged_save_sends_no_signals(self):
+        note = Note.objects.get(pk=1)
+        saved = []
+        receiver = lambda sender, instance, **kwargs: saved.append(instance)
+        post_save.connect(receiver, sender=Note)
+        self.addCleanup(post_save.disconnect, receiver, sender=Note)
+        note.save()
+        self.assertEqual(saved, [])
+        note.title = 'New title'
+        note.save()
+        self.assertEqual(saved, [note])
+
+    def test_unchanged_profile_save_makes_no_queries(self):
+        profile = Profile.objects.get(user=1)
+        with self.assertNumQueries(0):
+            profile.save()
+
+    def test_avatar_change_queues_delete_of_old_avatar(self):
+        profile = Profile.objects.get(user=1)
+        profile.avatar = 'profile_images/old.jpg'
+        profile.save()
+        profile = Profile.objects.get(user=1)
+        profile.avatar = 'profile_images/new.jpg'
+        with self.assertNumQueries(3):
+            profile.save()
+        self.assertTrue(Task.objects.filter(name='delete_image', arguments__name='profile_images/old.jpg').exists())
+
+    def test_cleared_avatar_reset_to_default(self):
+        profile = Profile.objects.get(user=1)
+        profile.avatar = 'profile_images/old.jpg'
+        profile.save()
+        profile = Profile.objects.get(user=1)
+        profile.avatar = None
+        profile.save()
+        self.assertEqual(Profile.objects.get(user=1).avatar.name, Profile.DEFAULT_AVATAR)
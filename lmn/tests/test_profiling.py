@@ -0,0 +1,104 @@
+import json
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.http import HttpResponse
+from django.template import Context, Template
+from django.test import TestCase, RequestFactory, override_settings
+from django.urls import reverse
+
+from unittest.mock import patch
+
+from lmn.models import Artist
+from lmnop_project.profiling import ProfilingMiddleware
+
+
+@override_settings(PROFILING_SAMPLE_RATE=1, PROFILING_SERVER_TIMING=True)
+class TestProfilingMiddleware(TestCase):
+
+    fixtures = ['testing_users', 'testing_artists', 'testing_venues', 'testing_shows', 'testing_notes']
+
+    def profile(self, view):
+        """ Call view through the middleware, returns the response and the logged totals. """
+        middleware = ProfilingMiddleware(view)
+        with self.assertLogs('lmn.profiling', level='INFO') as logs:
+            response = middleware(RequestFactory().get('/profiled/'))
+        self.assertEqual(len(logs.records), 1)
+        return response, json.loads(logs.records[0].getMessage())
+
+    def test_page_totals_logged_and_sent_in_server_timing_header(self):
+        with self.assertLogs('lmn.profiling', level='INFO') as logs:
+            response = self.client.get(reverse('latest_notes'))
+        totals = json.loads(logs.records[0].getMessage())
+        self.assertEqual(totals['view'], 'latest_notes')
+        self.assertEqual(totals['status'], 200)
+        self.assertGreater(totals['db_queries'], 0)
+        self.assertGreater(totals['template_ms'], 0)
+        self.assertIn(f'db;dur={totals["db_ms"]:.1f};desc="{totals["db_queries"]} queries', response['Server-Timing'])
+        self.assertIn('template;dur=', response['Server-Timing'])
+        self.assertIn('total;dur=', response['Server-Timing'])
+
+    def test_counts_queries_and_duplicates(self):
+        def view(request):
+            Artist.objects.get(pk=1)
+            Artist.objects.get(pk=1)
+            Artist.objects.get(pk=2)
+            return HttpResponse()
+
+        response, totals = self.profile(view)
+        self.assertEqual(totals['db_queries'], 3)
+        self.assertEqual(totals['db_duplicates'], 1)
+        self.assertIn('3 queries, 1 duplicates', response['Server-Timing'])
+
+    def test_lists_query_run_for_every_row(self):
+        def view(request):
+            for pk in range(1, 7):
+                Artist.objects.filter(pk=pk).first()
+            return HttpResponse()
+
+        response, totals = self.profile(view)
+        self.assertEqual(totals['db_duplicates'], 0)
+        self.assertEqual(len(totals['repeated_queries']), 1)
+        self.assertEqual(totals['repeated_queries'][0]['count'], 6)
+        self.assertIn('lmn_artist', totals['repeated_queries'][0]['sql'])
+
+    def test_times_templates_once_including_their_includes(self):
+        template = Template('{% for n in numbers %}{% include "lmn/navbar_account.html" %}{% endfor %}')
+
+        def view(request):
+            return HttpResponse(template.render(Context({'numbers': range(3)})))
+
+        with patch('lmnop_project.profiling.time.perf_counter', side_effect=range(100)):
+            response, totals = self.profile(view)
+        # perf_counter is called at the start and end of the request, and of the outer template only
+        self.assertEqual(totals['template_ms'], 1000)
+        self.assertEqual(totals['total_ms'], 3000)
+
+    def test_times_storage_calls(self):
+        def view(request):
+            name = default_storage.save('profiling_test.txt', ContentFile(b'test'))
+            default_storage.exists(name)
+            default_storage.delete(name)
+            return HttpResponse()
+
+        response, totals = self.profile(view)
+        self.assertEqual(totals['storage_calls'], 3)
+        self.assertIn('desc="3 calls"', response['Server-Timing'])
+
+    @override_settings(PROFILING_SERVER_TIMING=False)
+    def test_server_timing_header_off(self):
+        response, totals = self.profile(lambda request: HttpResponse())
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    @override_settings(PROFILING_SAMPLE_RATE=0)
+    def test_requests_not_sampled_are_not_profiled(self):
+        with patch('lmnop_project.profiling.logger') as logger:
+            response = self.client.get(reverse('latest_notes'))
+        logger.info.assert_not_called()
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    def test_queries_outside_profiled_requests_not_counted(self):
+        response, totals = self.profile(lambda request: HttpResponse())
+        self.assertEqual(totals['db_queries'], 0)
+        self.assertEqual(connection.execute_wrappers, [])
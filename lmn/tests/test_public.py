@@ -0,0 +1,81 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.contrib.messages.storage.cookie import CookieStorage
+
+
+@override_settings(PUBLIC_PAGE_SECONDS=60, PUBLIC_PAGE_STALE_SECONDS=300)
+class TestPublicPages(TestCase):
+
+    fixtures = ['testing_users', 'testing_artists', 'testing_venues', 'testing_shows', 'testing_notes']
+
+    pages = [
+        ('artist_list', {}),
+        ('venue_list', {}),
+        ('latest_notes', {}),
+        ('artist_detail', {'artist_pk': 1}),
+        ('venue_detail', {'venue_pk': 1}),
+        ('note_detail', {'note_pk': 1}),
+    ]
+
+    def assertPublic(self, response):
+        cache_control = {directive.strip() for directive in response['Cache-Control'].split(',')}
+        self.assertEqual(cache_control, {'public', 'max-age=0', 's-maxage=60', 'stale-while-revalidate=300'})
+        self.assertNotIn('Cookie', response.get('Vary', ''))
+        self.assertFalse(response.cookies)
+
+    def test_pages_public_for_anonymous_visitors(self):
+        for name, kwargs in self.pages:
+            with self.subTest(page=name):
+                response = self.client.get(reverse(name, kwargs=kwargs))
+                self.assertEqual(response.status_code, 200)
+                self.assertPublic(response)
+
+    def test_pages_same_for_logged_in_users(self):
+        self.client.force_login(User.objects.get(pk=1))
+        for name, kwargs in self.pages:
+            with self.subTest(page=name):
+                response = self.client.get(reverse(name, kwargs=kwargs))
+                self.assertPublic(response)
+                self.assertNotContains(response, 'Hi, alice')
+                self.assertContains(response, f'data-fragment="{reverse("nav_account")}?path=')
+
+    def test_not_modified_response_public(self):
+        url = reverse('artist_detail', kwargs={'artist_pk': 1})
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=self.client.get(url)['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertPublic(response)
+
+    def test_page_with_pending_message_rendered_for_user(self):
+        self.client.force_login(User.objects.get(pk=1))
+        self.client.cookies[CookieStorage.cookie_name] = 'pending'
+        response = self.client.get(reverse('artist_list'))
+        self.assertContains(response, 'Hi, alice')
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_profile_page_not_public(self):
+        self.client.force_login(User.objects.get(pk=1))
+        response = self.client.get(reverse('user_profile', kwargs={'user_pk': 1}))
+        self.assertContains(response, 'Hi, alice')
+        self.assertNotIn('public', response.get('Cache-Control', ''))
+
+    def test_nav_account_for_logged_in_user(self):
+        self.client.force_login(User.objects.get(pk=1))
+        response = self.client.get(reverse('nav_account'), {'path': '/artists/list/'})
+        self.assertContains(response, 'Hi, alice')
+        self.assertIn('private', response['Cache-Control'])
+        self.assertIn('no-cache', response['Cache-Control'])
+
+    def test_nav_account_for_visitor_logs_in_to_page(self):
+        response = self.client.get(reverse('nav_account'), {'path': '/artists/list/'})
+        self.assertContains(response, f'{reverse("login")}?next=/artists/list/')
+
+    def test_note_controls_only_for_author(self):
+        url = reverse('note_controls', kwargs={'note_pk': 1})
+        self.assertNotContains(self.client.get(url), 'Delete')
+        self.client.force_login(User.objects.get(pk=2))
+        self.assertNotContains(self.client.get(url), 'Delete')
+        self.client.force_login(User.objects.get(pk=1))
+        response = self.client.get(url)
+        self.assertContains(response, 'Delete')
+        self.assertContains(response, 'csrfmiddlewaretoken')
@@ -0,0 +1,168 @@
+import contextlib
+import datetime
+import difflib
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from lmn.models import Artist, Venue, Show, Note
+from lmn.tests.factories import make_show, make_note
+import lmn.urls
+import get_initial_data.urls
+
+
+class Route:
+    """ How to request a named route, and the most SQL queries it may run.
+
+    requests is a list of (URL arguments, query string) to request it with, or give one as kwargs and query.
+    URL arguments may be a function of the test case, for routes which need new rows each time, like deleting.
+    """
+    def __init__(self, budget, kwargs=None, query=None, requests=None, logged_in=False, status=200):
+        self.budget = budget
+        self.requests = requests or [(kwargs or {}, query or {})]
+        self.logged_in = logged_in
+        self.status = status
+
+
+# Logged in requests include 2 queries, the session and the user.
+ROUTES = {
+    'homepage': Route(0),
+
+    'venue_list': Route(1, requests=[({}, {}), ({}, {'search_name': 'e'})]),
+    'venue_detail': Route(2, kwargs={'venue_pk': 1}),   # when it last changed, then the venue
+    'artists_at_venue': Route(2, kwargs={'venue_pk': 1}),
+
+    'latest_notes': Route(1),
+    'note_detail': Route(2, kwargs={'note_pk': 1}),   # when it last changed, then the note with its show and author
+    'notes_for_show': Route(2, kwargs={'show_pk': 1}),
+    'new_note': Route(4, kwargs={'show_pk': 2}, logged_in=True),   # the show and the user's note for it in one query
+    'edit_note': Route(8, kwargs={'note_pk': 1}, logged_in=True),
+    'delete_note': Route(10, kwargs=lambda test: {'note_pk': test.note_to_delete().pk}, logged_in=True, status=302),
+    'note_controls': Route(3, kwargs={'note_pk': 1}, logged_in=True),
+
+    'artist_list': Route(1, requests=[({}, {}), ({}, {'search_name': 'a'})]),
+    'artist_detail': Route(2, kwargs={'artist_pk': 1}),
+    'venues_for_artist': Route(2, kwargs={'artist_pk': 1}),
+
+    'user_profile': Route(3, kwargs={'user_pk': 1}),
+    # the favorite artist and venue choices are each listed twice
+    'my_user_profile': Route(9, logged_in=True),
+    'nav_account': Route(3, logged_in=True),   # and the user's profile, for their avatar
+    'shows_to_review': Route(4, logged_in=True),   # the user's profile again, for the navigation bar
+
+    'login': Route(0),
+    'logout': Route(0, status=302),
+    'register': Route(0),
+    'user_logout': Route(0),
+
+    'api_list': Route(2, requests=[   # a page of objects, and a query for each reverse include
+        ({'resource_name': 'artists'}, {}),
+        ({'resource_name': 'venues'}, {}),
+        ({'resource_name': 'shows'}, {'include': 'artist,venue,notes'}),
+        ({'resource_name': 'notes'}, {'include': 'show.artist,show.venue'}),
+    ]),
+    'api_detail': Route(2, requests=[
+        ({'resource_name': 'shows', 'pk': 1}, {'include': 'artist,venue,notes'}),
+        ({'resource_name': 'notes', 'pk': 1}, {'include': 'show.artist,show.venue'}),
+    ]),
+
+    # only superusers and App Engine cron can import shows, which scrapes First Avenue's site
+    'populate_db': Route(0, status=403),
+}
+
+# rows added by scale_up for each row of the testing_many fixtures
+SCALE = 5
+
+
+class TestQueryCounts(TestCase):
+    """ Every named route runs at most its budget of queries, however many rows there are. """
+
+    fixtures = ['testing_many_users', 'testing_many_artists', 'testing_many_venues', 'testing_shows',
+                'testing_many_notes']
+
+    def setUp(self):
+        self.user = User.objects.get(pk=1)
+
+    def test_every_route_has_a_budget(self):
+        names = {pattern.name for pattern in lmn.urls.urlpatterns + get_initial_data.urls.urlpatterns if pattern.name}
+        self.assertEqual(names - set(ROUTES), set(), 'Add these routes to ROUTES')
+        self.assertEqual(set(ROUTES) - names, set(), 'These routes no longer exist')
+
+    def test_query_counts_within_budget_and_do_not_grow_with_rows(self):
+        before = {name: self.capture(name, route) for name, route in ROUTES.items()}
+        scale_up(SCALE)
+        after = {name: self.capture(name, route) for name, route in ROUTES.items()}
+
+        for name, route in ROUTES.items():
+            for (url, small), (_, large) in zip(before[name], after[name]):
+                with self.subTest(url=url):
+                    self.assertLessEqual(len(large), route.budget,
+                                         f'{url} ran {len(large)} queries, its budget is {route.budget}\n'
+                                         + numbered(large))
+                    self.assertEqual(len(small), len(large),
+                                     f'{url} ran {len(large) - len(small)} more queries with {SCALE} times the '
+                                     f'rows\n' + query_diff(small, large))
+
+    def capture(self, name, route):
+        """ Request route with each of its arguments. Returns a list of (URL, the SQL of its queries) """
+        self.client.logout()
+        if route.logged_in:
+            self.client.force_login(self.user)
+        requests = []
+        for kwargs, query in route.requests:
+            url = reverse(name, kwargs=kwargs(self) if callable(kwargs) else kwargs)
+            with CaptureQueriesContext(connection) as queries, self.expect_logs(route.status):
+                response = self.client.get(url, query)
+            self.assertEqual(response.status_code, route.status, url)
+            requests.append((f'{url}?{response.wsgi_request.GET.urlencode()}'.rstrip('?'),
+                             [query['sql'] for query in queries]))
+        return requests
+
+    def expect_logs(self, status):
+        """ Django logs a warning for 4xx responses """
+        return self.assertLogs('django.request', 'WARNING') if status >= 400 else contextlib.nullcontext()
+
+    def note_to_delete(self):
+        return make_note(show=make_show(artist_id=1, venue_id=1), user=self.user)
+
+
+def numbered(queries):
+    return '\n'.join(f'{number}. {sql}' for number, sql in enumerate(queries, start=1))
+
+
+def query_diff(small, large):
+    return '\n'.join(difflib.unified_diff(small, large, 'fixtures', f'{SCALE}x rows', lineterm=''))
+
+
+def scale_up(factor):
+    """ Add factor times the users, artists, venues, shows and notes of the testing_many fixtures.
+
+    Half of the new shows are artist 1's or at venue 1, and every new show has a note by user 1 and one by a new user,
+    so the pages the routes request list more rows.
+    """
+    count = 12 * factor
+    # created one by one, so their profiles are made too
+    users = [User.objects.create(username=f'scaled{n}', email=f'scaled{n}@example.com') for n in range(count)]
+    Artist.objects.bulk_create(Artist(name=f'Scaled artist {n}') for n in range(count))
+    Venue.objects.bulk_create(Venue(name=f'Scaled venue {n}', city='Minneapolis', state='MN') for n in range(count))
+    # bulk_create on sqlite doesn't set primary keys in this Django version
+    artists = list(Artist.objects.filter(name__startswith='Scaled').order_by('pk'))
+    venues = list(Venue.objects.filter(name__startswith='Scaled').order_by('pk'))
+
+    start = timezone.now() - datetime.timedelta(days=count + 1)
+    Show.objects.bulk_create(
+        Show(artist_id=1 if n % 2 else artists[n].pk, venue_id=venues[n].pk if n % 2 else 1,
+             show_date=start + datetime.timedelta(days=n))
+        for n in range(count)
+    )
+    shows = Show.objects.filter(show_date__range=(start, start + datetime.timedelta(days=count - 1))) \
+        .order_by('show_date')
+    first_user = User.objects.get(pk=1)
+    Note.objects.bulk_create(
+        Note(show=show, user=user, title=f'Scaled note {n}', text='Great show ' * 20)
+        for n, show in enumerate(shows) for user in (first_user, users[n])
+    )
@@ -0,0 +1,125 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.contrib.auth.models import User
+
+from lmn.models import Note, Show, Profile
+from lmn.renditions import create_renditions, rendition_name
+
+from io import BytesIO, StringIO
+from PIL import Image
+import shutil
+import tempfile
+
+
+def image_upload(name='gig.jpg', size=(1600, 1200), image_format='JPEG', mode='RGB'):
+    buffer = BytesIO()
+    Image.new(mode, size, 'red').save(buffer, image_format)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type=f'image/{image_format.lower()}')
+
+
+class TestRenditions(TestCase):
+
+    fixtures = ['testing_users', 'testing_artists', 'testing_venues', 'testing_shows', 'testing_notes']
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        # the avatar of every profile in the fixtures
+        default_storage.save('default.jpg', image_upload('default.jpg'))
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+
+    def new_note(self, photo):
+        return Note.objects.create(show=Show.objects.get(pk=3), user=User.objects.get(pk=2),
+                                   title='Great', text='Loud', photo=photo)
+
+    def rendition_size(self, name, rendition, extension):
+        with default_storage.open(rendition_name(name, rendition, extension), 'rb') as file:
+            image = Image.open(file)
+            return image.format, image.size
+
+    def test_note_photo_renditions_made_on_upload(self):
+        note = self.new_note(image_upload())
+        self.assertEqual(self.rendition_size(note.photo.name, 'thumb', 'jpg'), ('JPEG', (500, 375)))
+        self.assertEqual(self.rendition_size(note.photo.name, 'thumb', 'webp'), ('WEBP', (500, 375)))
+
+    def test_small_photo_not_enlarged(self):
+        note = self.new_note(image_upload(size=(100, 80)))
+        self.assertEqual(self.rendition_size(note.photo.name, 'thumb', 'jpg'), ('JPEG', (100, 80)))
+
+    def test_transparent_png_photo(self):
+        note = self.new_note(image_upload('gig.png', image_format='PNG', mode='RGBA'))
+        self.assertEqual(self.rendition_size(note.photo.name, 'thumb', 'jpg'), ('JPEG', (500, 375)))
+
+    def test_photo_thumb_urls(self):
+        note = self.new_note(image_upload())
+        self.assertEqual(note.photo_thumb_url, '/media/' + rendition_name(note.photo.name, 'thumb', 'jpg'))
+        self.assertTrue(note.photo_thumb_webp_url.endswith('.thumb.webp'))
+        self.assertEqual(Note.objects.get(pk=1).photo_thumb_url, '')   # no photo
+
+    def test_note_detail_shows_thumbnail(self):
+        note = self.new_note(image_upload())
+        response = self.client.get(reverse('note_detail', kwargs={'note_pk': note.pk}))
+        self.assertContains(response, f'<img src="{note.photo_thumb_url}" data-original="{note.photo.url}" width="250">')
+        self.assertContains(response, f'srcset="{note.photo_thumb_webp_url}"')
+
+    def test_replaced_photo_renditions_removed(self):
+        note = self.new_note(image_upload())
+        old_name = note.photo.name
+        note.photo = image_upload('second.jpg')
+        note.save()
+        self.assertFalse(default_storage.exists(rendition_name(old_name, 'thumb', 'jpg')))
+        self.assertTrue(default_storage.exists(rendition_name(note.photo.name, 'thumb', 'jpg')))
+
+    def test_deleted_note_renditions_removed(self):
+        note = self.new_note(image_upload())
+        name = note.photo.name
+        note.delete()
+        self.assertFalse(default_storage.exists(rendition_name(name, 'thumb', 'webp')))
+
+    def test_unreadable_image_saved_without_renditions(self):
+        with self.assertLogs(level='ERROR'):
+            note = self.new_note(SimpleUploadedFile('broken.jpg', b'not an image', content_type='image/jpeg'))
+        self.assertTrue(default_storage.exists(note.photo.name))
+        self.assertFalse(default_storage.exists(rendition_name(note.photo.name, 'thumb', 'jpg')))
+
+    def test_avatar_renditions_cropped_square(self):
+        profile = Profile.objects.get(user=1)
+        profile.avatar = image_upload('me.jpg')
+        profile.save()
+        self.assertEqual(self.rendition_size(profile.avatar.name, 'thumb', 'jpg'), ('JPEG', (300, 300)))
+        self.assertTrue(profile.avatar_thumb_webp_url.endswith('.thumb.webp'))
+
+    def test_default_avatar_and_renditions_kept(self):
+        create_renditions('default.jpg', 'avatar')
+        profile = Profile.objects.get(user=1)
+        profile.avatar = image_upload('me.jpg')
+        profile.save()
+        profile.delete()
+        self.assertTrue(default_storage.exists('default.jpg'))
+        self.assertTrue(default_storage.exists('default.thumb.jpg'))
+
+    def test_backfill_makes_missing_renditions(self):
+        note = self.new_note(image_upload())
+        thumb = rendition_name(note.photo.name, 'thumb', 'jpg')
+        default_storage.delete(thumb)
+        out = StringIO()
+        call_command('backfill_renditions', stdout=out)
+        self.assertTrue(default_storage.exists(thumb))
+        self.assertIn('photo: made renditions of 1 images', out.getvalue())
+        self.assertIn('avatar: made renditions of 1 images', out.getvalue())   # the default avatar
+        self.assertTrue(default_storage.exists('default.thumb.webp'))
+
+    def test_backfill_skips_images_with_renditions(self):
+        self.new_note(image_upload())
+        out = StringIO()
+        call_command('backfill_renditions', stdout=out)
+        self.assertIn('photo: made renditions of 0 images', out.getvalue())
+        call_command('backfill_renditions', '--force', stdout=out)
+        self.assertIn('photo: made renditions of 1 images', out.getvalue())
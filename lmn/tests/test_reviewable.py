@@ -0,0 +1,107 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from lmn.models import Show
+from lmn.reviewable import reviewable_shows
+from lmn.tests.factories import make_user, make_show, make_note
+
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class TestReviewableShows(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user()
+        cls.reviewed = make_show(days_ago=1)
+        make_note(show=cls.reviewed, user=cls.user)
+        cls.older = make_show(days_ago=10)
+        cls.newer = make_show(days_ago=2)
+        cls.future = make_show(days_ago=-1)
+        # reviewed by someone else, still reviewable by user
+        cls.reviewed_by_other = make_show(days_ago=5)
+        make_note(show=cls.reviewed_by_other)
+
+    def test_past_shows_not_reviewed_yet_most_recent_first(self):
+        with self.assertNumQueries(1):
+            shows = list(Show.objects.reviewable_by(self.user))
+            self.assertEqual(shows, [self.newer, self.reviewed_by_other, self.older])
+            self.assertEqual(shows[0].artist, self.newer.artist)
+
+    def test_review_status(self):
+        with self.assertNumQueries(1):
+            statuses = {show.pk: (show.is_past, show.user_note_pk)
+                        for show in Show.objects.review_status(self.user).select_related('artist', 'venue')}
+        self.assertEqual(statuses[self.reviewed.pk], (True, self.user.note_set.get().pk))
+        self.assertEqual(statuses[self.older.pk], (True, None))
+        self.assertEqual(statuses[self.future.pk], (False, None))
+
+    def test_pages(self):
+        first = reviewable_shows(self.user, per_page=2)
+        self.assertEqual(list(first), [self.newer, self.reviewed_by_other])
+        self.assertFalse(first.has_previous())
+        second = reviewable_shows(self.user, cursor=first.next_cursor, per_page=2)
+        self.assertEqual(list(second), [self.older])
+        self.assertFalse(second.has_next())
+        self.assertEqual(list(reviewable_shows(self.user, cursor='not a cursor', per_page=2)), list(first))
+
+    @override_settings(CACHES=LOCMEM_CACHE)
+    def test_cached_until_a_note_is_written(self):
+        cache.clear()
+        reviewable_shows(self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(len(reviewable_shows(self.user)), 3)
+        make_note(show=self.newer, user=self.user)
+        self.assertEqual(list(reviewable_shows(self.user)), [self.reviewed_by_other, self.older])
+
+    def test_page(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('shows_to_review'))
+        self.assertEqual(list(response.context['shows']), [self.newer, self.reviewed_by_other, self.older])
+        self.assertContains(response, reverse('new_note', kwargs={'show_pk': self.older.pk}))
+        self.assertNotContains(response, reverse('new_note', kwargs={'show_pk': self.reviewed.pk}))
+
+    def test_linked_from_own_profile(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('user_profile', kwargs={'user_pk': self.user.pk}))
+        self.assertContains(response, reverse('shows_to_review'))
+        other = make_user()
+        response = self.client.get(reverse('user_profile', kwargs={'user_pk': other.pk}))
+        self.assertNotContains(response, reverse('shows_to_review'))
+
+
+class TestNewNoteChecksShowOnce(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user()
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_saving_a_note_fetches_the_show_once(self):
+        show = make_show()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('new_note', kwargs={'show_pk': show.pk}),
+                                        {'title': 'Loud', 'text': 'Great'})
+        show_selects = [query['sql'] for query in queries if query['sql'].startswith('SELECT')
+                        and 'FROM "lmn_show"' in query['sql']]
+        self.assertEqual(len(show_selects), 1, show_selects)
+        self.assertRedirects(response, reverse('note_detail', kwargs={'note_pk': self.user.note_set.get().pk}),
+                             fetch_redirect_response=False)
+
+    def test_already_reviewed_shows_the_note(self):
+        note = make_note(user=self.user)
+        response = self.client.get(reverse('new_note', kwargs={'show_pk': note.show_id}))
+        self.assertEqual(response.context['note'], note)
+        self.assertContains(response, 'You already created a note for this show.')
+
+    def test_future_show_redirects(self):
+        show = make_show(days_ago=-1)
+        response = self.client.get(reverse('new_note', kwargs={'show_pk': show.pk}))
+        self.assertRedirects(response, reverse('notes_for_show', kwargs={'show_pk': show.pk}),
+                             fetch_redirect_response=False)
@@ -0,0 +1,91 @@
+from django.test import TestCase
+from django.urls import reverse
+from django.db import connection
+
+from lmn.models import Artist, Venue, Note
+from lmn.search import search, backend_for, SQLiteSearchBackend
+from lmn.tests.factories import make_note
+from lmn.forms import ArtistSearchForm, NoteSearchForm
+
+
+class TestSearchIndex(TestCase):
+
+    fixtures = ['testing_users', 'testing_artists', 'testing_venues', 'testing_shows', 'testing_notes']
+
+    def test_local_database_uses_fts_backend(self):
+        backend = backend_for('default')
+        self.assertIsInstance(backend, SQLiteSearchBackend)
+        self.assertTrue(backend.available())
+
+    def test_fixtures_are_indexed(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT count(*) FROM lmn_artist_fts')
+            self.assertEqual(cursor.fetchone()[0], Artist.objects.count())
+
+    def test_renamed_artist_found_by_new_name_only(self):
+        artist = Artist.objects.get(name='REM')
+        artist.name = 'Automatic for the People'
+        artist.save()
+        self.assertEqual(list(search(Artist.objects.all(), 'automatic')), [artist])
+        self.assertEqual(list(search(Artist.objects.all(), 'REM')), [])
+
+    def test_deleted_venue_removed_from_index(self):
+        Venue.objects.get(name='Target Center').delete()
+        self.assertEqual(list(search(Venue.objects.all(), 'Target')), [])
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT count(*) FROM lmn_venue_fts')
+            self.assertEqual(cursor.fetchone()[0], Venue.objects.count())
+
+    def test_match_in_the_middle_of_a_word(self):
+        self.assertEqual([venue.name for venue in search(Venue.objects.all(), 'arget')], ['Target Center'])
+
+    def test_short_terms_still_match(self):
+        artists = search(Artist.objects.all(), 'e')
+        self.assertEqual(sorted(artist.name for artist in artists), ['REM', 'Yes'])
+
+    def test_search_syntax_in_term_is_treated_as_text(self):
+        for term in ['"', 'REM OR Yes', 'RE*', 'name:REM', '(AND)']:
+            list(search(Artist.objects.all(), term))  # no exception
+
+    def test_blank_term_matches_nothing(self):
+        self.assertEqual(list(search(Artist.objects.all(), '   ')), [])
+
+
+class TestNoteSearch(TestCase):
+
+    fixtures = ['testing_users', 'testing_artists', 'testing_venues', 'testing_shows', 'testing_notes']
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.title_match = make_note(show_id=3, user_id=1, title='Thunderstruck', text='Loud.')
+        cls.text_match = make_note(show_id=2, user_id=1, title='Good night', text='They opened with thunderstruck')
+
+    def test_title_match_ranked_above_text_match(self):
+        notes = search(Note.objects.all(), 'thunder')
+        self.assertEqual(list(notes), [self.title_match, self.text_match])
+
+    def test_edited_note_text_is_searchable(self):
+        self.title_match.text = 'Best encore ever'
+        self.title_match.save()
+        self.assertEqual(list(search(Note.objects.all(), 'encore')), [self.title_match])
+
+    def test_note_search_view(self):
+        response = self.client.get(reverse('latest_notes'), {'search_text': 'thunder'})
+        self.assertEqual(list(response.context['notes']), [self.title_match, self.text_match])
+        self.assertContains(response, "Notes matching 'thunder'")
+        self.assertTemplateUsed(response, 'lmn/notes/note_list.html')
+
+    def test_note_search_view_no_results(self):
+        response = self.client.get(reverse('latest_notes'), {'search_text': 'accordion'})
+        self.assertEqual(len(response.context['notes']), 0)
+        self.assertContains(response, 'No notes found')
+
+    def test_note_search_form_results(self):
+        form = NoteSearchForm({'search_text': 'thunder'})
+        self.assertTrue(form.is_valid())
+        self.assertEqual(list(form.results()), [self.title_match, self.text_match])
+
+    def test_artist_search_form_results(self):
+        form = ArtistSearchForm({'search_name': 'ACD'})
+        self.assertTrue(form.is_valid())
+        self.assertEqual([artist.name for artist in form.results()], ['ACDC'])
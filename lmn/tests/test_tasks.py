@@ -0,0 +1,158 @@
+from django.test import TestCase, override_settings
+from django.core.files.storage import default_storage
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from lmn.models import Note, Show, Profile, Task
+from lmn.renditions import rendition_name
+from lmn import tasks
+from lmn.tests.test_renditions import image_upload
+
+from datetime import timedelta
+from io import StringIO
+import shutil
+import tempfile
+
+
+failures = []
+
+
+@tasks.task
+def flaky_test_task(fail_times):
+    # fails the first fail_times times it runs
+    failures.append(1)
+    if len(failures) <= fail_times:
+        raise IOError('storage unavailable')
+
+
+@override_settings(TASKS_EAGER=False, TASK_MAX_ATTEMPTS=3, TASK_RETRY_SECONDS=10)
+class TestTaskQueue(TestCase):
+
+    fixtures = ['testing_users', 'testing_artists', 'testing_venues', 'testing_shows', 'testing_notes']
+
+    def setUp(self):
+        failures.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+
+    def new_note(self):
+        return Note.objects.create(show=Show.objects.get(pk=3), user=User.objects.get(pk=2),
+                                   title='Great', text='Loud', photo=image_upload())
+
+    def make_due(self):
+        Task.objects.update(run_after=timezone.now())
+
+    def test_unknown_task_not_queued(self):
+        with self.assertRaises(ValueError):
+            tasks.enqueue('no_such_task')
+
+    def test_upload_queues_renditions(self):
+        note = self.new_note()
+        thumb = rendition_name(note.photo.name, 'thumb', 'jpg')
+        self.assertFalse(default_storage.exists(thumb))
+        self.assertEqual(Task.objects.get().name, 'make_renditions')
+        self.assertEqual(tasks.run_pending(), 1)
+        self.assertTrue(default_storage.exists(thumb))
+        self.assertEqual(Task.objects.count(), 0)
+
+    def test_delete_note_queues_photo_delete(self):
+        note = self.new_note()
+        tasks.run_pending()
+        name = note.photo.name
+        note.delete()
+        self.assertTrue(default_storage.exists(name))
+        tasks.run_pending()
+        self.assertFalse(default_storage.exists(name))
+        self.assertFalse(default_storage.exists(rendition_name(name, 'thumb', 'webp')))
+
+    def test_replaced_avatar_deleted_by_worker(self):
+        profile = Profile.objects.get(user=1)
+        profile.avatar = image_upload('first.jpg')
+        profile.save()
+        first = profile.avatar.name
+        profile.avatar = image_upload('second.jpg')
+        profile.save()
+        self.assertEqual(list(Task.objects.order_by('id').values_list('name', flat=True)),
+                         ['make_renditions', 'delete_image', 'make_renditions'])
+        tasks.run_pending()
+        self.assertFalse(default_storage.exists(first))
+        self.assertTrue(default_storage.exists(rendition_name(profile.avatar.name, 'thumb', 'jpg')))
+
+    def test_renditions_of_deleted_image_skipped(self):
+        note = self.new_note()
+        note.delete()
+        self.assertEqual(tasks.run_pending(), 2)
+        self.assertEqual(default_storage.listdir('user_images'), ([], []))
+
+    def run_failing(self):
+        with self.assertLogs(level='ERROR'):
+            return tasks.run_pending()
+
+    def test_failed_task_retried_with_backoff(self):
+        tasks.enqueue('flaky_test_task', fail_times=2)
+        self.assertEqual(self.run_failing(), 1)
+        queued = Task.objects.get()
+        self.assertEqual((queued.status, queued.attempts), (Task.PENDING, 1))
+        self.assertIn('storage unavailable', queued.last_error)
+        self.assertGreater(queued.run_after, timezone.now() + timedelta(seconds=9))
+        self.assertEqual(tasks.run_pending(), 0)   # not due yet
+
+        self.make_due()
+        self.run_failing()
+        queued.refresh_from_db()
+        self.assertEqual(queued.attempts, 2)
+        self.assertGreater(queued.run_after, timezone.now() + timedelta(seconds=19))   # doubled
+
+        self.make_due()
+        tasks.run_pending()
+        self.assertEqual(Task.objects.count(), 0)   # succeeded, and removed
+
+    def test_task_failed_after_max_attempts(self):
+        tasks.enqueue('flaky_test_task', fail_times=10)
+        for attempt in range(3):
+            self.make_due()
+            self.run_failing()
+        queued = Task.objects.get()
+        self.assertEqual((queued.status, queued.attempts), (Task.FAILED, 3))
+        self.make_due()
+        self.assertEqual(tasks.run_pending(), 0)
+
+    def test_unregistered_task_fails_without_retry(self):
+        Task.objects.create(name='removed_task')
+        self.run_failing()
+        self.assertEqual(Task.objects.get().status, Task.FAILED)
+
+    def test_task_claimed_once(self):
+        tasks.enqueue('flaky_test_task', fail_times=0)
+        self.assertIsNotNone(tasks.claim())
+        self.assertIsNone(tasks.claim())
+
+    def test_stale_running_task_requeued(self):
+        tasks.enqueue('flaky_test_task', fail_times=0)
+        tasks.claim()
+        self.assertEqual(tasks.requeue_stale(), 0)
+        Task.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(tasks.requeue_stale(), 1)
+        self.assertEqual(tasks.run_pending(), 1)
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_task_queued_if_it_fails(self):
+        self.assertIsNone(tasks.enqueue('flaky_test_task', fail_times=0))
+        with self.assertLogs(level='ERROR'):
+            queued = tasks.enqueue('flaky_test_task', fail_times=5)
+        self.assertEqual((queued.status, queued.attempts), (Task.PENDING, 1))
+
+    def test_run_tasks_command(self):
+        default_storage.save('old.jpg', ContentFile(b'old'))
+        tasks.enqueue('delete_image', name='old.jpg', field_name='photo')
+        out = StringIO()
+        call_command('run_tasks', '--once', stdout=out)
+        self.assertIn('ran 1 tasks', out.getvalue())
+        self.assertFalse(default_storage.exists('old.jpg'))
@@ -0,0 +1,44 @@
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import SimpleTestCase
+
+from lmnop_project import test_runner
+
+
+class TestMediaRoot(SimpleTestCase):
+
+    def test_tests_save_files_outside_media(self):
+        self.assertNotEqual(os.path.realpath(settings.MEDIA_ROOT), os.path.join(settings.BASE_DIR, 'media'))
+        self.assertTrue(os.path.exists(os.path.join(settings.MEDIA_ROOT, 'default.jpg')))
+        name = default_storage.save('test_runner.txt', ContentFile(b'saved'))
+        try:
+            self.assertTrue(os.path.exists(os.path.join(settings.MEDIA_ROOT, name)))
+            self.assertFalse(os.path.exists(os.path.join(settings.BASE_DIR, 'media', name)))
+        finally:
+            default_storage.delete(name)
+
+    def test_each_worker_has_its_own_media_root(self):
+        roots = [test_runner.make_media_root(settings.MEDIA_ROOT, f'test_worker{number}') for number in (1, 2)]
+        self.assertNotEqual(roots[0], roots[1])
+        for root in roots:
+            self.assertEqual(sorted(os.listdir(root)), sorted(test_runner.MEDIA_DEFAULTS))
+
+
+class TestTimingReport(SimpleTestCase):
+
+    def test_compares_with_last_run_in_one_process(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'timings.json')
+            self.assertIsNone(test_runner.record_timing('lmn.tests (10 tests)', 4, 2.0, path))
+            self.assertEqual(test_runner.record_timing('lmn.tests (10 tests)', 1, 6.0, path), 6.0)
+            self.assertEqual(test_runner.record_timing('lmn.tests (10 tests)', 4, 2.0, path), 6.0)
+            self.assertIsNone(test_runner.record_timing('lmn.tests (12 tests)', 4, 2.0, path))
+
+    def test_report(self):
+        self.assertEqual(test_runner.timing_report(4, 2.0, 6.0), 'Ran in 2.0s with 4 processes, 6.0s with 1 process: 3.0x faster')
+        self.assertEqual(test_runner.timing_report(4, 2.0, None), 'Ran in 2.0s with 4 processes, run them without --parallel to compare')
+        self.assertEqual(test_runner.timing_report(1, 6.0, 6.0), 'Ran in 6.0s with 1 process')
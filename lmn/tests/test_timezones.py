@@ -0,0 +1,82 @@
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from django.core.exceptions import ValidationError
+from django.contrib.auth.models import User
+
+from lmn.models import Note, Show, Venue, Profile
+from lmn.timezones import get_zone, zone_or_default, validate_time_zone, SESSION_KEY
+
+
+def display(value, zone_name):
+    """ value as Django's default DATETIME_FORMAT shows it in zone_name, e.g. Feb. 12, 2018, 9:45 p.m. """
+    local = value.astimezone(get_zone(zone_name))
+    return local.strftime('%b. %d, %Y, %I:%M %p').replace(' 0', ' ').replace('AM', 'a.m.').replace('PM', 'p.m.')
+
+
+class TestZones(TestCase):
+
+    def test_zone_made_once(self):
+        self.assertIs(get_zone('Asia/Tokyo'), get_zone('Asia/Tokyo'))
+
+    def test_unknown_zone(self):
+        self.assertIsNone(get_zone('Mars/Olympus_Mons'))
+        self.assertEqual(zone_or_default('Mars/Olympus_Mons').key, 'America/Chicago')
+        self.assertEqual(zone_or_default('').key, 'America/Chicago')
+        with self.assertRaises(ValidationError):
+            validate_time_zone('Mars/Olympus_Mons')
+        validate_time_zone('')
+
+    def test_zone_usable_for_date_lookups(self):
+        Venue.objects.create(name='Night Club', city='Minneapolis', state='MN')
+        with timezone.override(get_zone('America/Chicago')):
+            self.assertEqual(timezone.get_current_timezone_name(), 'America/Chicago')
+            self.assertEqual(Venue.objects.filter(updated_at__date=timezone.localdate()).count(), 1)
+
+
+class TestDisplayedTimes(TestCase):
+
+    fixtures = ['testing_users', 'testing_artists', 'testing_venues', 'testing_shows', 'testing_notes']
+
+    def test_show_date_in_venue_time_zone(self):
+        venue = Venue.objects.get(pk=1)
+        venue.time_zone = 'America/New_York'
+        venue.save()
+        show = Show.objects.filter(venue=venue).first()
+        response = self.client.get(reverse('artists_at_venue', kwargs={'venue_pk': 1}))
+        self.assertContains(response, display(show.show_date, 'America/New_York'))
+        self.assertNotContains(response, display(show.show_date, 'America/Chicago'))
+
+    def test_note_time_in_user_time_zone(self):
+        profile = Profile.objects.get(pk=1)
+        profile.time_zone = 'Asia/Tokyo'
+        profile.save()
+        self.client.force_login(User.objects.get(pk=1))
+        note = Note.objects.filter(user=1).first()
+        response = self.client.get(reverse('user_profile', kwargs={'user_pk': 1}))
+        self.assertContains(response, display(note.posted_date, 'Asia/Tokyo'))
+        # shows are still in their venue's zone
+        self.assertContains(response, display(note.show.show_date, 'America/Chicago'))
+
+    def test_public_pages_in_default_time_zone(self):
+        profile = Profile.objects.get(pk=1)
+        profile.time_zone = 'Asia/Tokyo'
+        profile.save()
+        self.client.force_login(User.objects.get(pk=1))
+        note = Note.objects.get(pk=1)
+        response = self.client.get(reverse('note_detail', kwargs={'note_pk': 1}))
+        self.assertContains(response, display(note.posted_date, 'America/Chicago'))
+
+    def test_time_zone_kept_in_session_at_login(self):
+        Profile.objects.filter(pk=1).update(time_zone='Europe/Paris')
+        self.client.force_login(User.objects.get(pk=1))
+        self.assertEqual(self.client.session[SESSION_KEY], 'Europe/Paris')
+
+    def test_time_zone_read_once_for_older_sessions(self):
+        self.client.force_login(User.objects.get(pk=1))
+        session = self.client.session
+        del session[SESSION_KEY]
+        session.save()
+        Profile.objects.filter(pk=1).update(time_zone='Europe/Paris')
+        self.client.get(reverse('user_profile', kwargs={'user_pk': 1}))
+        self.assertEqual(self.client.session[SESSION_KEY], 'Europe/Paris')
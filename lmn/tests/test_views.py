@@ -12,8 +12,10 @@ import datetime
 from datetime import timezone
 from django.utils import timezone as django_timezone
 import pytz
+from unittest.mock import patch
 
-from lmn.models import Note, Show, Venue
+from lmn.models import Note, Show, Venue, Artist
+from lmn.tests.factories import make_user, make_show, make_note
 from django.contrib.auth.models import User
 
 
@@ -123,7 +125,7 @@ class TestArtistViews(TestCase):
 
         url = reverse('venues_for_artist', kwargs={'artist_pk': 1})
         response = self.client.get(url)
-        shows = list(response.context['shows'].all())
+        shows = list(response.context['shows'])
         show1, show2 = shows[0], shows[1]
         self.assertEqual(2, len(shows))
 
@@ -144,7 +146,7 @@ class TestArtistViews(TestCase):
 
         url = reverse('venues_for_artist', kwargs={'artist_pk': 2})
         response = self.client.get(url)
-        shows = list(response.context['shows'].all())
+        shows = list(response.context['shows'])
         show1 = shows[0]
         self.assertEqual(1, len(shows))
 
@@ -158,7 +160,7 @@ class TestArtistViews(TestCase):
 
         url = reverse('venues_for_artist', kwargs={'artist_pk': 3})
         response = self.client.get(url)
-        shows = list(response.context['shows'].all())
+        shows = list(response.context['shows'])
         self.assertEqual(0, len(shows))
 
     def test_no_links_to_notes_for_future_shows_by_artist(self):
@@ -282,7 +284,7 @@ class TestVenues(TestCase):
 
         url = reverse('artists_at_venue', kwargs={'venue_pk': 2})
         response = self.client.get(url)
-        shows = list(response.context['shows'].all())
+        shows = list(response.context['shows'])
         show1, show2 = shows[0], shows[1]
         self.assertEqual(2, len(shows))
 
@@ -301,7 +303,7 @@ class TestVenues(TestCase):
 
         url = reverse('artists_at_venue', kwargs={'venue_pk': 1})
         response = self.client.get(url)
-        shows = list(response.context['shows'].all())
+        shows = list(response.context['shows'])
         show1 = shows[0]
         self.assertEqual(1, len(shows))
 
@@ -314,7 +316,7 @@ class TestVenues(TestCase):
 
         url = reverse('artists_at_venue', kwargs={'venue_pk': 3})
         response = self.client.get(url)
-        shows = list(response.context['shows'].all())
+        shows = list(response.context['shows'])
         self.assertEqual(0, len(shows))
 
     def test_no_links_to_notes_for_future_shows_at_venue(self):
@@ -729,6 +731,126 @@ class TestNotes(TestCase):
         self.assertTemplateUsed(response, 'lmn/notes/new_note.html')
 
 
+class TestNoteListQueryCounts(TestCase):
+    # Pages listing notes should run the same number of queries however many notes there are
+    fixtures = ['testing_users', 'testing_artists', 'testing_venues', 'testing_shows', 'testing_notes']
+
+    def add_notes(self, count, user=None):
+        # one new show per note, so the same user can write all of them if needed
+        artist, venue = Artist.objects.first(), Venue.objects.first()
+        for n in range(count):
+            show = make_show(artist=artist, venue=venue, days_ago=n + 1)
+            make_note(show=show, user=user or make_user(), title=f'note {n}', text='great show ' * 50)
+
+    def test_latest_notes_query_count_does_not_grow_with_notes(self):
+        with self.assertNumQueries(1):
+            self.client.get(reverse('latest_notes'))
+        self.add_notes(8)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('latest_notes'))
+        self.assertEqual(len(response.context['notes']), 10)
+
+    def test_notes_for_show_query_count_does_not_grow_with_notes(self):
+        show = Show.objects.get(pk=3)
+        url = reverse('notes_for_show', kwargs={'show_pk': show.pk})
+        with self.assertNumQueries(2):  # the show, then its notes
+            self.client.get(url)
+        for n in range(8):
+            user = User.objects.create(username=f'listener{n}', email=f'listener{n}@example.com')
+            Note.objects.create(show=show, user=user, title=f'note {n}', text='great show')
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(len(response.context['notes']), 8)
+
+    def test_user_profile_query_count_does_not_grow_with_notes(self):
+        user = User.objects.get(pk=1)
+        url = reverse('user_profile', kwargs={'user_pk': user.pk})
+        # when the page last changed, for conditional GETs, the user with their profile, then their notes
+        with self.assertNumQueries(3):
+            self.client.get(url)
+        self.add_notes(8, user=user)
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(len(response.context['notes']), 9)
+
+    def test_note_preview_matches_truncated_text(self):
+        self.add_notes(1)
+        response = self.client.get(reverse('latest_notes'))
+        note = Note.objects.get(title='note 0')
+        self.assertContains(response, note.text[:99] + '…')
+        self.assertNotContains(response, note.text[:100])
+
+
+class TestShowLists(TestCase):
+    # Shows at a venue and shows for an artist, 20 a page, with the same number of queries however many shows
+    fixtures = ['testing_users', 'testing_artists', 'testing_venues', 'testing_shows', 'testing_notes']
+
+    def add_shows(self, count, days_from_now=-1):
+        # shows for artist 1 at venue 1, a day apart
+        Show.objects.bulk_create([
+            Show(artist_id=1, venue_id=1, show_date=django_timezone.now() + datetime.timedelta(days=days_from_now - n))
+            for n in range(count)
+        ])
+
+    def test_shows_at_venue_query_count_does_not_grow_with_shows(self):
+        url = reverse('artists_at_venue', kwargs={'venue_pk': 1})
+        with self.assertNumQueries(2):  # the venue, then a page of shows with their artists
+            self.client.get(url)
+        self.add_shows(30)
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(len(response.context['shows']), 20)
+
+    def test_shows_for_artist_query_count_does_not_grow_with_shows(self):
+        url = reverse('venues_for_artist', kwargs={'artist_pk': 1})
+        self.add_shows(30)
+        with self.assertNumQueries(2):  # the artist, then a page of shows with their venues
+            response = self.client.get(url)
+        self.assertEqual(len(response.context['shows']), 20)
+
+    def test_shows_paginated_most_recent_first(self):
+        self.add_shows(25)
+        url = reverse('venues_for_artist', kwargs={'artist_pk': 1})
+        first = self.client.get(url).context['shows']
+        self.assertContains(self.client.get(url), f'?cursor={first.next_cursor}')
+        second = self.client.get(url, {'cursor': first.next_cursor}).context['shows']
+        shows = list(first) + list(second)
+        self.assertEqual(len(shows), 27)   # and the 2 shows in the fixtures
+        self.assertEqual(shows, sorted(shows, key=lambda show: show.show_date, reverse=True))
+        self.assertFalse(second.has_next())
+
+    def test_future_shows_have_no_note_links(self):
+        self.add_shows(1, days_from_now=10)
+        future = Show.objects.get(show_date__gt=django_timezone.now())
+        response = self.client.get(reverse('artists_at_venue', kwargs={'venue_pk': 1}))
+        shows = {show.pk: show for show in response.context['shows']}
+        self.assertFalse(shows[future.pk].is_past)
+        self.assertTrue(shows[3].is_past)
+        self.assertNotContains(response, reverse('new_note', kwargs={'show_pk': future.pk}))
+        self.assertContains(response, reverse('new_note', kwargs={'show_pk': 3}))
+
+    def test_shows_as_json(self):
+        self.add_shows(25)
+        url = reverse('artists_at_venue', kwargs={'venue_pk': 1})
+        data = self.client.get(url, {'format': 'json'}).json()
+        self.assertEqual(len(data['shows']), 20)
+        show = data['shows'][0]
+        self.assertEqual(set(show), {'id', 'show_date', 'artist', 'venue', 'in_past', 'note_count',
+                                     'notes_url', 'new_note_url'})
+        self.assertEqual(show['venue'], 'First Avenue')
+        self.assertTrue(data['next'].startswith(url + '?format=json&cursor='))
+
+        rest = self.client.get(data['next']).json()
+        self.assertEqual(len(rest['shows']), 6)
+        self.assertIsNone(rest['next'])
+        ids = [show['id'] for show in data['shows'] + rest['shows']]
+        self.assertEqual(len(set(ids)), 26)
+
+    def test_missing_venue_or_artist_is_404(self):
+        self.assertEqual(self.client.get(reverse('artists_at_venue', kwargs={'venue_pk': 100})).status_code, 404)
+        self.assertEqual(self.client.get(reverse('venues_for_artist', kwargs={'artist_pk': 100})).status_code, 404)
+
+
 class TestUserAuthentication(TestCase):
     """ Some aspects of registration (e.g. missing data, duplicate username) covered in test_forms """
     """ Currently using much of Django's built-in login and registration system """
@@ -847,23 +969,29 @@ class TestLogoutPage(TestCase):
 class TestPaginationLessThan11Users(TestCase):
     fixtures = ['testing_artists'] 
 
-    # from https://stackoverflow.com/questions/58964496/django-test-pagination-emptypage
     def test_arists_page_starts_on_page_1(self):
         response = self.client.get(reverse('artist_list'))
-        self.assertEquals(response.context['artists'].number, response.context['artists'].paginator.page(1).number)
+        self.assertFalse(response.context['artists'].has_previous())
 
     def test_venues_page_starts_on_page_1(self):
         response = self.client.get(reverse('venue_list'))
-        self.assertEquals(response.context['venues'].number, response.context['venues'].paginator.page(1).number)
+        self.assertFalse(response.context['venues'].has_previous())
 
     def test_notes_page_starts_on_page_1(self):
         response = self.client.get(reverse('latest_notes'))
-        self.assertEquals(response.context['notes'].number, response.context['notes'].paginator.page(1).number)
+        self.assertFalse(response.context['notes'].has_previous())
     
     def test_no_more_pages_if_less_than_11_artists_in_database(self):
         response = self.client.get(reverse('artist_list'))
         self.assertFalse(response.context['artists'].has_next())
         self.assertFalse(response.context['artists'].has_previous())
+        self.assertNotContains(response, 'cursor=')
+
+    def test_unreadable_cursor_shows_first_page(self):
+        response = self.client.get(reverse('artist_list'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context['artists'].has_previous())
+        self.assertEqual(response.context['artists'][0].name, 'ACDC')
     
 
 class TestPaginationArtistPageMoreThanTenUsers(TestCase):
@@ -878,34 +1006,34 @@ class TestPaginationArtistPageMoreThanTenUsers(TestCase):
     
     def test_2_pages_for_artists_if_more_than_11_less_than_21(self):
         response = self.client.get(reverse('artist_list'))
-        self.assertEquals(response.context['artists'].paginator.num_pages, 2)
+        next_cursor = response.context['artists'].next_cursor
+        self.assertContains(response, f'?cursor={next_cursor}')
+
+        response = self.client.get(reverse('artist_list'), {'cursor': next_cursor})
+        page_two = response.context['artists']
+        self.assertEquals(len(page_two), 2)
+        self.assertFalse(page_two.has_next())
+        self.assertTrue(page_two.has_previous())
+
+    def test_previous_cursor_returns_to_first_page(self):
+        response = self.client.get(reverse('artist_list'))
+        page_one = [artist.pk for artist in response.context['artists']]
+        response = self.client.get(reverse('artist_list'), {'cursor': response.context['artists'].next_cursor})
+        response = self.client.get(reverse('artist_list'), {'cursor': response.context['artists'].previous_cursor})
+        self.assertEqual([artist.pk for artist in response.context['artists']], page_one)
+        self.assertFalse(response.context['artists'].has_previous())
+        self.assertTrue(response.context['artists'].has_next())
 
     def test_artist_page_more_than_11_users_starts_on_page_1(self):
         response = self.client.get(reverse('artist_list'))
-        self.assertEquals(response.context['artists'].number, response.context['artists'].paginator.page(1).number)
-        self.assertNotEquals(response.context['artists'].number, response.context['artists'].paginator.page(2).number)
+        self.assertFalse(response.context['artists'].has_previous())
         
     def test_first_ten_artists_are_on_first_page(self):
         response = self.client.get(reverse('artist_list'))
-        # gets first page
-        page_one = response.context['artists'].paginator.get_page(1)
-
-        # gets a list of the page object's values returns a query set
-        # there are ten items in the object for 10 artisists in the list on page
         # arranged alphabetically starting with capitolized first
-        page_one_list = page_one.paginator.object_list.values()
-
-        # from https://stackoverflow.com/questions/59199820/typeerror-dict-values-object-is-not-subscriptable?noredirect=1&lq=1
-        # puts dict_values object in a list so I can access the elements in it
-        # page_one_list[0].values() returns a dict_values obj with the artist in the 0 position of the list
-        aritst_0__dict = list(page_one_list[0].values())
-        # accessing the [1] item in the list, the artist
-        artist_in_position_0 = aritst_0__dict[1]
-        self.assertEquals(artist_in_position_0, 'ACDC')
-        
-        aritst_1__dict = list(page_one_list[1].values())
-        artist_in_position_1 = aritst_1__dict[1]
-        self.assertEquals(artist_in_position_1, 'REM')
+        page_one = response.context['artists']
+        self.assertEquals(page_one[0].name, 'ACDC')
+        self.assertEquals(page_one[1].name, 'REM')
     
 class TestPaginationVenuesPageMoreThanTenUsers(TestCase):
     fixtures = ['testing_many_venues']
@@ -920,21 +1048,18 @@ class TestPaginationVenuesPageMoreThanTenUsers(TestCase):
     
     def test_2_pages_for_venues_if_more_than_11_less_than_21(self):
         response = self.client.get(reverse('venue_list'))
-        self.assertEquals(response.context['venues'].paginator.num_pages, 2)
+        response = self.client.get(reverse('venue_list'), {'cursor': response.context['venues'].next_cursor})
+        self.assertEquals(len(response.context['venues']), 2)
+        self.assertFalse(response.context['venues'].has_next())
 
     def test_venues_page_more_than_11_users_starts_on_page_1(self):
         response = self.client.get(reverse('venue_list'))
-        self.assertEquals(response.context['venues'].number, response.context['venues'].paginator.page(1).number)
-        self.assertNotEquals(response.context['venues'].number, response.context['venues'].paginator.page(2).number)
+        self.assertFalse(response.context['venues'].has_previous())
 
     def test_first_ten_venues_are_on_first_page(self):
         response = self.client.get(reverse('venue_list'))
-        page_one = response.context['venues'].paginator.get_page(1)
-        page_one_list = page_one.paginator.object_list.values()
-        venue_0_dict = list(page_one_list[0].values())
-        venue_in_position_0 = venue_0_dict[1]
         # arranged alphabetically
-        self.assertEquals(venue_in_position_0, 'Excel energy center')
+        self.assertEquals(response.context['venues'][0].name, 'Excel energy center')
         
 
 class TestPaginationNotesPageMoreThanTenUsers(TestCase):
@@ -950,10 +1075,39 @@ class TestPaginationNotesPageMoreThanTenUsers(TestCase):
     
     def test_2_pages_for_notes_if_more_than_11_less_than_21(self):
         response = self.client.get(reverse('latest_notes'))
-        self.assertEquals(response.context['notes'].paginator.num_pages, 2)
+        page_one = [note.pk for note in response.context['notes']]
+        response = self.client.get(reverse('latest_notes'), {'cursor': response.context['notes'].next_cursor})
+        page_two = [note.pk for note in response.context['notes']]
+        self.assertEquals(len(page_two), 2)
+        self.assertFalse(response.context['notes'].has_next())
+        # every note shown exactly once, most recent first
+        all_notes = list(Note.objects.order_by('-posted_date', '-pk').values_list('pk', flat=True))
+        self.assertEquals(page_one + page_two, all_notes)
 
     def test_notes_page_more_than_11_users_starts_on_page_1(self):
         response = self.client.get(reverse('latest_notes'))
-        self.assertEquals(response.context['notes'].number, response.context['notes'].paginator.page(1).number)
-        self.assertNotEquals(response.context['notes'].number, response.context['notes'].paginator.page(2).number)
+        self.assertFalse(response.context['notes'].has_previous())
 
+    def test_notes_pages_do_not_count_notes(self):
+        response = self.client.get(reverse('latest_notes'))
+        with self.assertNumQueries(1):
+            self.client.get(reverse('latest_notes'), {'cursor': response.context['notes'].next_cursor})
+
+
+class TestEditDeletedNote(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.note = make_note()
+
+    def test_note_deleted_while_editing(self):
+        self.client.force_login(self.note.user)
+        loaded = Note.objects.get(pk=self.note.pk)
+        Note.objects.filter(pk=self.note.pk).delete()
+        # the note was loaded before another request deleted it
+        with patch('lmn.views.views_notes.get_object_or_404', return_value=loaded):
+            response = self.client.post(reverse('edit_note', kwargs={'note_pk': self.note.pk}),
+                                        {'title': 'Changed', 'text': 'Changed'}, follow=True)
+        self.assertRedirects(response, reverse('latest_notes'))
+        self.assertContains(response, 'This note has been deleted.')
+        self.assertFalse(Note.objects.filter(pk=self.note.pk).exists())
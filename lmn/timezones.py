@@ -0,0 +1,78 @@
+""" The time zones dates are shown in.
+
+A show's date is shown in its venue's time zone, Venue.time_zone. Other times, like when a note
+was posted, are shown in the logged in user's time zone, Profile.time_zone, which
+lmnop_project.timezone.TimezoneDefault activates for each request. A blank time zone means
+settings.DISPLAY_TIME_ZONE.
+
+Zones are zoneinfo objects, made once for each name and kept, so finding one is a dictionary lookup.
+"""
+
+import datetime
+import functools
+
+try:
+    import zoneinfo
+except ImportError:   # Python < 3.9
+    from backports import zoneinfo
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+
+
+# The user's time zone is kept in their session, so it doesn't have to be read from their profile
+SESSION_KEY = 'lmn_time_zone'
+
+
+class Zone(zoneinfo.ZoneInfo):
+    """ A zoneinfo zone Django 3.1 can use as the current time zone.
+
+    Database functions like date lookups and Trunc find the current zone's name with tzname(None),
+    which is None for zoneinfo zones and the name, e.g. 'America/Chicago', for pytz zones.
+    """
+    def tzname(self, dt):
+        return self.key if dt is None else super().tzname(dt)
+
+
+@functools.lru_cache(maxsize=512)
+def get_zone(name):
+    """ The zone called name, e.g. 'America/Chicago', or None if there's no such zone. """
+    try:
+        return Zone(name)
+    except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+        return None
+
+
+def zone_or_default(name):
+    """ The zone called name, or the default zone if name is blank or not a zone. """
+    return (name and get_zone(name)) or get_zone(settings.DISPLAY_TIME_ZONE)
+
+
+def validate_time_zone(name):
+    if name and get_zone(name) is None:
+        raise ValidationError(f'{name} is not a time zone.')
+
+
+@functools.lru_cache(maxsize=1)
+def time_zone_choices():
+    """ Choices for a time zone field, the default first. Listing the zones reads the zone files, so it's done once. """
+    return [('', f'Default ({settings.DISPLAY_TIME_ZONE})')] + \
+        [(name, name.replace('_', ' ')) for name in sorted(zoneinfo.available_timezones())]
+
+
+class LocalDateTime(datetime.datetime):
+    """ A datetime templates display as it is, rather than in the active time zone. """
+    convert_to_local_time = False
+
+
+def local_time(value, zone):
+    """ value, an aware datetime, in zone, for templates. Like the timezone template filter, without pytz. """
+    value = timezone.localtime(value, zone)
+    return LocalDateTime(value.year, value.month, value.day, value.hour, value.minute, value.second,
+                         value.microsecond, value.tzinfo, fold=value.fold)
+
+
+def remember_time_zone(sender, request, user, **kwargs):
+    """ user_logged_in receiver, keeps the user's time zone in their session. """
+    request.session[SESSION_KEY] = user.profile.time_zone
@@ -1,7 +1,7 @@
 from django.urls import path
 from django.contrib.auth import logout, views as auth_views
 
-from .views import views_main, views_artists, views_venues, views_notes, views_users, views_user_logout
+from .views import views_main, views_artists, views_venues, views_notes, views_users, views_user_logout, views_api
 
 
 urlpatterns = [
@@ -21,6 +21,7 @@ urlpatterns = [
     path('notes/add/<int:show_pk>/', views_notes.new_note, name='new_note'),
     path('notes/edit/<int:note_pk>/', views_notes.edit_note, name='edit_note'),
     path('notes/<int:note_pk>/delete', views_notes.delete_note, name='delete_note'),
+    path('notes/<int:note_pk>/controls/', views_notes.note_controls, name='note_controls'),
 
     # Artist related
     path('artists/list/', views_artists.artist_index, name='artist_list'),
@@ -30,6 +31,8 @@ urlpatterns = [
     # User related
     path('user/profile/<int:user_pk>/', views_users.user_profile, name='user_profile'),
     path('user/profile/', views_users.my_user_profile, name='my_user_profile'),
+    path('user/nav/', views_users.nav_account, name='nav_account'),
+    path('user/shows_to_review/', views_users.shows_to_review, name='shows_to_review'),
 
     # Account related
     path('accounts/login/', auth_views.LoginView.as_view(template_name='registration/login.html'), name='login'),
@@ -38,4 +41,8 @@ urlpatterns = [
 
     path('user_logout/', views_user_logout.user_logout,  name='user_logout'),
 
+    # Read-only JSON API
+    path('api/v1/<str:resource_name>/', views_api.api_list, name='api_list'),
+    path('api/v1/<str:resource_name>/<int:pk>/', views_api.api_detail, name='api_detail'),
+
 ]
@@ -0,0 +1,252 @@
+""" Read-only JSON API for artists, venues, shows and notes, at /api/v1/.
+
+    GET /api/v1/shows/?artist=4&fields=show_date,note_count&include=venue
+    GET /api/v1/notes/12/?include=show.artist&fields[artists]=name
+
+Lists are {"data": [...], "next": URL of the next page or null}, paginated with a cursor
+like the HTML pages, 20 objects a page or ?page_size= up to 100. A single object is {"data": {...}}.
+
+fields= chooses the fields returned, and only those columns are read from the database.
+fields[artists]= and so on does the same for included objects.
+
+include= puts related objects in place of their id. Dotted paths include the relations of
+related objects, e.g. include=show.venue for notes. These are joined into the main query.
+A show's notes can be included too, with one more query for the page.
+
+Every response has an ETag and Last-Modified, from the model versions in lmn/cache.py,
+so a client sending If-None-Match or If-Modified-Since gets 304 Not Modified without
+any database queries if nothing it depends on has changed.
+"""
+
+import hashlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import FileField, Prefetch
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import condition, require_safe
+
+from ..cache import cache_version, last_changed
+from ..models import Artist, Venue, Show, Note
+from ..pagination import CursorPaginator, InvalidCursor
+
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Encodes one object at a time, with the json module's C encoder
+ENCODER = DjangoJSONEncoder(separators=(',', ':'))
+
+
+class ApiError(ValueError):
+    """ A request the API can't answer, reported to the client with a 400 response. """
+
+
+class Resource:
+    """ How the API presents one model.
+
+    Args:
+        model ([Model]): the model
+        fields ([tuple]): fields clients can ask for, besides id. Foreign keys are given as the related id.
+        ordering ([tuple]): ordering of lists, ending with pk so cursors are unique
+        depends_on ([tuple]): models whose changes can change the JSON, for the ETag and Last-Modified
+        filters ([tuple]): foreign keys lists can be filtered by, e.g. ?artist=4
+        related ([dict]): foreign key: name of the related resource, which can be included
+        reverse ([dict]): name for include=: (related resource name, related manager, foreign key back to this)
+    """
+
+    def __init__(self, model, fields, ordering, depends_on, filters=(), related=None, reverse=None):
+        self.model = model
+        self.fields = fields
+        self.ordering = ordering
+        self.depends_on = depends_on
+        self.filters = filters
+        self.related = related or {}
+        self.reverse = reverse or {}
+
+
+RESOURCES = {
+    # note counts change with notes
+    'artists': Resource(Artist, ('name', 'note_count'), ('name', 'pk'), (Artist, Note)),
+    'venues': Resource(Venue, ('name', 'city', 'state', 'note_count'), ('name', 'pk'), (Venue, Note)),
+    'shows': Resource(Show, ('show_date', 'artist', 'venue', 'note_count'), ('-show_date', '-pk'),
+                      (Show, Artist, Venue, Note), filters=('artist', 'venue'),
+                      related={'artist': 'artists', 'venue': 'venues'},
+                      reverse={'notes': ('notes', 'note_set', 'show')}),
+    'notes': Resource(Note, ('show', 'user', 'title', 'text', 'posted_date', 'photo'), ('-posted_date', '-pk'),
+                      (Note, Show, Artist, Venue), filters=('show', 'user'),
+                      related={'show': 'shows'}),
+}
+
+
+class ApiQuery:
+    """ The fields and includes asked for by a request for a resource. """
+
+    def __init__(self, request, resource_name):
+        self.request = request
+        self.resource = RESOURCES[resource_name]
+        self.fieldsets = {name: self._fieldset(name) for name in RESOURCES}
+        self.fieldsets[resource_name] = self._fieldset(resource_name, 'fields')
+        self.includes = self._includes(request.GET.get('include', ''))
+
+    def _fieldset(self, resource_name, parameter=None):
+        """ Fields asked for with fields= or fields[resource_name]=, or all of them. """
+        value = self.request.GET.get(parameter or f'fields[{resource_name}]')
+        allowed = RESOURCES[resource_name].fields
+        if value is None:
+            return allowed
+        fields = tuple(name.strip() for name in value.split(',') if name.strip() and name.strip() != 'id')
+        unknown = [name for name in fields if name not in allowed]
+        if unknown:
+            raise ApiError(f'Unknown fields for {resource_name}: {", ".join(unknown)}')
+        return fields
+
+    def _includes(self, value):
+        """ Tree of relations to include, e.g. include=show.artist,show.venue is {'show': {'artist': {}, 'venue': {}}} """
+        tree = {}
+        for path in filter(None, (path.strip() for path in value.split(','))):
+            resource, branch = self.resource, tree
+            for depth, name in enumerate(path.split('.')):
+                if name in resource.related:
+                    resource = RESOURCES[resource.related[name]]
+                elif name in resource.reverse and depth == 0 and '.' not in path:
+                    resource = RESOURCES[resource.reverse[name][0]]
+                else:
+                    raise ApiError(f'Can\'t include {path}')
+                branch = branch.setdefault(name, {})
+        return tree
+
+    def queryset(self):
+        """ A queryset reading only the fields asked for, with the includes joined in or prefetched. """
+        only, select, prefetch = [], [], []
+
+        def add_fields(resource, prefix):
+            only.append(prefix + resource.model._meta.pk.name)
+            only.extend(prefix + name for name in self.fieldsets[self._name(resource)])
+
+        def add_includes(resource, tree, prefix):
+            for name, branch in tree.items():
+                if name in resource.related:
+                    related = RESOURCES[resource.related[name]]
+                    select.append(prefix + name)
+                    only.append(prefix + name)
+                    add_fields(related, prefix + name + '__')
+                    add_includes(related, branch, prefix + name + '__')
+                else:
+                    related_name, manager, foreign_key = resource.reverse[name]
+                    related = RESOURCES[related_name]
+                    objects = related.model.objects.only(foreign_key, *self.fieldsets[related_name]) \
+                        .order_by(*related.ordering)
+                    prefetch.append(Prefetch(manager, queryset=objects, to_attr=f'included_{name}'))
+
+        add_fields(self.resource, '')
+        # the cursor is made from the ordering fields
+        only.extend(name.lstrip('-') for name in self.resource.ordering if name.lstrip('-') != 'pk')
+        add_includes(self.resource, self.includes, '')
+        return self.resource.model.objects.only(*only).select_related(*select).prefetch_related(*prefetch)
+
+    def serialize(self, instance, resource=None, tree=None):
+        """ A dictionary of the fields and includes asked for. """
+        resource = resource or self.resource
+        tree = self.includes if tree is None else tree
+        data = {'id': instance.pk}
+        for name in self.fieldsets[self._name(resource)]:
+            if name not in tree:
+                data[name] = self._value(instance, resource.model._meta.get_field(name))
+        for name, branch in tree.items():
+            if name in resource.related:
+                related = getattr(instance, name)
+                data[name] = self.serialize(related, RESOURCES[resource.related[name]], branch) if related else None
+            else:
+                related = RESOURCES[resource.reverse[name][0]]
+                data[name] = [self.serialize(row, related, {}) for row in getattr(instance, f'included_{name}')]
+        return data
+
+    @staticmethod
+    def _value(instance, field):
+        value = getattr(instance, field.attname)
+        if isinstance(field, FileField):
+            return value.url if value else None
+        return value
+
+    @staticmethod
+    def _name(resource):
+        return next(name for name, candidate in RESOURCES.items() if candidate is resource)
+
+
+def api_etag(request, resource_name, pk=None):
+    """ Changes when the request, or any model the resource depends on, changes. """
+    resource = RESOURCES.get(resource_name)
+    if resource is None:
+        return None
+    version = cache_version(*resource.depends_on)
+    return '"%s"' % hashlib.md5(f'{request.get_full_path()}:{version}'.encode()).hexdigest()
+
+
+def api_last_modified(request, resource_name, pk=None):
+    resource = RESOURCES.get(resource_name)
+    if resource is None:
+        return None
+    return last_changed(*resource.depends_on)
+
+
+def error(message, status=400):
+    return JsonResponse({'error': message}, status=status)
+
+
+def stream_list(rows, next_url):
+    """ Encode {"data": [rows...], "next": next_url} a row at a time. """
+    yield '{"data":['
+    for number, row in enumerate(rows):
+        yield (',' if number else '') + ENCODER.encode(row)
+    yield '],"next":' + ENCODER.encode(next_url) + '}'
+
+
+@require_safe
+@condition(etag_func=api_etag, last_modified_func=api_last_modified)
+def api_list(request, resource_name):
+    """ A page of objects. ?cursor= selects the page, other parameters are described at the top of this module. """
+    if resource_name not in RESOURCES:
+        return error('Not found', 404)
+    try:
+        query = ApiQuery(request, resource_name)
+        queryset = query.queryset()
+        for name in query.resource.filters:
+            value = request.GET.get(name)
+            if value is not None:
+                if not value.isdigit():
+                    raise ApiError(f'{name} must be an id')
+                queryset = queryset.filter(**{name: int(value)})
+        page_size = request.GET.get('page_size', str(PAGE_SIZE))
+        if not page_size.isdigit() or not 1 <= int(page_size) <= MAX_PAGE_SIZE:
+            raise ApiError(f'page_size must be from 1 to {MAX_PAGE_SIZE}')
+        paginator = CursorPaginator(queryset, int(page_size), ordering=query.resource.ordering)
+        page = paginator.page(request.GET.get('cursor'))
+        next_cursor = page.next_cursor
+    except InvalidCursor:
+        return error('Invalid cursor')
+    except ApiError as e:
+        return error(str(e))
+
+    next_url = None
+    if next_cursor:
+        parameters = request.GET.copy()
+        parameters['cursor'] = next_cursor
+        next_url = f'{request.path}?{parameters.urlencode()}'
+    rows = (query.serialize(instance) for instance in page)
+    return StreamingHttpResponse(stream_list(rows, next_url), content_type='application/json')
+
+
+@require_safe
+@condition(etag_func=api_etag, last_modified_func=api_last_modified)
+def api_detail(request, resource_name, pk):
+    """ One object, with the fields and includes described at the top of this module. """
+    if resource_name not in RESOURCES:
+        return error('Not found', 404)
+    try:
+        query = ApiQuery(request, resource_name)
+        instance = query.queryset().filter(pk=pk).first()
+    except ApiError as e:
+        return error(str(e))
+    if instance is None:
+        return error('Not found', 404)
+    return JsonResponse({'data': query.serialize(instance)}, encoder=DjangoJSONEncoder)
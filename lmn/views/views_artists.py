@@ -1,54 +1,65 @@
 from django.shortcuts import render, get_object_or_404
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 
 
 from ..models import Artist, Show
+from ..cache import cached, cache_version
+from ..conditional import conditional_page, latest
+from ..public import public_page
 from ..forms import ArtistSearchForm
+from ..pagination import CursorPaginator
+from .views_shows import show_list
 
 
 def venues_for_artist(request, artist_pk):
-    """ Get all of the venues where this artist has played a show """
-    shows = Show.objects.filter(artist=artist_pk).order_by('-show_date')  # most recent first
-    artist = Artist.objects.get(pk=artist_pk)
-
-    return render(request, 'lmn/venues/venue_list_for_artist.html', {'artist': artist, 'shows': shows})
+    """ Shows this artist has played, most recent first, a page at a time. ?format=json for JSON. """
+    artist = get_object_or_404(Artist, pk=artist_pk)
+    shows = Show.objects.listing().filter(artist=artist_pk)
+    return show_list(request, shows, 'lmn/venues/venue_list_for_artist.html', {'artist': artist})
 
 
 def artist_list(request):
     """ Get a list of all artists, ordered by name.
 
     If request contains a get parameter search_name then 
-    only include artists with names containing that text. """
+    only include artists with names containing that text, best match first. """
     form = ArtistSearchForm()
     search_name = request.GET.get('search_name')
     if search_name:
-        artists = Artist.objects.filter(name__icontains=search_name).order_by('name')
+        form = ArtistSearchForm(request.GET)
+        artists = form.results() if form.is_valid() else Artist.objects.none()
     else:
         artists = Artist.objects.all().order_by('name')
 
-    return render(request, 'lmn/artists/artist_list.html', {'artists': artists, 'form': form, 'search_term': search_name})
+    return render(request, 'lmn/artists/artist_list.html', {
+        'artists': artists, 'form': form, 'search_term': search_name, 'cache_version': cache_version(Artist)
+    })
+
 
+def artist_changed(request, artist_pk):
+    # cached with the artist, so a cached page costs no queries, modified or not
+    return cached(f'artist_changed:{artist_pk}', [Artist],
+                  lambda: latest(Artist.objects.filter(pk=artist_pk).values_list('updated_at').first()))
 
+
+@public_page
+@conditional_page(artist_changed)
 def artist_detail(request, artist_pk):
     """ Details about one artist """
-    artist = get_object_or_404(Artist, pk=artist_pk)
+    artist = cached(f'artist:{artist_pk}', [Artist], lambda: get_object_or_404(Artist, pk=artist_pk))
     return render(request, 'lmn/artists/artist_detail.html', {'artist': artist})
 
-# from https://simpleisbetterthancomplex.com/tutorial/2016/08/03/how-to-paginate-with-django.html
+@public_page
 def artist_index(request):
+    """ Artists ordered by name, 10 per page, or artists matching search_name, best match first. """
     form = ArtistSearchForm()
     search_name = request.GET.get('search_name')
     if search_name:
-        artists = Artist.objects.filter(name__icontains=search_name).order_by('name')
+        form = ArtistSearchForm(request.GET)
+        artists = form.results() if form.is_valid() else Artist.objects.none()
     else:
-        page = request.GET.get('page', 1)
-        artist_list = Artist.objects.all().order_by('name')
-        paginator = Paginator(artist_list, 10)
-        try:
-            artists = paginator.page(page)
-        except PageNotAnInteger:
-            artists = paginator.page(1)
-        except EmptyPage:
-            artists = paginator.page(paginator.num_pages)
-    return render(request, 'lmn/artists/artist_list.html', {'artists': artists , 'form': form, 'search_term': search_name})
-
+        paginator = CursorPaginator(Artist.objects.all(), 10, ordering=('name', 'pk'))
+        artists = paginator.get_page(request.GET.get('cursor'))
+    # the rows are only fetched if they aren't in the template's fragment cache
+    return render(request, 'lmn/artists/artist_list.html', {
+        'artists': artists, 'form': form, 'search_term': search_name, 'cache_version': cache_version(Artist)
+    })
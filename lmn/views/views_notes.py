@@ -2,32 +2,35 @@
 
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 
 
 from django.http import HttpResponseForbidden
 from django.core.exceptions import ValidationError
-from django.db import IntegrityError, transaction
-from django.utils import timezone
+from django.db import DatabaseError, IntegrityError, transaction
 from django.contrib import messages
 
-from ..models import Note, Show
-from ..forms import NewNoteForm 
+from ..models import Note, Show, Artist, Venue
+from ..cache import cached, cache_version
+from ..conditional import conditional_page, latest
+from ..public import public_page, private_fragment
+from ..forms import NewNoteForm, NoteSearchForm
+from ..pagination import CursorPaginator
 
 
 @login_required
 def new_note(request, show_pk):
     """Create a new Note for a Show."""
-    show = get_object_or_404(Show, pk=show_pk)
+    # the show, whether it's happened and the user's note about it, if any, in one query
+    show = get_object_or_404(Show.objects.review_status(request.user), pk=show_pk)
 
-    current_date = timezone.now()
-    if current_date < show.show_date:
+    if not show.is_past:
         messages.warning(request, 'Cannot create a note for a show that has not happened yet.')
         return redirect('notes_for_show', show_pk=show_pk)
 
-    user_note_already_created = Note.objects.filter(user=request.user, show=show).first()
-    if user_note_already_created:
+    if show.user_note_pk:
         messages.warning(request, 'You already created a note for this show.')
+        user_note_already_created = Note.objects.select_related('user__profile').get(pk=show.user_note_pk)
+        user_note_already_created.show = show
         return render(request, 'lmn/notes/note_detail.html', {'note': user_note_already_created})
 
     if request.method == 'POST':
@@ -64,7 +67,13 @@ def edit_note(request, note_pk):
 
             if form.is_valid():
                 note = form.save(commit=False)
-                note.save()
+                try:
+                    with transaction.atomic():
+                        note.save()
+                except DatabaseError:
+                    # only the changed columns are updated, which fails if the note was deleted meanwhile
+                    messages.warning(request, 'This note has been deleted.')
+                    return redirect('latest_notes')
                 return redirect('note_detail', note_pk=note.pk)
             else:
                 messages.info(request, 'Please double check that all fields are filled out correctly and uploaded images are valid.')
@@ -94,33 +103,59 @@ def delete_note(request, note_pk):
 
 def latest_notes(request):
     """Get the 20 most recent Notes, ordered with most recent first."""
-    notes = Note.objects.all().order_by('-posted_date')[:20]   # the 20 most recent notes
-    return render(request, 'lmn/notes/note_list.html', {'notes': notes})
+    notes = Note.objects.feed()[:20]   # the 20 most recent notes
+    return render(request, 'lmn/notes/note_list.html', {
+        'notes': notes, 'cache_version': cache_version(Note, Show, Artist, Venue)
+    })
 
 
 def notes_for_show(request, show_pk): 
     """Get Notes for one show, most recent first."""
-    show = get_object_or_404(Show, pk=show_pk)  
-    notes = Note.objects.filter(show=show_pk).order_by('-posted_date')
-    return render(request, 'lmn/notes/note_list.html', {'show': show, 'notes': notes})
+    show = cached(f'show:{show_pk}', [Show, Artist, Venue],
+                  lambda: get_object_or_404(Show.objects.select_related('artist', 'venue'), pk=show_pk))
+    notes = Note.objects.feed().filter(show=show_pk)
+    # the notes are only fetched if they aren't in the template's fragment cache
+    return render(request, 'lmn/notes/note_list.html', {
+        'show': show, 'notes': notes, 'cache_version': cache_version(Note, Show, Artist, Venue)
+    })
 
 
+def note_changed(request, note_pk):
+    """ When the note, its show, artist or venue, or its author's profile last changed. """
+    return latest(Note.objects.filter(pk=note_pk).values_list(
+        'updated_at', 'show__updated_at', 'show__artist__updated_at', 'show__venue__updated_at',
+        'user__profile__updated_at').first())
+
+
+@public_page
+@conditional_page(note_changed)
 def note_detail(request, note_pk):
     """Display one Note."""
-    note = get_object_or_404(Note, pk=note_pk)
+    note = get_object_or_404(Note.objects.select_related('show__artist', 'show__venue', 'user__profile'), pk=note_pk)
     return render(request, 'lmn/notes/note_detail.html', {'note': note})
 
 
-# from https://simpleisbetterthancomplex.com/tutorial/2016/08/03/how-to-paginate-with-django.html
-def notes_index(request):
-    notes_list = Note.objects.all().order_by('-posted_date')
-    page = request.GET.get('page', 1)
-    paginator = Paginator(notes_list, 10)
-    try:
-        notes = paginator.page(page)
-    except PageNotAnInteger:
-        notes = paginator.page(1)
-    except EmptyPage:
-        notes = paginator.page(paginator.num_pages)
-    return render(request, 'lmn/notes/note_list.html', { 'notes': notes })
+@private_fragment
+def note_controls(request, note_pk):
+    """ The edit and delete buttons of a public note_detail page, if the note is the user's. """
+    note = get_object_or_404(Note.objects.select_related('user'), pk=note_pk)
+    return render(request, 'lmn/notes/note_controls.html', {'note': note})
 
+
+@public_page
+def notes_index(request):
+    """Latest Notes, most recent first, 10 per page. ?cursor= selects the page.
+
+    If request contains a get parameter search_text then only include
+    notes with that text in their title or text, best match first."""
+    form = NoteSearchForm()
+    search_text = request.GET.get('search_text')
+    if search_text:
+        form = NoteSearchForm(request.GET)
+        notes = form.results() if form.is_valid() else Note.objects.none()
+    else:
+        paginator = CursorPaginator(Note.objects.feed(), 10, ordering=('-posted_date', '-pk'))
+        notes = paginator.get_page(request.GET.get('cursor'))
+    return render(request, 'lmn/notes/note_list.html', {
+        'notes': notes, 'form': form, 'search_term': search_text, 'cache_version': cache_version(Note, Show, Artist, Venue)
+    })
@@ -0,0 +1,45 @@
+""" Pages of shows, shared by the shows at a venue and shows for an artist views. """
+
+from django.shortcuts import render
+from django.http import JsonResponse
+from django.urls import reverse
+
+from ..pagination import CursorPaginator
+
+
+SHOWS_PER_PAGE = 20
+
+
+def show_list(request, shows, template_name, context):
+    """ Render one page of shows from Show.objects.listing(), most recent first. ?cursor= selects the page.
+
+    With ?format=json the page is returned as JSON instead, for infinite scroll:
+
+        {"shows": [{"id": 1, "show_date": "2017-01-02T17:30:00Z", "artist": "...", ...}, ...],
+         "next": "URL of the next page of JSON, or null on the last page"}
+    """
+    paginator = CursorPaginator(shows, SHOWS_PER_PAGE, ordering=('-show_date', '-pk'))
+    page = paginator.get_page(request.GET.get('cursor'))
+
+    if request.GET.get('format') == 'json':
+        next_cursor = page.next_cursor
+        return JsonResponse({
+            'shows': [show_json(show) for show in page],
+            'next': f'{request.path}?format=json&cursor={next_cursor}' if next_cursor else None,
+        })
+
+    return render(request, template_name, dict(context, shows=page))
+
+
+def show_json(show):
+    """ A show from Show.objects.listing() as a dictionary for JsonResponse. """
+    return {
+        'id': show.pk,
+        'show_date': show.show_date,
+        'artist': show.artist.name,
+        'venue': show.venue.name,
+        'in_past': show.is_past,
+        'note_count': show.note_count,
+        'notes_url': reverse('notes_for_show', kwargs={'show_pk': show.pk}),
+        'new_note_url': reverse('new_note', kwargs={'show_pk': show.pk}),
+    }
@@ -3,29 +3,64 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth import authenticate, login
 from django.contrib import messages
 from django.http import HttpResponseForbidden
+from django.db import DatabaseError, transaction
+from django.db.models import Max
 
 from ..forms import UserRegistrationForm, UpdateProfileForm, UserUpdateForm
 from django.contrib.auth.models import User
 from ..models import Note, Profile
+from ..conditional import conditional_page, latest, remember_viewer
+from ..public import private_fragment
+from ..reviewable import reviewable_shows
+from ..timezones import SESSION_KEY as TIME_ZONE_SESSION_KEY
 
 
+def profile_changed(request, user_pk):
+    """ When the profile, favorites, or any of the user's notes, or their shows, artists or venues last changed.
+
+    Deleting a note changes the profile's note_count, and so its updated_at.
+    """
+    return latest(Profile.objects.filter(pk=user_pk).annotate(
+        notes=Max('user__note__updated_at'),
+        shows=Max('user__note__show__updated_at'),
+        artists=Max('user__note__show__artist__updated_at'),
+        venues=Max('user__note__show__venue__updated_at'),
+    ).values_list('updated_at', 'favorite_artist__updated_at', 'favorite_venue__updated_at',
+                  'notes', 'shows', 'artists', 'venues').first())
+
+
+@conditional_page(profile_changed)
 def user_profile(request, user_pk):
     """ Get user profile for any user on the site. 
     
     Any user may view any other user's profile. 
     """
 
-    user = User.objects.get(pk=user_pk)
-    usernotes = Note.objects.filter(user=user.pk).order_by('-posted_date')
+    user = User.objects.select_related('profile__favorite_artist', 'profile__favorite_venue').get(pk=user_pk)
+    usernotes = Note.objects.feed(preview_length=300).filter(user=user.pk)
     return render(request, 'lmn/users/user_profile.html', {'user_profile': user, 'notes': usernotes})
 
 
+@private_fragment
+def nav_account(request):
+    """ The account links of the navigation bar on public pages. ?path= is the page's path. """
+    return render(request, 'lmn/navbar_account.html', {'page_path': request.GET.get('path', '/')})
+
+
+@login_required
+def shows_to_review(request):
+    """ The past shows the logged-in user hasn't written a note about yet, most recent first. """
+    shows = reviewable_shows(request.user, cursor=request.GET.get('cursor'))
+    return render(request, 'lmn/users/shows_to_review.html', {'shows': shows})
+
+
 @login_required
 def my_user_profile(request):
     """ Responds with the logged-in user's profile """
 
     user = request.user
-    profile = Profile.objects.get(user=user) #also prefills fields with user information
+    # the user's own instance, so remember_viewer sees it saved. Also prefills fields with user information
+    profile = user.profile
     
     if profile.user != request.user:
         return HttpResponseForbidden()
@@ -35,8 +70,16 @@ def my_user_profile(request):
         profile_form = UpdateProfileForm(request.POST,request.FILES, instance=profile)
 
         if profile_form.is_valid() and user_form.is_valid():
-            user.save()
-            profile.save() 
+            try:
+                with transaction.atomic():
+                    user.save()
+                    profile.save()
+            except DatabaseError:
+                # only the profile's changed columns are updated, which fails if it was deleted meanwhile
+                messages.add_message(request, messages.INFO, 'Unable to update your profile, it has been deleted.')
+                return redirect('homepage')
+            request.session[TIME_ZONE_SESSION_KEY] = profile.time_zone
+            remember_viewer(User, request, user)
             messages.success(request,('Your profile was successfully updated!'))
             return redirect('user_profile', user_pk=user.pk)
         else:
@@ -1,9 +1,13 @@
 from django.shortcuts import render, get_object_or_404
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 
 
 from ..models import Venue, Show
+from ..cache import cached, cache_version
+from ..conditional import conditional_page, latest
+from ..public import public_page
 from ..forms import VenueSearchForm
+from ..pagination import CursorPaginator
+from .views_shows import show_list
 
 
 def venue_list(request):
@@ -11,41 +15,47 @@ def venue_list(request):
     search_name = request.GET.get('search_name')
 
     if search_name:
-        # search for this venue, display results. Use case-insensitive contains
-        venues = Venue.objects.filter(name__icontains=search_name).order_by('name')
+        # search for this venue, display results, best match first
+        form = VenueSearchForm(request.GET)
+        venues = form.results() if form.is_valid() else Venue.objects.none()
     else:
         venues = Venue.objects.all().order_by('name')   # TODO paginate results
 
-    return render(request, 'lmn/venues/venue_list.html', {'venues': venues, 'form': form, 'search_term': search_name})
+    return render(request, 'lmn/venues/venue_list.html', {
+        'venues': venues, 'form': form, 'search_term': search_name, 'cache_version': cache_version(Venue)
+    })
 
 
 def artists_at_venue(request, venue_pk):   # pk = venue_pk
-    """ Get all of the artists who have played a show at the venue with pk provided """
+    """ Shows at the venue with pk provided, most recent first, a page at a time. ?format=json for JSON. """
+    venue = get_object_or_404(Venue, pk=venue_pk)
+    shows = Show.objects.listing().filter(venue=venue_pk)
+    return show_list(request, shows, 'lmn/artists/artist_list_for_venue.html', {'venue': venue})
 
-    shows = Show.objects.filter(venue=venue_pk).order_by('-show_date') 
-    venue = Venue.objects.get(pk=venue_pk)
 
-    return render(request, 'lmn/artists/artist_list_for_venue.html', {'venue': venue, 'shows': shows})
+def venue_changed(request, venue_pk):
+    return cached(f'venue_changed:{venue_pk}', [Venue],
+                  lambda: latest(Venue.objects.filter(pk=venue_pk).values_list('updated_at').first()))
 
 
+@public_page
+@conditional_page(venue_changed)
 def venue_detail(request, venue_pk):
-    venue = get_object_or_404(Venue, pk=venue_pk)
+    venue = cached(f'venue:{venue_pk}', [Venue], lambda: get_object_or_404(Venue, pk=venue_pk))
     return render(request, 'lmn/venues/venue_detail.html', {'venue': venue})
 
-# from https://simpleisbetterthancomplex.com/tutorial/2016/08/03/how-to-paginate-with-django.html
+@public_page
 def venue_index(request):
+    """ Venues ordered by name, 10 per page, or venues matching search_name, best match first. """
     form = VenueSearchForm()
     search_name = request.GET.get('search_name')
     if search_name:
-        venues = Venue.objects.filter(name__icontains=search_name).order_by('name')
+        form = VenueSearchForm(request.GET)
+        venues = form.results() if form.is_valid() else Venue.objects.none()
     else:
-        page = request.GET.get('page', 1)
-        venue_list = Venue.objects.all().order_by('name')
-        paginator = Paginator(venue_list, 10)
-        try:
-            venues = paginator.page(page)
-        except PageNotAnInteger:
-            venues = paginator.page(1)
-        except EmptyPage:
-            venues = paginator.page(paginator.num_pages)
-    return render(request, 'lmn/venues/venue_list.html', {'venues': venues, 'form': form, 'search_term': search_name})
\ No newline at end of file
+        paginator = CursorPaginator(Venue.objects.all(), 10, ordering=('name', 'pk'))
+        venues = paginator.get_page(request.GET.get('cursor'))
+    # the rows are only fetched if they aren't in the template's fragment cache
+    return render(request, 'lmn/venues/venue_list.html', {
+        'venues': venues, 'form': form, 'search_term': search_name, 'cache_version': cache_version(Venue)
+    })
@@ -0,0 +1,17 @@
+"""
+ASGI config for lmnop_project project.
+
+It exposes the ASGI callable as a module-level variable named ``application``,
+for an ASGI server, e.g. gunicorn with LMN_ASGI=1, see gunicorn.conf.py.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/3.1/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lmnop_project.settings')
+
+application = get_asgi_application()
@@ -0,0 +1,29 @@
+""" Health checks for a load balancer or container orchestrator.
+
+/healthz/ - liveness. The process is serving requests. Doesn't touch the database, so a database
+            outage doesn't get every instance restarted.
+/readyz/  - readiness. The process can serve pages, the default database answers a query.
+"""
+
+import logging
+
+from django.db import connections
+from django.http import JsonResponse
+from django.views.decorators.cache import never_cache
+
+
+@never_cache
+def liveness(request):
+    return JsonResponse({'status': 'ok'})
+
+
+@never_cache
+def readiness(request):
+    try:
+        with connections['default'].cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+    except Exception:
+        logging.exception('Readiness check failed')
+        return JsonResponse({'status': 'unavailable', 'database': 'unavailable'}, status=503)
+    return JsonResponse({'status': 'ok', 'database': 'ok'})
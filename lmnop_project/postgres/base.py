@@ -0,0 +1,307 @@
+""" PostgreSQL database backend which reuses connections.
+
+Use it with ENGINE 'lmnop_project.postgres'. It is Django's postgresql backend plus:
+
+Health checks - a connection which has been idle for HEALTH_CHECK_SECONDS is tested with
+SELECT 1 before it's used again, and replaced if it's broken, e.g. after Cloud SQL restarts.
+Django only checks connections after an error.
+
+An optional pool - with POOL_SIZE set, connections are shared by the threads of the process.
+A request takes a connection from the pool when it first needs one, waiting up to
+POOL_TIMEOUT seconds if all are in use, and returns it when the request finishes.
+Without POOL_SIZE each thread keeps its own connection for CONN_MAX_AGE seconds.
+
+Warm-up - warm_up() opens connections before the first request, called from wsgi.py.
+
+Metrics - metrics_for(alias) counts connections opened and how long requests waited for one.
+
+The extra settings go in the database's OPTIONS, and aren't passed on to psycopg2:
+
+    'OPTIONS': {'POOL_SIZE': 8, 'POOL_MIN': 2, 'POOL_TIMEOUT': 10, 'HEALTH_CHECK_SECONDS': 30}
+"""
+
+import logging
+import threading
+import time
+
+import psycopg2
+import psycopg2.extras
+from django.db import connections, OperationalError
+from django.db.backends.postgresql import base
+
+
+# OPTIONS read by this backend, rather than psycopg2
+BACKEND_OPTIONS = {
+    'POOL_SIZE': 0,
+    'POOL_MIN': 1,
+    'POOL_TIMEOUT': 10,
+    'HEALTH_CHECK_SECONDS': 30,
+}
+
+
+class ConnectionMetrics:
+    """ Connections opened, and time spent waiting for connections, by one database alias. """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.connections = 0          # connections handed to requests, new or from the pool
+            self.opened = 0               # new connections to the server
+            self.failed_health_checks = 0
+            self.wait_seconds = 0.0
+            self.max_wait_seconds = 0.0
+
+    def record_wait(self, seconds):
+        """ A request waited this long for a connection. """
+        with self.lock:
+            self.connections += 1
+            self.wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+    def record_opened(self):
+        with self.lock:
+            self.opened += 1
+
+    def record_failed_health_check(self):
+        with self.lock:
+            self.failed_health_checks += 1
+
+    def snapshot(self):
+        """ The metrics as a dictionary, times in milliseconds. """
+        with self.lock:
+            return {
+                'connections': self.connections,
+                'opened': self.opened,
+                'failed_health_checks': self.failed_health_checks,
+                'mean_wait_ms': 1000 * self.wait_seconds / self.connections if self.connections else 0.0,
+                'max_wait_ms': 1000 * self.max_wait_seconds,
+            }
+
+
+_metrics = {}
+_metrics_lock = threading.Lock()
+
+
+def metrics_for(alias):
+    """ The ConnectionMetrics for a database alias. """
+    with _metrics_lock:
+        return _metrics.setdefault(alias, ConnectionMetrics())
+
+
+class ConnectionPool:
+    """ Up to size connections, shared by threads. A thread waits when they're all in use.
+
+    Args:
+        size ([int]): most connections open at once
+        connect ([callable]): opens a new connection
+    """
+
+    def __init__(self, size, connect):
+        self.size = size
+        self.connect = connect
+        self.idle = []   # (connection, time it was returned), most recently returned last
+        self.open = 0
+        self.condition = threading.Condition()
+
+    def get(self, timeout):
+        """ Return (connection, seconds it was idle), None for a new connection.
+
+        Raises:
+            OperationalError: if no connection is free within timeout seconds
+        """
+        with self.condition:
+            deadline = time.monotonic() + timeout
+            while not self.idle and self.open >= self.size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self.condition.wait(remaining):
+                    raise OperationalError(f'No database connection free in the pool of {self.size} after {timeout}s')
+            if self.idle:
+                connection, returned_at = self.idle.pop()
+                return connection, time.monotonic() - returned_at
+            self.open += 1
+
+        try:
+            return self.connect(), None
+        except Exception:
+            self.discard(None)
+            raise
+
+    def put(self, connection):
+        """ Return a connection, rolling back anything left uncommitted. """
+        if not connection.closed and connection.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                connection.rollback()
+            except psycopg2.Error:
+                connection.close()
+        if connection.closed:
+            self.discard(None)
+            return
+        with self.condition:
+            self.idle.append((connection, time.monotonic()))
+            self.condition.notify()
+
+    def discard(self, connection):
+        """ Close a connection taken from the pool which won't be returned, making room for a new one. """
+        if connection is not None and not connection.closed:
+            connection.close()
+        with self.condition:
+            self.open -= 1
+            self.condition.notify()
+
+    def fill(self, count):
+        """ Open connections until at least count are idle, or the pool is full. """
+        while True:
+            with self.condition:
+                if len(self.idle) >= count or self.open >= self.size:
+                    return
+                self.open += 1
+            try:
+                connection = self.connect()
+            except Exception:
+                self.discard(None)
+                raise
+            self.put(connection)
+
+    def close_all(self):
+        """ Close the idle connections. """
+        with self.condition:
+            idle, self.idle = self.idle, []
+            self.open -= len(idle)
+        for connection, returned_at in idle:
+            connection.close()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def new_connection(conn_params, metrics):
+    """ Open a connection for the pool. Shared by every thread, so it can't depend on a DatabaseWrapper. """
+    connection = psycopg2.connect(**conn_params)
+    # as Django's backend does, skip decoding jsonb so JSONField can decode it
+    psycopg2.extras.register_default_jsonb(conn_or_curs=connection, loads=lambda x: x)
+    metrics.record_opened()
+    return connection
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """ Django's postgresql backend with health checks, an optional pool and metrics. """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.options = {**BACKEND_OPTIONS, **{
+            name: value for name, value in self.settings_dict['OPTIONS'].items() if name in BACKEND_OPTIONS
+        }}
+        self.metrics = metrics_for(self.alias)
+        self.last_checked = None
+        self.checked_out_from = None   # the pool this thread's connection came from
+
+    @property
+    def pooled(self):
+        return bool(self.options['POOL_SIZE'])
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        for name in BACKEND_OPTIONS:
+            params.pop(name, None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        start = time.monotonic()
+        if self.pooled:
+            connection = self.checkout(conn_params)
+        else:
+            connection = super().get_new_connection(conn_params)
+            self.metrics.record_opened()
+        self.metrics.record_wait(time.monotonic() - start)
+        self.last_checked = time.monotonic()
+        return connection
+
+    def pool(self, conn_params=None):
+        """ This process's pool for this database, made the first time it's needed.
+
+        Pools are kept by connection parameters as well as alias, so a test database gets its own.
+        """
+        params = conn_params or self.get_connection_params()
+        key = (self.alias, tuple(sorted((name, str(value)) for name, value in params.items())))
+        with _pools_lock:
+            if key not in _pools:
+                _pools[key] = ConnectionPool(self.options['POOL_SIZE'], lambda: new_connection(params, self.metrics))
+            return _pools[key]
+
+    def checkout(self, conn_params):
+        """ Take a working connection from the pool. """
+        pool = self.checked_out_from = self.pool(conn_params)
+        while True:
+            connection, idle_seconds = pool.get(self.options['POOL_TIMEOUT'])
+            if idle_seconds is None or self.healthy(connection, idle_seconds):
+                break
+            pool.discard(connection)
+
+        # as Django's get_new_connection() does for a new connection
+        options = self.settings_dict['OPTIONS']
+        if 'isolation_level' in options:
+            self.isolation_level = options['isolation_level']
+            if self.isolation_level != connection.isolation_level:
+                connection.set_session(isolation_level=self.isolation_level)
+        else:
+            self.isolation_level = connection.isolation_level
+        return connection
+
+    def healthy(self, connection, idle_seconds):
+        """ Whether a connection idle for this long still works. Only checked after HEALTH_CHECK_SECONDS. """
+        interval = self.options['HEALTH_CHECK_SECONDS']
+        if interval is None or idle_seconds < interval:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            return True
+        except psycopg2.Error:
+            self.metrics.record_failed_health_check()
+            logging.warning(f'Replacing broken connection to database {self.alias!r}')
+            return False
+
+    def _close(self):
+        if self.connection is not None and self.pooled:
+            with self.wrap_database_errors:
+                self.checked_out_from.put(self.connection)
+        else:
+            super()._close()
+
+    def close_if_unusable_or_obsolete(self):
+        """ Also check a persistent connection which has been idle for HEALTH_CHECK_SECONDS still works.
+
+        Called by Django when each request starts and finishes.
+        """
+        super().close_if_unusable_or_obsolete()
+        now = time.monotonic()
+        if self.connection is not None and not self.in_atomic_block and self.last_checked is not None:
+            interval = self.options['HEALTH_CHECK_SECONDS']
+            if interval is not None and now - self.last_checked >= interval and not self.is_usable():
+                self.metrics.record_failed_health_check()
+                logging.warning(f'Closing broken connection to database {self.alias!r}')
+                self.close()
+        self.last_checked = now
+
+
+def warm_up():
+    """ Open connections to every database using this backend, so the first requests don't wait for them.
+
+    Pooled databases open POOL_MIN connections, others open this thread's connection.
+    Errors are logged, not raised - the app should still start if the database is down.
+    """
+    for alias in connections:
+        connection = connections[alias]
+        if not isinstance(connection, DatabaseWrapper):
+            continue
+        try:
+            if connection.pooled:
+                connection.pool().fill(connection.options['POOL_MIN'])
+            else:
+                connection.ensure_connection()
+        except Exception:
+            logging.exception(f'Unable to warm up connections to database {alias!r}')
@@ -0,0 +1,194 @@
+""" Per-request totals of SQL queries, template rendering and file storage time.
+
+ProfilingMiddleware profiles a sample of requests, PROFILING_SAMPLE_RATE, every request locally.
+For each one it logs a line of JSON to the lmn.profiling logger, e.g.
+
+    {"method": "GET", "path": "/notes/latest/", "view": "latest_notes", "status": 200, "total_ms": 41.2,
+     "db_queries": 3, "db_duplicates": 0, "db_ms": 4.1, "template_ms": 22.5, "storage_calls": 0,
+     "storage_ms": 0.0, "repeated_queries": []}
+
+repeated_queries lists SQL run PROFILING_REPEATED_QUERIES times or more with different parameters,
+the sign of a query per row (N+1) in a template, and db_duplicates counts queries repeated with the
+same parameters. With PROFILING_SERVER_TIMING, on by default locally, the totals are also sent in a
+Server-Timing header, which browser developer tools show with the request's timings.
+"""
+
+import contextvars
+import json
+import logging
+import random
+import time
+from collections import Counter
+from functools import wraps
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connections
+from django.template.base import Template
+from django.utils.functional import empty
+
+
+logger = logging.getLogger('lmn.profiling')
+
+# the Profile of the request being handled in this thread, or None if it isn't sampled
+current_profile = contextvars.ContextVar('current_profile', default=None)
+
+# default_storage methods which are timed
+STORAGE_METHODS = ('open', 'save', 'delete', 'exists', 'listdir', 'size', 'url', 'get_modified_time')
+
+
+class Profile:
+    """ Totals for one request. """
+
+    def __init__(self):
+        self.queries = Counter()   # SQL: times run
+        self.query_calls = Counter()   # (SQL, parameters): times run
+        self.db_seconds = 0
+        self.template_seconds = 0
+        self.rendering = False   # inside Template.render
+        self.storage_calls = 0
+        self.in_storage = False   # inside a default_storage method
+        self.storage_seconds = 0
+
+    def execute(self, execute, sql, params, many, context):
+        """ A database execute_wrapper, see https://docs.djangoproject.com/en/3.1/topics/db/instrumentation/ """
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - start
+            self.queries[sql] += 1
+            self.query_calls[(sql, repr(params))] += 1
+
+    @property
+    def query_count(self):
+        return sum(self.queries.values())
+
+    @property
+    def duplicate_count(self):
+        return sum(count - 1 for count in self.query_calls.values())
+
+    def repeated_queries(self, threshold):
+        """ SQL run at least threshold times, and how many times, most first. """
+        return [{'sql': sql, 'count': count} for sql, count in self.queries.most_common() if count >= threshold]
+
+
+def timed_template_render(render):
+    """ Time Template.render. Included templates are rendered inside their parent, so only the outermost is added. """
+    @wraps(render)
+    def timed_render(self, context):
+        profile = current_profile.get()
+        if profile is None or profile.rendering:
+            return render(self, context)
+        profile.rendering = True
+        start = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            profile.rendering = False
+            profile.template_seconds += time.perf_counter() - start
+    timed_render.profiled = True
+    return timed_render
+
+
+def timed_storage_method(method):
+    """ Time a storage method. Like templates, calls the storage makes itself, e.g. save calling exists, aren't added. """
+    @wraps(method)
+    def timed_method(*args, **kwargs):
+        profile = current_profile.get()
+        if profile is None or profile.in_storage:
+            return method(*args, **kwargs)
+        profile.in_storage = True
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            profile.in_storage = False
+            profile.storage_calls += 1
+            profile.storage_seconds += time.perf_counter() - start
+    timed_method.profiled = True
+    return timed_method
+
+
+def instrument():
+    """ Time template rendering and default_storage calls. They're only timed while a request is profiled. """
+    if not getattr(Template.render, 'profiled', False):
+        Template.render = timed_template_render(Template.render)
+    # the storage object's methods, not its class's, which other storages like the static files' may share
+    if default_storage._wrapped is empty:
+        default_storage._setup()
+    storage = default_storage._wrapped
+    for name in STORAGE_METHODS:
+        method = getattr(storage, name)
+        if not getattr(method, 'profiled', False):
+            setattr(storage, name, timed_storage_method(method))
+
+
+class ProfilingMiddleware:
+    """ Profile a sample of requests. Put it first in MIDDLEWARE, so it includes the time of the others. """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        instrument()
+
+    def __call__(self, request):
+        if random.random() >= settings.PROFILING_SAMPLE_RATE:
+            return self.get_response(request)
+
+        profile = Profile()
+        token = current_profile.set(profile)
+        start = time.perf_counter()
+        try:
+            with _execute_wrappers(profile):
+                response = self.get_response(request)
+        finally:
+            current_profile.reset(token)
+        total_seconds = time.perf_counter() - start
+
+        self.log(request, response, profile, total_seconds)
+        if settings.PROFILING_SERVER_TIMING:
+            response['Server-Timing'] = server_timing(profile, total_seconds)
+        return response
+
+    def log(self, request, response, profile, total_seconds):
+        resolver_match = getattr(request, 'resolver_match', None)
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': resolver_match.view_name if resolver_match else None,
+            'status': response.status_code,
+            'total_ms': round(total_seconds * 1000, 1),
+            'db_queries': profile.query_count,
+            'db_duplicates': profile.duplicate_count,
+            'db_ms': round(profile.db_seconds * 1000, 1),
+            'template_ms': round(profile.template_seconds * 1000, 1),
+            'storage_calls': profile.storage_calls,
+            'storage_ms': round(profile.storage_seconds * 1000, 1),
+            'repeated_queries': profile.repeated_queries(settings.PROFILING_REPEATED_QUERIES),
+        }))
+
+
+def server_timing(profile, total_seconds):
+    """ A Server-Timing header value of the profile's totals. """
+    return ', '.join([
+        f'db;dur={profile.db_seconds * 1000:.1f};desc="{profile.query_count} queries, '
+        f'{profile.duplicate_count} duplicates"',
+        f'template;dur={profile.template_seconds * 1000:.1f}',
+        f'storage;dur={profile.storage_seconds * 1000:.1f};desc="{profile.storage_calls} calls"',
+        f'total;dur={total_seconds * 1000:.1f}',
+    ])
+
+
+class _execute_wrappers:
+    """ Add profile's execute wrapper to every database connection of this thread, for the with block. """
+
+    def __init__(self, profile):
+        self.contexts = [connections[alias].execute_wrapper(profile.execute) for alias in connections]
+
+    def __enter__(self):
+        for context in self.contexts:
+            context.__enter__()
+
+    def __exit__(self, *exc_info):
+        for context in reversed(self.contexts):
+            context.__exit__(*exc_info)
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
 import os
+import sys
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -43,11 +44,13 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
-    'lmn',
+    'lmn.apps.LmnConfig',
     'get_initial_data'
 ]
 
 MIDDLEWARE = [
+    # first, so its totals include the other middleware
+    'lmnop_project.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -82,18 +85,33 @@ WSGI_APPLICATION = 'lmnop_project.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# Connections to Postgres are reused, see lmnop_project/postgres/base.py.
+# LMN_DB_POOL_SIZE connections are shared by the threads of each process, or if it's 0,
+# each thread keeps its own connection for LMN_DB_CONN_MAX_AGE seconds.
+DB_POOL_SIZE = int(os.getenv('LMN_DB_POOL_SIZE', '0'))
+POSTGRES_OPTIONS = {
+    'POOL_SIZE': DB_POOL_SIZE,
+    'POOL_MIN': min(DB_POOL_SIZE, 2),
+    'POOL_TIMEOUT': 10,
+    'HEALTH_CHECK_SECONDS': 30,
+}
+# a pooled connection goes back to the pool at the end of each request
+POSTGRES_CONN_MAX_AGE = 0 if DB_POOL_SIZE else int(os.getenv('LMN_DB_CONN_MAX_AGE', '60'))
+
 # for deployment
 if os.getenv('GAE_INSTANCE'):
     # if in production
     DATABASES = {
     # using postgres
         'default': {
-            'ENGINE': 'django.db.backends.postgresql',
+            'ENGINE': 'lmnop_project.postgres',
             'NAME': 'lmnopdb',
             'USER': 'lmn_user',
             'PASSWORD': os.environ['LMN_DB_PW'],
             'HOST': '/cloudsql/lmn-ejjns:us-central1:lmn-db',
             'PORT': '5432',
+            'CONN_MAX_AGE': POSTGRES_CONN_MAX_AGE,
+            'OPTIONS': POSTGRES_OPTIONS,
         }
     }
 elif os.getenv('LMN_PROXY'):
@@ -104,12 +122,29 @@ elif os.getenv('LMN_PROXY'):
     DATABASES = {
     # using postgres, connecting local app to production db
         'default': {
-            'ENGINE': 'django.db.backends.postgresql',
+            'ENGINE': 'lmnop_project.postgres',
             'NAME': 'lmnopdb',
             'USER': 'lmn_user',
             'PASSWORD': os.environ['LMN_DB_PW'],
             'HOST': '127.0.0.1',
             'PORT': '5432',
+            'CONN_MAX_AGE': POSTGRES_CONN_MAX_AGE,
+            'OPTIONS': POSTGRES_OPTIONS,
+        }
+    }
+elif os.getenv('LMN_LOCAL_POSTGRES'):
+    # a Postgres container standing in for production, see "Database connections" in the README
+    print('Using local postgres')
+    DATABASES = {
+        'default': {
+            'ENGINE': 'lmnop_project.postgres',
+            'NAME': 'lmnopdb',
+            'USER': 'lmn_user',
+            'PASSWORD': os.getenv('LMN_DB_PW', 'lmn'),
+            'HOST': os.getenv('LMN_DB_HOST', '127.0.0.1'),
+            'PORT': '5432',
+            'CONN_MAX_AGE': POSTGRES_CONN_MAX_AGE,
+            'OPTIONS': POSTGRES_OPTIONS,
         }
     }
 else:
@@ -124,10 +159,60 @@ else:
     }
 
 
+# Cache
+# https://docs.djangoproject.com/en/3.1/topics/cache/
+# Keys are versioned by lmn/cache.py, so cached pages are never stale and entries just expire.
+# The versions are kept in the 'shared' cache, which every server must see, or in 'default' if there's
+# no 'shared' cache.
+
+TESTING = sys.argv[1:2] == ['test']
+
+if TESTING:
+    # tests roll back the database without sending signals, so cached pages could outlive their rows
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+        }
+    }
+elif os.getenv('GAE_INSTANCE'):
+    # production. Pages are cached by each instance, shared by its worker processes. Versions are
+    # in the database, shared by every instance, so a change on one makes pages stale on all of them.
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': '/tmp/lmnop_cache',
+            'TIMEOUT': 60 * 60,
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        },
+        # the table is made by migrate, see lmn/migrations/0016_cache_table.py
+        'shared': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'lmn_shared_cache',
+            'TIMEOUT': None,
+        },
+    }
+else:
+    # local development
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'lmnop',
+            'TIMEOUT': 60 * 60,
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
 
+# Hashing passwords is slow on purpose. Tests log in and register users often, and don't need it to be.
+if TESTING:
+    PASSWORD_HASHERS = [
+        'django.contrib.auth.hashers.MD5PasswordHasher',
+        # the passwords in the fixtures
+        'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    ]
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -151,6 +236,9 @@ LANGUAGE_CODE = 'en-us'
 
 TIME_ZONE = 'UTC'
 
+# Dates are shown in this zone unless a user or venue has chosen another, see lmn/timezones.py
+DISPLAY_TIME_ZONE = 'America/Chicago'
+
 USE_I18N = True
 
 USE_L10N = True
@@ -160,6 +248,64 @@ USE_TZ = True
 
 
 
+# Test fixtures are loaded once for each set of them, then copied, see lmn/fixture_snapshots.py.
+FIXTURE_SNAPSHOTS = TESTING
+
+# Gives each process of manage.py test --parallel its own MEDIA_ROOT, and reports the speedup.
+TEST_RUNNER = 'lmnop_project.test_runner.TestRunner'
+
+
+# Number of pages of First Ave past shows read by populate_db
+SCRAPER_MAX_PAGES = 10
+
+# Parser for pages of shows - 'soup', 'stream' or 'lxml'. None for the fastest installed.
+SHOW_PARSER_BACKEND = None
+
+
+# Background tasks, see lmn/tasks.py. Run straight away unless LMN_TASKS_EAGER=0, which queues them for
+# python manage.py run_tasks. Only set it where a worker is running, or nothing runs the queued tasks.
+TASKS_EAGER = os.getenv('LMN_TASKS_EAGER', '1') == '1'
+TASK_MAX_ATTEMPTS = 5
+# wait before the first retry, doubled for each retry after that
+TASK_RETRY_SECONDS = 30
+# a task running for longer than this is assumed to have lost its worker, and is run again
+TASK_LOCK_SECONDS = 10 * 60
+
+
+# Pages rendered the same for everyone, see lmn/public.py, may be kept by a CDN for PUBLIC_PAGE_SECONDS,
+# then served stale for up to PUBLIC_PAGE_STALE_SECONDS more while the CDN fetches a new copy.
+PUBLIC_PAGE_SECONDS = int(os.getenv('LMN_PUBLIC_PAGE_SECONDS', '60'))
+PUBLIC_PAGE_STALE_SECONDS = int(os.getenv('LMN_PUBLIC_PAGE_STALE_SECONDS', '300'))
+
+
+# Requests profiled by lmnop_project/profiling.py - every request locally, 1 in 100 in production, none in tests.
+PROFILING_SAMPLE_RATE = float(os.getenv(
+    'LMN_PROFILING_SAMPLE_RATE',
+    '0' if TESTING else '0.01' if os.getenv('GAE_INSTANCE') else '1'
+))
+# send the totals in a Server-Timing header, as well as logging them. It shows how many queries a page makes.
+PROFILING_SERVER_TIMING = os.getenv('LMN_PROFILING_SERVER_TIMING', '1' if DEBUG else '0') == '1'
+# SQL run this many times in a request is listed in the log, it may be a query per row
+PROFILING_REPEATED_QUERIES = 5
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'lmn.profiling': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+
 # Where to send user after successful login, and logout, if no other page is provided.
 LOGIN_REDIRECT_URL = 'homepage'
 LOGOUT_REDIRECT_URL = 'user_logout'
@@ -0,0 +1,120 @@
+""" The test runner, which keeps test uploads out of media/ and reports how much running in parallel saved.
+
+    python manage.py test lmn.tests                      # once, to time one process
+    python manage.py test lmn.tests --parallel 4
+    python manage.py test lmn.tests --parallel           # a process per CPU
+
+Django gives each --parallel process its own copy of the test database. This gives each one its own
+MEDIA_ROOT too, a temporary directory holding a copy of the default avatar, so tests saving files with
+the same name don't overwrite each other's, and nothing is left in media/. Live servers for functional
+tests listen on a port the OS chooses, so each process's are on different ports.
+
+How long each run takes is saved in .test_timings.json, by the tests run and number of processes, and
+is compared with the last run of the same tests in one process, e.g.
+"Ran in 5.1s with 4 processes, 14.2s with 1 process: 2.8x faster".
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+from django.test import runner
+from django.test.utils import override_settings
+
+
+# files in media/ which pages expect to be there
+MEDIA_DEFAULTS = ('default.jpg', 'default.thumb.jpg', 'default.thumb.webp')
+
+TIMINGS_FILE = os.path.join(settings.BASE_DIR, '.test_timings.json')
+
+
+def make_media_root(parent, name):
+    """ A new directory in parent, with the default media files copied into it. """
+    media_root = os.path.join(parent, name)
+    os.makedirs(media_root)
+    for filename in MEDIA_DEFAULTS:
+        source = os.path.join(settings.BASE_DIR, 'media', filename)
+        if os.path.exists(source):
+            shutil.copy(source, media_root)
+    return media_root
+
+
+def init_worker(counter):
+    """ Set up a --parallel process: Django's database clone for it, then its own MEDIA_ROOT. """
+    runner._init_worker(counter)
+    override_settings(MEDIA_ROOT=make_media_root(settings.MEDIA_ROOT, f'worker{runner._worker_id}')).enable()
+
+
+class ParallelTestSuite(runner.ParallelTestSuite):
+    init_worker = init_worker
+
+
+def record_timing(tests, processes, seconds, path=TIMINGS_FILE):
+    """ Save how long a run took, and return how long the last run of the same tests in one process took.
+
+    Args:
+        tests (str): what was run, e.g. the test labels and number of tests
+        processes (int): number of processes the tests ran in
+
+    Returns:
+        float: seconds, or None if they haven't been run in one process
+    """
+    try:
+        with open(path) as file:
+            timings = json.load(file)
+    except (OSError, ValueError):
+        timings = {}
+    runs = timings.setdefault(tests, {})
+    runs[str(processes)] = round(seconds, 3)
+    try:
+        with open(path, 'w') as file:
+            json.dump(timings, file, indent=2, sort_keys=True)
+    except OSError:
+        pass
+    return runs.get('1')
+
+
+def timing_report(processes, seconds, one_process_seconds):
+    report = f'Ran in {seconds:.1f}s with {processes} process{"es" if processes > 1 else ""}'
+    if processes == 1:
+        return report
+    if one_process_seconds is None:
+        return report + ', run them without --parallel to compare'
+    return report + f', {one_process_seconds:.1f}s with 1 process: {one_process_seconds / seconds:.1f}x faster'
+
+
+class TestRunner(runner.DiscoverRunner):
+    parallel_test_suite = ParallelTestSuite
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.media_parent = tempfile.mkdtemp(prefix='lmn_test_media_')
+        self.media_override = override_settings(MEDIA_ROOT=make_media_root(self.media_parent, 'main'))
+        self.media_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.media_override.disable()
+        shutil.rmtree(self.media_parent, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
+
+    def build_suite(self, test_labels=None, extra_tests=None, **kwargs):
+        self.test_labels = sorted(test_labels or ['.'])
+        return super().build_suite(test_labels, extra_tests, **kwargs)
+
+    def run_suite(self, suite, **kwargs):
+        start = time.perf_counter()
+        result = super().run_suite(suite, **kwargs)
+        seconds = time.perf_counter() - start
+        # --parallel uses fewer processes than it's given if there are fewer TestCase classes
+        processes = suite.processes if isinstance(suite, runner.ParallelTestSuite) else 1
+        # only runs of the same tests which all passed are comparable
+        if result.wasSuccessful() and not self.failfast:
+            tests = f'{" ".join(self.test_labels)} ({result.testsRun} tests)'
+            one_process_seconds = record_timing(tests, processes, seconds)
+            if self.verbosity >= 1:
+                sys.stderr.write(timing_report(processes, seconds, one_process_seconds) + '\n')
+        return result
@@ -1,10 +1,32 @@
+from django.conf import settings
 from django.utils import timezone
-import pytz
+
+from lmn.models import Profile
+from lmn.timezones import SESSION_KEY, zone_or_default
+
 
 class TimezoneDefault:
+    """ Activate the time zone dates are shown in for each request, see lmn/timezones.py.
+
+    settings.DISPLAY_TIME_ZONE, or the logged in user's zone, which is in their session so no query
+    is needed. Public pages, see lmn/public.py, are the same for everyone and don't load the session,
+    so they use the default zone.
+    """
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
-        timezone.activate(pytz.timezone('America/Chicago'))
-        return self.get_response(request)
\ No newline at end of file
+        timezone.activate(zone_or_default(None))
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if getattr(view_func, 'public_page', False) or settings.SESSION_COOKIE_NAME not in request.COOKIES:
+            return None
+        if SESSION_KEY not in request.session and request.user.is_authenticated:
+            # logged in before time zones were kept in the session
+            request.session[SESSION_KEY] = Profile.objects.filter(pk=request.user.pk) \
+                .values_list('time_zone', flat=True).first() or ''
+        name = request.session.get(SESSION_KEY)
+        if name:
+            timezone.activate(zone_or_default(name))
+        return None
@@ -14,10 +14,15 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
+from django.contrib.staticfiles.urls import staticfiles_urlpatterns
 from django.urls import path, include
 
+from . import health
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('healthz/', health.liveness, name='liveness'),
+    path('readyz/', health.readiness, name='readiness'),
     path('', include('lmn.urls')),
     path('', include('get_initial_data.urls'))
 ]
@@ -25,4 +30,6 @@ urlpatterns = [
 from django.conf import settings
 from django.conf.urls.static import static
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    # runserver serves static files itself, gunicorn doesn't
+    urlpatterns += staticfiles_urlpatterns()
\ No newline at end of file
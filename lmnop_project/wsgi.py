@@ -15,3 +15,10 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lmnop_project.settings')
 
 application = get_wsgi_application()
 
+# open database connections now, rather than in the first requests.
+# gunicorn loads the app before forking its workers, which must not share connections,
+# so it sets LMN_WARM_UP=0 and warms up each worker instead, see gunicorn.conf.py.
+if os.getenv('LMN_WARM_UP', '1') == '1':
+    from lmnop_project.postgres.base import warm_up  # noqa: E402
+    warm_up()
+